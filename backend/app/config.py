@@ -16,17 +16,96 @@ class Settings(BaseSettings):
     turso_database_url: str
     turso_auth_token: str
 
+    # Local SQLite file used in local mode (defaults to backend/local.db)
+    local_db_path: Optional[str] = None
+
     # Claude API
     anthropic_api_key: str
+    anthropic_base_url: Optional[str] = None  # override for local stubs
 
     # Resend API (production only)
     resend_api_key: Optional[str] = None
     resend_from_email: Optional[str] = None
+    resend_api_url: Optional[str] = None  # override for local stubs
 
     # App Config
     frontend_url: str = "http://localhost:5173"
     port: int = 8000
 
+    # Admission control for ingestion endpoints (/webhooks/resend, /dev/receive-email).
+    # Per-route limits; keep 2 * ingest_max_concurrency well below the
+    # threadpool size (40) so dashboard reads always find a free worker.
+    ingest_max_concurrency: int = 8
+    ingest_max_queue: int = 32
+    ingest_queue_timeout: float = 10.0
+    ingest_retry_after: int = 5
+
+    # Inbound email rate limits (token buckets, checked before any Claude call)
+    sender_email_burst: int = 5
+    sender_emails_per_hour: float = 20
+    domain_email_burst: int = 20
+    domain_emails_per_hour: float = 120
+    global_email_burst: int = 60
+    global_emails_per_hour: float = 600
+    rate_limit_persist_interval: float = 30.0
+
+    # Queries slower than this are logged as [SLOW QUERY]
+    slow_query_ms: float = 250.0
+
+    # LLM call ledger (buffered, written by a background thread)
+    llm_ledger_flush_interval: float = 5.0
+    llm_ledger_batch_size: int = 100
+    llm_ledger_max_buffer: int = 10000
+
+    # Per-request profiler (off unless a token or sample rate is set).
+    # Send "X-Profile: <token>" to profile one request; optional
+    # "X-Profile-Mode: sampling|cprofile".
+    profiler_token: Optional[str] = None
+    profiler_sample_rate: float = 0.0
+    profiler_mode: str = "sampling"  # "sampling" (speedscope + folded) or "cprofile" (.prof)
+    profiler_interval_ms: float = 5.0
+    profiler_max_concurrent: int = 1  # sampled sessions at once
+    profiler_dir: str = "profiles"
+
+    # Ticket change stream (GET /tickets/stream, Server-Sent Events)
+    sse_max_clients: int = 200
+    sse_client_queue: int = 256  # events buffered per client before it is reset
+    sse_replay_buffer: int = 1000  # recent events kept for Last-Event-ID resume
+    sse_heartbeat_interval: float = 15.0
+    sse_retry_ms: int = 3000  # client reconnect delay
+
+    # Rows fetched per query by GET /tickets/export
+    export_chunk_size: int = 500
+
+    # GET /tickets/search ranks at most this many of the newest matches
+    # per source (email threads, extracted data)
+    search_candidate_limit: int = 2000
+
+    # Characters of each email body shown in GET /tickets/{id}/threads
+    thread_preview_chars: int = 280
+
+    # Archival (python -m app.services.ticket_archive): email threads of
+    # READY tickets untouched for this many days move to ticket_archive,
+    # this many tickets per transaction
+    archive_after_days: int = 90
+    archive_batch_size: int = 50
+
+    # Follow-up reminders (app.services.followup_scheduler): a
+    # WAITING_ON_CUSTOMER ticket idle for followup_reminder_after_hours
+    # gets a reminder, then again after twice as long each time, at most
+    # followup_max_reminders times. One replica (holding the lease) sweeps
+    # every followup_sweep_interval seconds, at most followup_max_batches
+    # batches of followup_batch_size tickets per run.
+    followup_reminders_enabled: bool = True
+    followup_reminder_after_hours: float = 48.0
+    followup_max_reminders: int = 3
+    followup_sweep_interval: float = 300.0
+    followup_batch_size: int = 20
+    followup_max_batches: int = 5
+    followup_lease_seconds: float = 600.0  # a dead holder's lease is taken over after this
+    followup_send_attempts: int = 5
+    followup_retry_seconds: float = 60.0  # first send retry; doubles per attempt
+
     class Config:
         # Load from .env.local or .env.production based on ENVIRONMENT variable
         env_file = ".env.local"
@@ -38,6 +117,11 @@ class Settings(BaseSettings):
         """Check if running in production mode."""
         return self.environment.lower() == "production"
 
+    @property
+    def profiler_enabled(self) -> bool:
+        """Check if request profiling can be triggered at all."""
+        return bool(self.profiler_token) or self.profiler_sample_rate > 0
+
     @property
     def is_local(self) -> bool:
         """Check if running in local/development mode."""
@@ -2,34 +2,167 @@
 Database connection and schema setup for Turso (LibSQL).
 """
 
+import contextlib
+import hashlib
 import libsql_client
 import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
 from app.config import settings
+from app.models.ticket import REQUIRED_FIELDS
+from app.utils.metrics import dependency_call_duration
+from app.utils.query_log import record_query
+
+
+class InstrumentedClient:
+    """
+    Thin wrapper around the LibSQL client that times every call.
+
+    Each round trip is recorded in the dependency latency histogram and
+    in the current request's query log (fingerprint, duration, rows).
+    """
+
+    def __init__(self, client, lock=None):
+        self._client = client
+        self._lock = lock or _NO_LOCK
+
+    def execute(self, stmt, args=None):
+        sql = _statement_sql(stmt)
+        start = time.perf_counter()
+        outcome = "error"
+        rows = 0
+        try:
+            with self._lock:
+                result = self._client.execute(stmt, args)
+            outcome = "ok"
+            rows = len(result.rows) or result.rows_affected
+            return result
+        finally:
+            elapsed = time.perf_counter() - start
+            dependency_call_duration.observe(("db", _statement_kind(sql), outcome), elapsed)
+            record_query(sql, elapsed * 1000, rows)
+
+    def batch(self, stmts):
+        start = time.perf_counter()
+        outcome = "error"
+        rows = 0
+        try:
+            with self._lock:
+                results = self._client.batch(stmts)
+            outcome = "ok"
+            rows = sum(len(r.rows) or r.rows_affected for r in results)
+            return results
+        finally:
+            elapsed = time.perf_counter() - start
+            dependency_call_duration.observe(("db", "batch", outcome), elapsed)
+            sql = "; ".join(_statement_sql(stmt) for stmt in stmts)
+            record_query(sql, elapsed * 1000, rows, statements=len(stmts))
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+def _statement_sql(stmt) -> str:
+    """SQL text of a statement given as str, tuple or Statement."""
+    if isinstance(stmt, str):
+        return stmt
+    if isinstance(stmt, tuple):
+        return stmt[0]
+    return stmt.sql
+
+
+def _statement_kind(sql: str) -> str:
+    """Leading SQL keyword, used as a low-cardinality metric label."""
+    keyword = sql.lstrip().split(None, 1)[0].lower() if sql.strip() else ""
+    if keyword in ("select", "insert", "update", "delete", "create", "with"):
+        return keyword
+    return "other"
+
+
+# libsql opens SQLite files with a zero busy timeout, so two threads
+# writing at once fail with SQLITE_BUSY instead of waiting. Statements
+# against a file database are serialized within the process.
+_sqlite_lock = threading.Lock()
+_NO_LOCK = contextlib.nullcontext()
+
+# One client per thread. Each libsql sync client owns a background
+# executor thread, so creating one per call leaked a thread per query.
+# A client does not close with its thread, and anyio retires threadpool
+# workers after 10s idle: whenever a thread opens a client, those of
+# threads that have exited are closed.
+_thread_clients = threading.local()
+# Client of each live thread, so shutdown can stop their (non-daemon)
+# threads. Keyed by thread: a reopened client replaces the closed one,
+# and entries of exited threads are dropped (and closed) as above
+_open_clients: Dict[threading.Thread, "InstrumentedClient"] = {}
+_open_clients_lock = threading.Lock()
 
 
-# Create Turso database client
 def get_db_client():
     """Get database client - uses local SQLite in development."""
+    client = getattr(_thread_clients, "client", None)
+    if client is None or client.closed:
+        url = _database_url()
+        lock = _sqlite_lock if url.startswith("file:") else None
+        client = InstrumentedClient(_create_db_client(url), lock=lock)
+        _thread_clients.client = client
+        with _open_clients_lock:
+            exited = [thread for thread in _open_clients if not thread.is_alive()]
+            retired = [_open_clients.pop(thread) for thread in exited]
+            _open_clients[threading.current_thread()] = client
+        _close_clients(retired)
+    return client
+
+
+def close_db_clients() -> None:
+    """Close every cached client; threads reopen one on next use."""
+    with _open_clients_lock:
+        clients = list(_open_clients.values())
+        _open_clients.clear()
+    _close_clients(clients)
+
+
+def _close_clients(clients: List["InstrumentedClient"]) -> None:
+    for client in clients:
+        if not client.closed:
+            try:
+                client.close()
+            except Exception as e:
+                # Its own thread closed it first (e.g. the startup backfill)
+                print(f"[DB] Client already closed: {e}")
+
+
+def _database_url() -> str:
+    """URL of the configured database."""
     # For local development, use a local SQLite file instead of Turso
     # This avoids WebSocket connection issues during testing
     if settings.is_local:
         # Use local SQLite database
-        local_db_path = os.path.join(os.path.dirname(__file__), "..", "local.db")
-        client = libsql_client.create_client_sync(
-            url=f"file:{local_db_path}"
-        )
-        return client
-    else:
-        # Production: use Turso
-        url = settings.turso_database_url
-        if url.startswith("libsql://"):
-            url = url.replace("libsql://", "https://")
-
-        client = libsql_client.create_client_sync(
-            url=url,
-            auth_token=settings.turso_auth_token
+        local_db_path = settings.local_db_path or os.path.join(
+            os.path.dirname(__file__), "..", "local.db"
         )
-        return client
+        return f"file:{local_db_path}"
+
+    # Production: use Turso
+    url = settings.turso_database_url
+    if url.startswith("libsql://"):
+        url = url.replace("libsql://", "https://")
+    return url
+
+
+# Create Turso database client
+def _create_db_client(url: str):
+    """Create a raw LibSQL client for the given URL."""
+    if url.startswith("file:"):
+        return libsql_client.create_client_sync(url=url)
+
+    return libsql_client.create_client_sync(
+        url=url,
+        auth_token=settings.turso_auth_token
+    )
 
 
 # Database schema
@@ -42,7 +175,8 @@ CREATE TABLE IF NOT EXISTS tickets (
     customer_email TEXT,
     status TEXT NOT NULL DEFAULT 'NEW',
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    version INTEGER NOT NULL DEFAULT 0
 );
 
 -- Extracted data table
@@ -84,29 +218,631 @@ CREATE TABLE IF NOT EXISTS mock_emails (
     timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Persisted token buckets for the inbound email rate limiter
+CREATE TABLE IF NOT EXISTS rate_limit_buckets (
+    bucket_key TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+
+-- Inbound emails held back by the rate limiter or auto-reply detection
+CREATE TABLE IF NOT EXISTS quarantined_emails (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    from_email TEXT,
+    subject TEXT,
+    body TEXT NOT NULL,
+    reason TEXT NOT NULL,
+    headers TEXT,
+    email_message_id TEXT,
+    received_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Ledger of every Claude call (usage, latency, cost)
+CREATE TABLE IF NOT EXISTS llm_calls (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ticket_id INTEGER,
+    model TEXT NOT NULL,
+    purpose TEXT NOT NULL,
+    input_tokens INTEGER NOT NULL DEFAULT 0,
+    output_tokens INTEGER NOT NULL DEFAULT 0,
+    cache_creation_input_tokens INTEGER NOT NULL DEFAULT 0,
+    cache_read_input_tokens INTEGER NOT NULL DEFAULT 0,
+    latency_ms REAL NOT NULL,
+    retries INTEGER NOT NULL DEFAULT 0,
+    parse_success INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    cost_usd REAL NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Append-only change log: every ticket_service write adds a row in the
+-- same transaction. seq orders all changes (GET /tickets/changes?since=)
+CREATE TABLE IF NOT EXISTS ticket_events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    ticket_id INTEGER NOT NULL,
+    event_type TEXT NOT NULL,
+    status TEXT,
+    version INTEGER,
+    fields TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Stats rollups for GET /tickets/stats, kept current by triggers
+-- (see STATS_TRIGGERS) and rebuilt from the base tables by
+-- python -m app.services.ticket_stats
+CREATE TABLE IF NOT EXISTS ticket_status_counts (
+    status TEXT PRIMARY KEY,
+    count INTEGER NOT NULL DEFAULT 0
+);
+
+-- Per UTC day: tickets created, tickets that became READY (and their
+-- summed time to READY), follow-ups sent and customer emails received
+CREATE TABLE IF NOT EXISTS ticket_stats_daily (
+    day TEXT PRIMARY KEY,
+    created INTEGER NOT NULL DEFAULT 0,
+    ready INTEGER NOT NULL DEFAULT 0,
+    ready_seconds REAL NOT NULL DEFAULT 0,
+    followups_sent INTEGER NOT NULL DEFAULT 0,
+    inbound_emails INTEGER NOT NULL DEFAULT 0
+);
+
+-- Histogram of time to READY (bucket i = up to READY_TIME_BUCKETS[i]
+-- seconds, the last bucket is everything slower)
+CREATE TABLE IF NOT EXISTS ticket_ready_times (
+    bucket INTEGER PRIMARY KEY,
+    count INTEGER NOT NULL DEFAULT 0,
+    seconds REAL NOT NULL DEFAULT 0
+);
+
+-- Email bodies, stored once per distinct text and compressed
+-- (see app.services.blob_store). hash is the SHA-256 of the text,
+-- size its length in bytes before compression
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    codec TEXT NOT NULL,
+    dictionary_id INTEGER,
+    size INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Archived email threads (see app.services.ticket_archive): one
+-- compressed payload per ticket with every email of its thread
+CREATE TABLE IF NOT EXISTS ticket_archive (
+    ticket_id INTEGER PRIMARY KEY,
+    thread_count INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    codec TEXT NOT NULL,
+    dictionary_id INTEGER,
+    data BLOB NOT NULL,
+    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Uncompressed stubs of archived emails, so replies still find their
+-- ticket by In-Reply-To and stats can be rebuilt without unpacking
+CREATE TABLE IF NOT EXISTS ticket_archive_threads (
+    id INTEGER PRIMARY KEY,
+    ticket_id INTEGER NOT NULL,
+    direction TEXT NOT NULL,
+    email_message_id TEXT,
+    timestamp TIMESTAMP
+);
+
+-- Preset compression dictionaries trained on our own emails. Never
+-- modified: blobs keep pointing at the dictionary they were written with
+CREATE TABLE IF NOT EXISTS blob_dictionaries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    data BLOB NOT NULL,
+    sample_count INTEGER,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
 -- Create indexes for performance
 CREATE INDEX IF NOT EXISTS idx_tickets_status ON tickets(status);
 CREATE INDEX IF NOT EXISTS idx_tickets_email ON tickets(customer_email);
+CREATE INDEX IF NOT EXISTS idx_extracted_data_ticket ON extracted_data(ticket_id);
 CREATE INDEX IF NOT EXISTS idx_email_threads_ticket ON email_threads(ticket_id);
 CREATE INDEX IF NOT EXISTS idx_mock_emails_timestamp ON mock_emails(timestamp DESC);
+CREATE INDEX IF NOT EXISTS idx_llm_calls_created ON llm_calls(created_at);
+CREATE INDEX IF NOT EXISTS idx_llm_calls_ticket ON llm_calls(ticket_id);
+CREATE INDEX IF NOT EXISTS idx_ticket_archive_threads_ticket ON ticket_archive_threads(ticket_id);
+CREATE INDEX IF NOT EXISTS idx_ticket_archive_threads_message ON ticket_archive_threads(email_message_id);
+"""
+
+
+# Columns added after the first release: (table, column, definition).
+# CREATE TABLE IF NOT EXISTS leaves existing tables alone, so these are
+# added with ALTER TABLE when missing. Part of the frozen baseline
+# migration (see MIGRATIONS).
+SCHEMA_COLUMNS = [
+    ("tickets", "version", "INTEGER NOT NULL DEFAULT 0"),
+    # Typed copies of the free-text specs, written by spec_normalizer
+    # (NULL when the text could not be parsed)
+    ("extracted_data", "ram_gb", "REAL"),
+    ("extracted_data", "storage_gb", "REAL"),
+    ("extracted_data", "storage_type", "TEXT"),
+    ("extracted_data", "screen_inches", "REAL"),
+    ("extracted_data", "quantity_int", "INTEGER"),
+    ("extracted_data", "budget_usd", "REAL"),
+    ("extracted_data", "deadline_date", "TEXT"),  # YYYY-MM-DD
+    ("extracted_data", "specs_version", "INTEGER"),  # NORMALIZER_VERSION that wrote them
+    # Bit i set = REQUIRED_FIELDS[i] missing, written with every extraction
+    # or manual update of the extracted data
+    ("tickets", "missing_mask", "INTEGER"),
+    # Body stored in blobs (email_body / body is then ''). NULL for rows
+    # written before blobs existed, until blob_store migrate moves them
+    ("email_threads", "body_hash", "TEXT"),
+    ("mock_emails", "body_hash", "TEXT"),
+    # Set while the ticket's email thread is in ticket_archive
+    ("tickets", "archived_at", "TIMESTAMP"),
+]
+
+# Statements containing ';' (trigger bodies) or depending on
+# SCHEMA_COLUMNS, run after the schema. Part of the frozen baseline
+# migration (see MIGRATIONS).
+#
+# tickets.version is a global, monotonically increasing change counter:
+# any write to a ticket, its extracted data or its email thread moves the
+# ticket to MAX(version) + 1. It backs the ETags on GET /tickets/ and
+# GET /tickets/{id} without reading the payload.
+_BUMP_VERSION = "UPDATE tickets SET version = (SELECT COALESCE(MAX(version), 0) + 1 FROM tickets) WHERE id = {ticket}"
+
+SCHEMA_POST_STATEMENTS = [
+    "CREATE INDEX IF NOT EXISTS idx_tickets_version ON tickets(version)",
+    # Range filters on GET /tickets/ (ticket_id last so the join to
+    # tickets is answered from the index)
+    "CREATE INDEX IF NOT EXISTS idx_extracted_data_ram_storage ON extracted_data(ram_gb, storage_gb, ticket_id)",
+    "CREATE INDEX IF NOT EXISTS idx_extracted_data_quantity ON extracted_data(quantity_int, ticket_id)",
+    "CREATE INDEX IF NOT EXISTS idx_extracted_data_budget ON extracted_data(budget_usd, ticket_id)",
+    "CREATE INDEX IF NOT EXISTS idx_extracted_data_deadline ON extracted_data(deadline_date, ticket_id)",
+    "CREATE INDEX IF NOT EXISTS idx_extracted_data_specs_version ON extracted_data(specs_version)",
+    # missing= filters expand to missing_mask IN (...) and the completeness
+    # counts group on it, both answered from this index
+    "CREATE INDEX IF NOT EXISTS idx_tickets_missing_mask ON tickets(missing_mask, status)",
+    # Blob garbage collection looks up references by hash
+    "CREATE INDEX IF NOT EXISTS idx_email_threads_body_hash ON email_threads(body_hash)",
+    "CREATE INDEX IF NOT EXISTS idx_mock_emails_body_hash ON mock_emails(body_hash)",
+    # Fill missing_mask for tickets written before the column existed
+    # (same rule as ExtractedData.get_missing_required_fields)
+    f"""
+    UPDATE tickets SET missing_mask = COALESCE((
+        SELECT {' + '.join(
+            f"(CASE WHEN TRIM(COALESCE(e.{field}, ''), char(32, 9, 10, 13)) = '' THEN {1 << i} ELSE 0 END)"
+            for i, field in enumerate(REQUIRED_FIELDS)
+        )}
+        FROM extracted_data e WHERE e.ticket_id = tickets.id
+    ), {(1 << len(REQUIRED_FIELDS)) - 1})
+    WHERE missing_mask IS NULL
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_tickets_version_insert AFTER INSERT ON tickets
+    BEGIN {_BUMP_VERSION.format(ticket="NEW.id")}; END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_tickets_version_update AFTER UPDATE ON tickets
+    WHEN NEW.version = OLD.version
+    BEGIN {_BUMP_VERSION.format(ticket="NEW.id")}; END
+    """,
+] + [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_{table}_version_{event.lower()} AFTER {event} ON {table}
+    BEGIN {_BUMP_VERSION.format(ticket=f"{row}.ticket_id")}; END
+    """
+    for table in ("extracted_data", "email_threads")
+    for event, row in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD"))
+]
+
+# Full-text search (GET /tickets/search): external-content FTS5 tables
+# indexing the text columns of these tables in place (no second copy of
+# the text), kept in sync by triggers. Prefix indexes make as-you-type
+# prefix queries cheap.
+SEARCH_INDEXES = {
+    "extracted_data_fts": ("extracted_data", [
+        "laptop_model", "ram", "storage", "screen_size", "warranty", "quantity",
+        "delivery_location", "delivery_timeline", "budget",
+    ]),
+}
+
+# Email bodies live compressed in blobs, where FTS5 cannot read them, so
+# the email index is contentless: ticket_service writes (subject, body)
+# into it next to every thread insert, and snippets are built from the
+# decompressed body. Rows are the email_threads ids.
+THREAD_SEARCH_INDEX = "email_threads_fts"
+THREAD_SEARCH_COLUMNS = ["email_subject", "email_body"]
+
+_SEARCH_TOKENIZER = "tokenize='unicode61 remove_diacritics 2', prefix='2 3'"
+
+
+def _search_index_statements(fts: str, table: str, columns) -> list:
+    """CREATE statements for one FTS5 index and its sync triggers."""
+    cols = ", ".join(columns)
+    new_values = ", ".join(f"NEW.{c}" for c in columns)
+    old_values = ", ".join(f"OLD.{c}" for c in columns)
+    insert = f"INSERT INTO {fts}(rowid, {cols}) VALUES (NEW.id, {new_values})"
+    delete = f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', OLD.id, {old_values})"
+    return [
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+            {cols}, content='{table}', content_rowid='id',
+            {_SEARCH_TOKENIZER}
+        )
+        """,
+        f"CREATE TRIGGER IF NOT EXISTS trg_{fts}_insert AFTER INSERT ON {table} BEGIN {insert}; END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_{fts}_delete AFTER DELETE ON {table} BEGIN {delete}; END",
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{fts}_update AFTER UPDATE OF {cols} ON {table}
+        BEGIN {delete}; {insert}; END
+        """,
+    ]
+
+
+for _fts, (_table, _columns) in SEARCH_INDEXES.items():
+    SCHEMA_POST_STATEMENTS += _search_index_statements(_fts, _table, _columns)
+
+SCHEMA_POST_STATEMENTS += [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {THREAD_SEARCH_INDEX} USING fts5(
+        {", ".join(THREAD_SEARCH_COLUMNS)}, content='', {_SEARCH_TOKENIZER}
+    )
+    """,
+] + [
+    # Sync triggers of the former external-content email index
+    f"DROP TRIGGER IF EXISTS trg_{THREAD_SEARCH_INDEX}_{event}"
+    for event in ("insert", "delete", "update")
+]
+
+
+# Stats rollups: triggers keep ticket_status_counts, ticket_stats_daily
+# and ticket_ready_times current in the transaction of every write, so
+# GET /tickets/stats never scans tickets or email_threads. A ticket counts
+# as becoming READY each time its status changes to READY, timed from its
+# creation.
+READY_TIME_BUCKETS = [
+    60, 300, 900, 1800, 3600, 2 * 3600, 4 * 3600, 8 * 3600, 12 * 3600,
+    86400, 2 * 86400, 3 * 86400, 5 * 86400, 7 * 86400, 14 * 86400, 30 * 86400,
+]
+
+
+def _ready_bucket(seconds: str) -> str:
+    """SQL CASE giving the READY_TIME_BUCKETS index of a seconds expression."""
+    whens = " ".join(f"WHEN {seconds} <= {bound} THEN {i}" for i, bound in enumerate(READY_TIME_BUCKETS))
+    return f"CASE {whens} ELSE {len(READY_TIME_BUCKETS)} END"
+
+
+def _count_status(status: str, delta: int) -> str:
+    return (
+        f"INSERT INTO ticket_status_counts (status, count) VALUES ({status}, {delta}) "
+        f"ON CONFLICT(status) DO UPDATE SET count = count + {delta}"
+    )
+
+
+_SECONDS_TO_READY = "MAX(0, (julianday('now') - julianday(NEW.created_at)) * 86400)"
+_BECAME_READY = f"""
+    INSERT INTO ticket_stats_daily (day, ready, ready_seconds)
+    VALUES (date('now'), 1, {_SECONDS_TO_READY})
+    ON CONFLICT(day) DO UPDATE SET ready = ready + 1, ready_seconds = ready_seconds + excluded.ready_seconds;
+    INSERT INTO ticket_ready_times (bucket, count, seconds)
+    VALUES ({_ready_bucket(_SECONDS_TO_READY)}, 1, {_SECONDS_TO_READY})
+    ON CONFLICT(bucket) DO UPDATE SET count = count + 1, seconds = seconds + excluded.seconds
 """
 
+STATS_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_stats_tickets_insert AFTER INSERT ON tickets
+    BEGIN
+        {_count_status("NEW.status", 1)};
+        INSERT INTO ticket_stats_daily (day, created)
+        VALUES (COALESCE(date(NEW.created_at), date('now')), 1)
+        ON CONFLICT(day) DO UPDATE SET created = created + 1;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_stats_tickets_status AFTER UPDATE OF status ON tickets
+    WHEN NEW.status IS NOT OLD.status
+    BEGIN
+        {_count_status("OLD.status", -1)};
+        {_count_status("NEW.status", 1)};
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_stats_tickets_delete AFTER DELETE ON tickets
+    BEGIN {_count_status("OLD.status", -1)}; END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_stats_tickets_ready_insert AFTER INSERT ON tickets
+    WHEN NEW.status = 'READY'
+    BEGIN {_BECAME_READY}; END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_stats_tickets_ready_update AFTER UPDATE OF status ON tickets
+    WHEN NEW.status = 'READY' AND OLD.status IS NOT 'READY'
+    BEGIN {_BECAME_READY}; END
+    """,
+    # Restoring an archived thread re-inserts emails already counted:
+    # they still have their ticket_archive_threads row at that point.
+    # (Replaces trg_stats_email_threads_insert, which counted them again.)
+    "DROP TRIGGER IF EXISTS trg_stats_email_threads_insert",
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_stats_email_threads_received AFTER INSERT ON email_threads
+    WHEN NOT EXISTS (SELECT 1 FROM ticket_archive_threads WHERE id = NEW.id)
+    BEGIN
+        INSERT INTO ticket_stats_daily (day, followups_sent, inbound_emails)
+        VALUES (
+            COALESCE(date(NEW.timestamp), date('now')),
+            NEW.direction = 'outbound', NEW.direction = 'inbound'
+        )
+        ON CONFLICT(day) DO UPDATE SET
+            followups_sent = followups_sent + excluded.followups_sent,
+            inbound_emails = inbound_emails + excluded.inbound_emails;
+    END
+    """,
+]
+SCHEMA_POST_STATEMENTS += STATS_TRIGGERS
+
+# Recompute the rollups from the base tables (run as one batch, so it is
+# atomic with respect to concurrent writes). Times to READY come from
+# status transitions in ticket_events; tickets older than the change log
+# fall back to updated_at for READY tickets.
+_READY_TRANSITIONS = """
+    WITH transitions AS (
+        SELECT ticket_id, created_at, status,
+               LAG(status) OVER (PARTITION BY ticket_id ORDER BY seq) AS previous
+        FROM ticket_events
+    ), ready AS (
+        SELECT tr.created_at AS ready_at,
+               MAX(0, (julianday(tr.created_at) - julianday(t.created_at)) * 86400) AS seconds
+        FROM transitions tr JOIN tickets t ON t.id = tr.ticket_id
+        WHERE tr.status = 'READY' AND tr.previous IS NOT 'READY'
+        UNION ALL
+        SELECT t.updated_at, MAX(0, (julianday(t.updated_at) - julianday(t.created_at)) * 86400)
+        FROM tickets t
+        WHERE t.status = 'READY'
+          AND NOT EXISTS (SELECT 1 FROM ticket_events e WHERE e.ticket_id = t.id)
+    )
+"""
+STATS_REBUILD_STATEMENTS = [
+    "DELETE FROM ticket_status_counts",
+    "DELETE FROM ticket_stats_daily",
+    "DELETE FROM ticket_ready_times",
+    "INSERT INTO ticket_status_counts (status, count) SELECT status, COUNT(*) FROM tickets GROUP BY status",
+    """
+    INSERT INTO ticket_stats_daily (day, created)
+    SELECT date(created_at), COUNT(*) FROM tickets WHERE created_at IS NOT NULL GROUP BY 1
+    """,
+    """
+    INSERT INTO ticket_stats_daily (day, followups_sent, inbound_emails)
+    SELECT date(timestamp), SUM(direction = 'outbound'), SUM(direction = 'inbound')
+    FROM (
+        SELECT timestamp, direction FROM email_threads
+        UNION ALL
+        SELECT timestamp, direction FROM ticket_archive_threads
+    )
+    WHERE timestamp IS NOT NULL GROUP BY 1
+    ON CONFLICT(day) DO UPDATE SET
+        followups_sent = excluded.followups_sent, inbound_emails = excluded.inbound_emails
+    """,
+    f"""
+    {_READY_TRANSITIONS}
+    INSERT INTO ticket_stats_daily (day, ready, ready_seconds)
+    SELECT date(ready_at), COUNT(*), SUM(seconds) FROM ready WHERE true GROUP BY 1
+    ON CONFLICT(day) DO UPDATE SET ready = excluded.ready, ready_seconds = excluded.ready_seconds
+    """,
+    f"""
+    {_READY_TRANSITIONS}
+    INSERT INTO ticket_ready_times (bucket, count, seconds)
+    SELECT {_ready_bucket("seconds")}, COUNT(*), SUM(seconds) FROM ready GROUP BY 1
+    """,
+]
+
+
+# Versioned migrations. schema_migrations records every applied
+# migration with a checksum of its SQL, so startup costs one query when
+# the schema is current, and a migration edited after release is caught
+# instead of silently diverging between databases.
+#
+# Migration 1 is the baseline: DATABASE_SCHEMA, SCHEMA_COLUMNS and
+# SCHEMA_POST_STATEMENTS as they were when migrations were introduced.
+# It also adopts databases created before then (whatever state they are
+# in). Those definitions are frozen: every schema change from now on is
+# a new entry at the end of MIGRATIONS, never an edit of an applied one.
+SCHEMA_MIGRATIONS_TABLE = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    checksum TEXT NOT NULL,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+
+@dataclass(frozen=True)
+class Migration:
+    """One schema change, applied in a single transaction."""
+    version: int
+    name: str
+    statements: Tuple[str, ...] = ()
+    # Builds the statements against the live database instead (baseline only)
+    prepare: Optional[Callable] = None
+
+    @property
+    def checksum(self) -> str:
+        sql = _BASELINE_SQL if self.prepare is not None else self.statements
+        return hashlib.sha256("\n;\n".join([self.name, *sql]).encode("utf-8")).hexdigest()
+
+
+def _split_schema(schema: str) -> List[str]:
+    return [stmt.strip() for stmt in schema.split(';') if stmt.strip()]
+
+
+_BASELINE_SQL = tuple(
+    _split_schema(DATABASE_SCHEMA)
+    + [f"ALTER TABLE {table} ADD COLUMN {column} {definition}" for table, column, definition in SCHEMA_COLUMNS]
+    + [statement.strip() for statement in SCHEMA_POST_STATEMENTS]
+)
+
+
+def _prepare_baseline(client) -> list:
+    """
+    Statements bringing any database to the baseline: create what is
+    missing (one batch, idempotent), then everything else in the
+    migration's transaction, based on what the database already had.
+    """
+    results = client.batch([
+        "SELECT name, sql FROM sqlite_master",
+        *_split_schema(DATABASE_SCHEMA),
+        """
+        SELECT m.name, p.name FROM sqlite_master m
+        JOIN pragma_table_info(m.name) p
+        WHERE m.type = 'table'
+        """,
+    ])
+    existing = {name: sql or "" for name, sql in results[0].rows}
+    columns = {(table, column) for table, column in results[-1].rows}
+
+    statements = [
+        f"ALTER TABLE {table} ADD COLUMN {column} {definition}"
+        for table, column, definition in SCHEMA_COLUMNS
+        if (table, column) not in columns
+    ]
+
+    # The email index used to read email_threads in place, which cannot
+    # see bodies stored in blobs: replace it with the contentless one
+    if "content='email_threads'" in existing.get(THREAD_SEARCH_INDEX, ""):
+        statements.append(f"DROP TABLE {THREAD_SEARCH_INDEX}")
+        del existing[THREAD_SEARCH_INDEX]
+
+    statements += SCHEMA_POST_STATEMENTS
+
+    # Index rows written before a search index existed. Bodies are still
+    # inline then: blobs arrived together with the contentless index.
+    for fts in SEARCH_INDEXES:
+        if fts not in existing:
+            statements.append(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+    if THREAD_SEARCH_INDEX not in existing:
+        statements.append(
+            f"INSERT INTO {THREAD_SEARCH_INDEX}(rowid, {', '.join(THREAD_SEARCH_COLUMNS)}) "
+            f"SELECT id, {', '.join(THREAD_SEARCH_COLUMNS)} FROM email_threads"
+        )
+
+    # Fill the stats rollups from rows written before they existed
+    if "ticket_stats_daily" not in existing:
+        statements += STATS_REBUILD_STATEMENTS
+
+    return statements
+
+
+MIGRATIONS = [
+    Migration(1, "baseline", prepare=_prepare_baseline),
+    # Follow-up reminders (app.services.followup_scheduler): reminders sent
+    # since the customer last wrote, the stale-ticket sweep's index, the
+    # send queue and the lease electing the replica that sweeps
+    Migration(2, "followup_reminders", (
+        "ALTER TABLE tickets ADD COLUMN reminders_sent INTEGER NOT NULL DEFAULT 0",
+        "CREATE INDEX IF NOT EXISTS idx_tickets_status_updated ON tickets(status, updated_at)",
+        """
+        CREATE TABLE IF NOT EXISTS followup_outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ticket_id INTEGER NOT NULL,
+            reminder INTEGER NOT NULL,
+            subject TEXT NOT NULL,
+            body TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL,
+            last_error TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (ticket_id) REFERENCES tickets(id)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_followup_outbox_due ON followup_outbox(status, next_attempt_at)",
+        "CREATE INDEX IF NOT EXISTS idx_followup_outbox_ticket ON followup_outbox(ticket_id)",
+        """
+        CREATE TABLE IF NOT EXISTS scheduler_leases (
+            name TEXT PRIMARY KEY,
+            holder TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        )
+        """,
+    )),
+]
+
+
+def _applied_migrations(client) -> Dict[int, str]:
+    """{version: checksum} of applied migrations (empty for a new database)."""
+    try:
+        result = client.execute("SELECT version, checksum FROM schema_migrations")
+    except Exception as e:
+        if "no such table" not in str(e):
+            raise
+        return {}
+    return {version: checksum for version, checksum in result.rows}
+
+
+def _apply_migration(client, migration: Migration) -> None:
+    """Run one migration and record it, in one transaction."""
+    statements = migration.prepare(client) if migration.prepare else list(migration.statements)
+    client.batch([
+        SCHEMA_MIGRATIONS_TABLE,
+        *statements,
+        (
+            "INSERT INTO schema_migrations (version, name, checksum) VALUES (?, ?, ?)",
+            [migration.version, migration.name, migration.checksum]
+        ),
+    ])
+
 
 def initialize_database():
-    """Initialize database schema."""
+    """
+    Bring the schema up to date: apply pending MIGRATIONS in order.
+
+    Costs one query when nothing is pending. Raises if a migration
+    fails or an applied migration no longer matches its checksum, so a
+    broken deploy fails at startup instead of serving on a half-migrated
+    schema.
+    """
     client = get_db_client()
+    applied = _applied_migrations(client)
+
+    for migration in MIGRATIONS:
+        checksum = applied.get(migration.version)
+        if checksum is not None and checksum != migration.checksum:
+            raise RuntimeError(
+                f"Migration {migration.version} ({migration.name}) was changed after it was applied; "
+                "add a new migration instead"
+            )
 
-    # Split schema into individual statements and execute
-    statements = [stmt.strip() for stmt in DATABASE_SCHEMA.split(';') if stmt.strip()]
+    pending = [m for m in MIGRATIONS if m.version not in applied]
+    latest = MIGRATIONS[-1].version
+    if not pending:
+        newer = max(applied) if applied else 0
+        if newer > latest:
+            print(f"[SCHEMA] Database is at version {newer}, newer than this code ({latest})")
+        print(f"[SCHEMA] Schema is current (version {latest})")
+        return
 
-    for statement in statements:
+    for migration in pending:
+        start = time.perf_counter()
         try:
-            client.execute(statement)
-        except Exception as e:
-            print(f"Error executing statement: {e}")
-            print(f"Statement: {statement[:100]}...")
+            _apply_migration(client, migration)
+        except Exception:
+            # Another process starting at the same time may have applied it
+            if _applied_migrations(client).get(migration.version) == migration.checksum:
+                continue
+            raise
+        print(f"[SCHEMA] Applied migration {migration.version} ({migration.name}) "
+              f"in {(time.perf_counter() - start) * 1000:.0f}ms")
+
+    print(f"[SUCCESS] Database schema initialized successfully (version {latest})")
+
+
+# Ticket number in a subject, e.g. "Re: TKT-20260117-0001"
+TICKET_NUMBER_PATTERN = re.compile(r'TKT-\d{8}-\d{4}')
 
-    print("[SUCCESS] Database schema initialized successfully")
+
+def extract_ticket_number(subject: str) -> Optional[str]:
+    """Ticket number referenced in an email subject, if any."""
+    match = TICKET_NUMBER_PATTERN.search(subject)
+    return match.group(0) if match else None
 
 
 def find_ticket_by_email_headers(
@@ -118,7 +854,8 @@ def find_ticket_by_email_headers(
     Find existing ticket by email threading headers.
 
     Priority order:
-    1. Match in_reply_to against email_threads.email_message_id
+    1. Match in_reply_to against email_threads.email_message_id (or the
+       stubs of archived emails)
     2. Extract ticket number from subject (e.g., "Re: TKT-20260117-0001")
     3. Find most recent ticket from customer_email (within last 7 days)
 
@@ -129,19 +866,21 @@ def find_ticket_by_email_headers(
     # Priority 1: Match by In-Reply-To header
     if in_reply_to:
         result = client.execute(
-            "SELECT ticket_id FROM email_threads WHERE email_message_id = ? LIMIT 1",
-            [in_reply_to]
+            """
+            SELECT ticket_id FROM email_threads WHERE email_message_id = ?
+            UNION ALL
+            SELECT ticket_id FROM ticket_archive_threads WHERE email_message_id = ?
+            LIMIT 1
+            """,
+            [in_reply_to, in_reply_to]
         )
         if result.rows:
             return result.rows[0][0]
 
     # Priority 2: Extract ticket number from subject
     if subject:
-        import re
-        # Look for pattern like "Re: TKT-20260117-0001" or "TKT-20260117-0001"
-        match = re.search(r'TKT-\d{8}-\d{4}', subject)
-        if match:
-            ticket_number = match.group(0)
+        ticket_number = extract_ticket_number(subject)
+        if ticket_number:
             result = client.execute(
                 "SELECT id FROM tickets WHERE ticket_number = ? LIMIT 1",
                 [ticket_number]
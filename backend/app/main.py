@@ -2,19 +2,36 @@
 Main FastAPI application.
 """
 
+# First, so the startup timer's "import" phase covers every import below
+from app.utils.startup import startup_timer
+
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse, PlainTextResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
-from app.routers import tickets, emails
-from app.database import initialize_database
+from app.routers import tickets, emails, llm_usage
+from app.database import close_db_clients, initialize_database
+from app.services.followup_scheduler import followup_scheduler
+from app.services.llm_ledger import llm_ledger
+from app.services.rate_limiter import inbound_guard
+from app.services.spec_normalizer import start_backfill
+from app.utils.admission import INGESTION_ROUTES, AdmissionMiddleware, admission_controller
+from app.utils.metrics import MetricsMiddleware, render_metrics, CONTENT_TYPE
+from app.utils.profiler import install_profiler
+from app.utils.query_log import QueryLogMiddleware
 
 # Create FastAPI app
 app = FastAPI(
     title="Customer Quote Request System",
     description="Automated email processing and quote request management",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
+# Shed load on ingestion endpoints (added before CORS so rejections
+# still carry CORS headers)
+app.add_middleware(AdmissionMiddleware, controller=admission_controller)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -22,24 +39,56 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Query-Count", "Server-Timing", "ETag"],
 )
 
+# Per-request query count / Server-Timing headers
+app.add_middleware(QueryLogMiddleware)
+
+# Record request latency (outermost, so shed and CORS-rejected requests count)
+app.add_middleware(MetricsMiddleware, known_paths=[path for _, path in INGESTION_ROUTES])
+
 # Include routers
 app.include_router(tickets.router)
 app.include_router(emails.router)
+app.include_router(llm_usage.router)
+
+# Opt-in request profiling; nothing is installed unless configured
+if settings.profiler_enabled:
+    install_profiler(app)
+
+startup_timer.mark("import")
 
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize database on startup."""
+    startup_timer.mark("server")  # server start-up between app import and this event
+    # Not caught: a failed migration must stop the deploy, not leave the
+    # app serving on a half-migrated schema
+    initialize_database()
+    startup_timer.mark("schema")
     try:
-        initialize_database()
+        start_backfill()  # typed spec columns for rows written before they existed
+        startup_timer.mark("backfill")
+        followup_scheduler.start()  # reminders for tickets waiting on the customer
+        startup_timer.mark("scheduler")
+        startup_timer.report()
         print(f"[SUCCESS] Application started in {settings.environment.upper()} mode")
         print(f"[INFO] Email mode: {'Resend (Production)' if settings.is_production else 'Mock (Development)'}")
     except Exception as e:
         print(f"[ERROR] Error during startup: {e}")
 
 
+@app.on_event("shutdown")
+def shutdown_event():
+    """Stop the reminder scheduler and write buffered LLM ledger entries and rate limit buckets before exiting."""
+    followup_scheduler.shutdown()
+    llm_ledger.flush()
+    inbound_guard.flush()  # tokens consumed since the last periodic flush
+    close_db_clients()
+
+
 @app.get("/")
 def root():
     """Root endpoint."""
@@ -56,10 +105,19 @@ def health_check():
     """Health check endpoint."""
     return {
         "status": "healthy",
-        "environment": settings.environment
+        "environment": settings.environment,
+        "admission": admission_controller.snapshot(),
+        "startup": startup_timer.snapshot(),
+        "reminders": followup_scheduler.snapshot()
     }
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus metrics in text exposition format."""
+    return Response(render_metrics(), media_type=CONTENT_TYPE)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
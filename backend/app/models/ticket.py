@@ -3,10 +3,29 @@ Pydantic models for tickets, extracted data, and email threads.
 """
 
 from pydantic import BaseModel, EmailStr
-from typing import Optional, List
-from datetime import datetime
+from typing import Any, Dict, Optional, List, Type, TypeVar
+from datetime import date, datetime
 from enum import Enum
 
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+def construct_trusted(model_cls: Type[ModelT], values: Dict[str, Any]) -> ModelT:
+    """
+    Build a model from data that is already valid (e.g. rows we wrote
+    ourselves) without running validators.
+
+    Same result as model_construct, which in pydantic 2.5 loops over every
+    field in Python and costs about as much as validation. values must
+    contain every field of the model, already converted to its type.
+    """
+    instance = model_cls.__new__(model_cls)
+    object.__setattr__(instance, "__dict__", values)
+    object.__setattr__(instance, "__pydantic_fields_set__", set(values))
+    object.__setattr__(instance, "__pydantic_extra__", None)
+    object.__setattr__(instance, "__pydantic_private__", None)
+    return instance
+
 
 class TicketStatus(str, Enum):
     """Ticket status enum."""
@@ -15,6 +34,25 @@ class TicketStatus(str, Enum):
     READY = "READY"
 
 
+# Fields a quote needs before it is READY (budget is optional). Bit i of
+# tickets.missing_mask is set when REQUIRED_FIELDS[i] is missing, so the
+# order must never change: append new fields at the end.
+REQUIRED_FIELDS = [
+    "laptop_model", "ram", "storage", "screen_size",
+    "warranty", "quantity", "delivery_location", "delivery_timeline"
+]
+
+
+def fields_to_mask(fields: List[str]) -> int:
+    """Bitmask for a list of REQUIRED_FIELDS names."""
+    return sum(1 << REQUIRED_FIELDS.index(field) for field in set(fields))
+
+
+def mask_to_fields(mask: int) -> List[str]:
+    """REQUIRED_FIELDS names set in a bitmask, in REQUIRED_FIELDS order."""
+    return [field for i, field in enumerate(REQUIRED_FIELDS) if mask & (1 << i)]
+
+
 class ExtractedData(BaseModel):
     """Extracted quote request data."""
     customer_name: Optional[str] = None
@@ -34,13 +72,8 @@ class ExtractedData(BaseModel):
         Get list of missing required fields.
         Budget is optional, all others are required.
         """
-        required_fields = [
-            "laptop_model", "ram", "storage", "screen_size",
-            "warranty", "quantity", "delivery_location", "delivery_timeline"
-        ]
-
         missing = []
-        for field in required_fields:
+        for field in REQUIRED_FIELDS:
             value = getattr(self, field)
             if not value or value.strip() == "":
                 missing.append(field)
@@ -51,6 +84,10 @@ class ExtractedData(BaseModel):
         """Check if all required fields are present."""
         return len(self.get_missing_required_fields()) == 0
 
+    def get_missing_mask(self) -> int:
+        """Missing required fields as a bitmask (stored in tickets.missing_mask)."""
+        return fields_to_mask(self.get_missing_required_fields())
+
 
 class EmailThread(BaseModel):
     """Email in a ticket thread."""
@@ -64,6 +101,27 @@ class EmailThread(BaseModel):
     timestamp: Optional[datetime] = None
 
 
+class EmailThreadPreview(BaseModel):
+    """Email in a thread page: metadata and the start of the body."""
+    id: int
+    ticket_id: int
+    email_subject: Optional[str] = None
+    direction: str  # "inbound" or "outbound"
+    email_message_id: Optional[str] = None
+    in_reply_to: Optional[str] = None
+    timestamp: Optional[datetime] = None
+    preview: str  # plain text, tags and extra whitespace removed
+    body_size: int  # bytes (UTF-8) of the full body
+    truncated: bool  # full body via GET /tickets/{id}/threads/{thread_id}
+
+
+class EmailThreadPage(BaseModel):
+    """A page of a ticket's email thread; pass next_cursor as ?cursor= to continue."""
+    threads: List[EmailThreadPreview]
+    next_cursor: Optional[int] = None
+    has_more: bool
+
+
 class Ticket(BaseModel):
     """Ticket model."""
     id: Optional[int] = None
@@ -74,11 +132,115 @@ class Ticket(BaseModel):
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
 
-    # Related data (not stored in tickets table directly)
+    # Related data (not stored in tickets table directly). email_threads is
+    # only loaded on request; the API pages it via /tickets/{id}/threads
     extracted_data: Optional[ExtractedData] = None
     email_threads: Optional[List[EmailThread]] = None
 
 
+class TicketSummary(BaseModel):
+    """Ticket row for list views: ticket columns plus model and quantity."""
+    id: int
+    ticket_number: str
+    customer_name: Optional[str] = None
+    customer_email: Optional[str] = None
+    status: TicketStatus
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    laptop_model: Optional[str] = None
+    quantity: Optional[str] = None
+    # Typed specs, only present when requested with fields=
+    ram_gb: Optional[float] = None
+    storage_gb: Optional[float] = None
+    storage_type: Optional[str] = None
+    screen_inches: Optional[float] = None
+    quantity_int: Optional[int] = None
+    budget_usd: Optional[float] = None
+    deadline_date: Optional[date] = None
+    missing_mask: Optional[int] = None  # see REQUIRED_FIELDS
+
+
+class MissingFieldGroup(BaseModel):
+    """Tickets missing exactly this set of required fields."""
+    missing_mask: int
+    missing: List[str]
+    count: int
+
+
+class MissingFieldCounts(BaseModel):
+    """Completeness breakdown of tickets by missing required fields."""
+    total: int
+    complete: int
+    fields: Dict[str, int]  # tickets missing each field (possibly among others)
+    groups: List[MissingFieldGroup]  # largest first
+
+
+class TicketStatsDay(BaseModel):
+    """Ticket activity on one UTC day."""
+    day: date
+    created: int
+    ready: int  # tickets that became READY that day
+    avg_seconds_to_ready: Optional[float] = None
+    followups_sent: int
+    inbound_emails: int
+
+
+class ReadyTimeBucket(BaseModel):
+    """Histogram bucket: tickets that took up to le_seconds to become READY."""
+    le_seconds: Optional[int] = None  # None = slower than every bound
+    count: int
+
+
+class TimeToReady(BaseModel):
+    """Time from ticket creation to READY (bucketed, so percentiles are upper bounds)."""
+    count: int
+    mean_seconds: Optional[float] = None
+    p50_seconds: Optional[int] = None
+    p90_seconds: Optional[int] = None
+    p95_seconds: Optional[int] = None
+    histogram: List[ReadyTimeBucket]
+
+
+class TicketStats(BaseModel):
+    """Dashboard statistics, served from the rollup tables."""
+    total: int
+    status_counts: Dict[str, int]
+    daily: List[TicketStatsDay]
+    time_to_ready: TimeToReady
+    followups_per_ticket: Optional[float] = None  # all time
+
+
+class TicketSearchResult(TicketSummary):
+    """Search hit: the ticket's summary plus its best-matching text."""
+    score: float  # BM25, higher is better
+    source: str  # "email" or "extracted_data"
+    snippet: Optional[str] = None  # matches wrapped in <mark>...</mark>
+
+
+class TicketSearchResults(BaseModel):
+    """A page of search results."""
+    results: List[TicketSearchResult]
+    has_more: bool
+
+
+class TicketChange(BaseModel):
+    """One entry of the ticket change log, with the ticket's state after it."""
+    seq: int
+    ticket_id: int
+    event_type: str  # created, reply_received, updated, followup_sent
+    status: Optional[TicketStatus] = None
+    version: Optional[int] = None
+    fields: List[str] = []
+    created_at: Optional[datetime] = None
+
+
+class TicketChanges(BaseModel):
+    """A page of the change log; pass next_since as ?since= to continue."""
+    changes: List[TicketChange]
+    next_since: int
+    has_more: bool
+
+
 class TicketCreate(BaseModel):
     """Model for creating a new ticket."""
     customer_name: Optional[str] = None
@@ -3,16 +3,23 @@ API routes for email processing (webhooks and development endpoints).
 """
 
 from fastapi import APIRouter, HTTPException, Request, Body
-from typing import Dict, List
+from starlette.concurrency import run_in_threadpool
+from typing import Dict, List, Optional
 import json
 from app.models.ticket import MockEmailCreate
 from app.services import ticket_service
 from app.services.email_service import email_service
+from app.services.rate_limiter import (
+    inbound_guard, quarantine_email, get_quarantined_emails, get_quarantined_email, delete_quarantined_email
+)
 from app.config import settings
 from app.database import find_ticket_by_email_headers
 
 router = APIRouter(tags=["emails"])
 
+# Quarantine header holding the ticket ID of a /dev/receive-email reply
+REPLY_TO_TICKET_HEADER = "x-reply-to-ticket"
+
 
 @router.post("/webhooks/resend")
 async def resend_webhook(request: Request):
@@ -69,48 +76,34 @@ async def resend_webhook(request: Request):
         print(f"[WEBHOOK] In-Reply-To: {in_reply_to}")
         print(f"[WEBHOOK] Body preview: {email_body[:100] if email_body else 'NO BODY'}")
 
-        # Check if this is a reply to an existing ticket
-        existing_ticket_id = find_ticket_by_email_headers(
-            in_reply_to=in_reply_to,
-            subject=email_subject,
-            customer_email=email_from
-        )
+        # Database and Claude calls are blocking, so run them in the
+        # threadpool instead of stalling the event loop for every request.
 
-        if existing_ticket_id:
-            # Reply to existing conversation - update ticket
-            print(f"[WEBHOOK] Found existing ticket: {existing_ticket_id}")
-            ticket = ticket_service.update_ticket_from_reply(
-                ticket_id=existing_ticket_id,
-                email_body=email_body,
-                email_subject=email_subject
+        # Hold back auto-replies and senders over their rate limit before
+        # any Claude call is made
+        decision = await run_in_threadpool(
+            inbound_guard.check, email_from, email_subject, headers
+        )
+        if not decision.allowed:
+            # in-reply-to is kept with the headers so a release can still
+            # match the ticket; a sender cannot name one directly
+            kept = {k: v for k, v in headers.items() if k.lower() != REPLY_TO_TICKET_HEADER}
+            await run_in_threadpool(
+                quarantine_email,
+                email_from, email_subject, email_body, decision.reason,
+                {**kept, "in-reply-to": in_reply_to} if in_reply_to else kept, message_id
             )
-
             return {
                 "success": True,
-                "type": "reply",
-                "ticket_id": ticket.id,
-                "ticket_number": ticket.ticket_number,
-                "status": ticket.status,
-                "message": "Ticket updated from customer reply"
+                "type": "quarantined",
+                "reason": decision.reason,
+                "message": f"Email quarantined: {decision.reason}"
             }
-        else:
-            # New conversation - create new ticket
-            print(f"[WEBHOOK] Creating new ticket")
-            ticket = ticket_service.create_ticket_from_email(
-                email_body=email_body,
-                email_subject=email_subject,
-                customer_email=email_from,
-                email_message_id=message_id
-            )
 
-            return {
-                "success": True,
-                "type": "new_ticket",
-                "ticket_id": ticket.id,
-                "ticket_number": ticket.ticket_number,
-                "status": ticket.status,
-                "message": f"New ticket created: {ticket.ticket_number}"
-            }
+        return await run_in_threadpool(
+            _process_inbound_email,
+            email_from, email_subject, email_body, message_id, in_reply_to
+        )
 
     except Exception as e:
         print(f"[WEBHOOK ERROR] {str(e)}")
@@ -119,6 +112,67 @@ async def resend_webhook(request: Request):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _process_inbound_email(
+    email_from: str,
+    email_subject: str,
+    email_body: str,
+    message_id: str,
+    in_reply_to: str,
+    reply_to_ticket_id: Optional[int] = None
+) -> Dict:
+    """
+    Turn an accepted inbound email into a new ticket or a reply to an
+    existing one (webhook and quarantine release). reply_to_ticket_id
+    skips the header matching (dev replies name their ticket directly).
+
+    Blocking (database and Claude calls): run it in the threadpool from
+    async routes.
+    """
+
+    # Check if this is a reply to an existing ticket
+    existing_ticket_id = reply_to_ticket_id or find_ticket_by_email_headers(
+        in_reply_to=in_reply_to,
+        subject=email_subject,
+        customer_email=email_from
+    )
+
+    if existing_ticket_id:
+        # Reply to existing conversation - update ticket
+        print(f"[WEBHOOK] Found existing ticket: {existing_ticket_id}")
+        ticket = ticket_service.update_ticket_from_reply(
+            ticket_id=existing_ticket_id,
+            email_body=email_body,
+            email_subject=email_subject
+        )
+
+        return {
+            "success": True,
+            "type": "reply",
+            "ticket_id": ticket.id,
+            "ticket_number": ticket.ticket_number,
+            "status": ticket.status,
+            "message": "Ticket updated from customer reply"
+        }
+
+    # New conversation - create new ticket
+    print(f"[WEBHOOK] Creating new ticket")
+    ticket = ticket_service.create_ticket_from_email(
+        email_body=email_body,
+        email_subject=email_subject,
+        customer_email=email_from,
+        email_message_id=message_id
+    )
+
+    return {
+        "success": True,
+        "type": "new_ticket",
+        "ticket_id": ticket.id,
+        "ticket_number": ticket.ticket_number,
+        "status": ticket.status,
+        "message": f"New ticket created: {ticket.ticket_number}"
+    }
+
+
 @router.post("/dev/receive-email")
 def simulate_receive_email(mock_email: MockEmailCreate):
     """
@@ -140,6 +194,20 @@ def simulate_receive_email(mock_email: MockEmailCreate):
         )
 
     try:
+        decision = inbound_guard.check(mock_email.from_email, mock_email.subject)
+        if not decision.allowed:
+            quarantine_email(
+                mock_email.from_email, mock_email.subject, mock_email.body, decision.reason,
+                # Kept so a release still updates the ticket replied to
+                {REPLY_TO_TICKET_HEADER: str(mock_email.in_reply_to)} if mock_email.in_reply_to else None
+            )
+            return {
+                "success": True,
+                "type": "quarantined",
+                "reason": decision.reason,
+                "message": f"Email quarantined: {decision.reason}"
+            }
+
         if mock_email.in_reply_to:
             # This is a reply to an existing ticket
             ticket = ticket_service.update_ticket_from_reply(
@@ -227,3 +295,61 @@ def clear_sent_emails():
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/quarantine")
+def list_quarantined_emails(limit: int = 50):
+    """
+    Get inbound emails held back by the rate limiter or auto-reply detection.
+
+    Query Parameters:
+    - limit: Maximum number of emails to return (default 50)
+    """
+
+    try:
+        emails = get_quarantined_emails(limit=limit)
+
+        return {
+            "success": True,
+            "count": len(emails),
+            "emails": emails
+        }
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/quarantine/{quarantine_id}/release")
+def release_quarantined_email(quarantine_id: int):
+    """
+    Process a quarantined email after all, through the same path as the
+    webhook (reply or new ticket), without the rate limit and auto-reply
+    checks, then remove it from quarantine.
+
+    Path Parameters:
+    - quarantine_id: ID from GET /quarantine
+    """
+
+    try:
+        email = get_quarantined_email(quarantine_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if not email:
+        raise HTTPException(status_code=404, detail="Quarantined email not found")
+
+    try:
+        headers = {k.lower(): v for k, v in email["headers"].items()}
+        reply_to_ticket = headers.get(REPLY_TO_TICKET_HEADER)
+        result = _process_inbound_email(
+            email["from"], email["subject"] or "", email["body"],
+            email["message_id"], headers.get("in-reply-to"),
+            int(reply_to_ticket) if reply_to_ticket else None
+        )
+        # Only once processed, so a failed release can be retried
+        delete_quarantined_email(quarantine_id)
+        print(f"[RATE LIMIT] Released quarantined email {quarantine_id} ({email['reason']})")
+        return {**result, "released": quarantine_id}
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,42 @@
+"""
+API routes for Claude usage, latency and cost reporting.
+"""
+
+from fastapi import APIRouter, HTTPException, Query
+from app.services import llm_ledger
+
+router = APIRouter(prefix="/llm", tags=["llm"])
+
+
+@router.get("/latency")
+def latency_stats(days: int = Query(7, ge=1, le=365, description="Look-back window in days")):
+    """
+    p50/p95 latency, average tokens, retries and parse success rate
+    per call purpose (extract, followup).
+    """
+    try:
+        return {"days": days, "purposes": llm_ledger.get_latency_stats(days=days)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/tickets")
+def ticket_usage(limit: int = Query(50, ge=1, le=500, description="Number of tickets to list")):
+    """
+    Average calls, tokens and cost per ticket, plus the most expensive tickets.
+    """
+    try:
+        return llm_ledger.get_ticket_usage(limit=limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/daily")
+def daily_cost(days: int = Query(30, ge=1, le=365, description="Look-back window in days")):
+    """
+    Calls, tokens and cost per day.
+    """
+    try:
+        return {"days": days, "daily": llm_ledger.get_daily_cost(days=days)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -2,40 +2,354 @@
 API routes for ticket management.
 """
 
-from fastapi import APIRouter, HTTPException, Query
+import hashlib
+from datetime import date, datetime, timezone
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import TypeAdapter
 from typing import Optional, List
-from app.models.ticket import Ticket, TicketUpdate
-from app.services import ticket_service
+from app.models.ticket import (
+    REQUIRED_FIELDS, EmailThread, EmailThreadPage, MissingFieldCounts, Ticket, TicketChanges,
+    TicketSearchResults, TicketStats, TicketSummary, TicketUpdate
+)
+from app.config import settings
+from app.services import ticket_service, ticket_stats
+from app.services.ticket_events import ticket_events
+from app.utils.export import EXPORT_MEDIA_TYPES, accepts_gzip, csv_chunks, gzip_chunks, ndjson_chunks
+from app.utils.responses import cache_headers, etag_matches, json_response, not_modified
 
 router = APIRouter(prefix="/tickets", tags=["tickets"])
 
+# Tickets are built from trusted rows, so responses are serialized
+# directly instead of being re-validated through response_model
+TICKET_ADAPTER = TypeAdapter(Ticket)
+THREAD_ADAPTER = TypeAdapter(EmailThread)
 
-@router.get("/", response_model=List[Ticket])
-def list_tickets(status: Optional[str] = Query(None, description="Filter by status")):
+# Bump when the JSON shape of list/detail responses changes, so cached
+# bodies from an older release are not revalidated as current
+REPRESENTATION_VERSION = "2"
+
+
+def _list_etag(
+    status: Optional[str],
+    fields: Optional[List[str]],
+    specs: Optional[dict] = None,
+    missing: Optional[List[int]] = None
+) -> str:
+    count, max_version = ticket_service.get_list_version(status, specs, missing)
+    spec_key = ",".join(f"{name}={value}" for name, value in (specs or {}).items() if value is not None)
+    missing_key = "" if missing is None else ",".join(map(str, missing))
+    key = (
+        f"{REPRESENTATION_VERSION}|{status or ''}|{','.join(fields or [])}|{spec_key}|{missing_key}"
+        f"|{count}|{max_version}"
+    )
+    return f'"{hashlib.sha1(key.encode()).hexdigest()[:20]}"'
+
+
+def _ticket_etag(ticket_id: int, version: int) -> str:
+    return f'"t{ticket_id}-v{version}-r{REPRESENTATION_VERSION}"'
+
+
+@router.get("/", response_model=List[TicketSummary])
+def list_tickets(
+    status: Optional[str] = Query(None, description="Filter by status"),
+    fields: Optional[str] = Query(
+        None, description="Comma-separated subset of TicketSummary fields to return"
+    ),
+    ram_gb_min: Optional[float] = Query(None, ge=0),
+    ram_gb_max: Optional[float] = Query(None, ge=0),
+    storage_gb_min: Optional[float] = Query(None, ge=0),
+    storage_gb_max: Optional[float] = Query(None, ge=0),
+    storage_type: Optional[str] = Query(None, pattern="^(SSD|HDD|HYBRID|EMMC)$"),
+    screen_inches_min: Optional[float] = Query(None, ge=0),
+    screen_inches_max: Optional[float] = Query(None, ge=0),
+    quantity_min: Optional[int] = Query(None, ge=0),
+    quantity_max: Optional[int] = Query(None, ge=0),
+    budget_usd_min: Optional[float] = Query(None, ge=0),
+    budget_usd_max: Optional[float] = Query(None, ge=0),
+    deadline_after: Optional[date] = Query(None, description="Deadline on or after (YYYY-MM-DD)"),
+    deadline_before: Optional[date] = Query(None, description="Deadline on or before (YYYY-MM-DD)"),
+    missing: Optional[str] = Query(
+        None, description="Comma-separated required fields the ticket is missing, e.g. warranty"
+    ),
+    missing_exact: bool = Query(False, description="Only tickets missing exactly the given fields"),
+    if_none_match: Optional[str] = Header(None)
+):
     """
-    Get all tickets, optionally filtered by status.
+    Get list-view summaries of all tickets, optionally filtered by status
+    and spec ranges. Full details (extracted data, email thread) come from
+    GET /tickets/{id}.
 
     Query Parameters:
     - status: Optional status filter (NEW, WAITING_ON_CUSTOMER, READY)
+    - fields: Optional sparse fieldset, e.g. fields=id,ticket_number,status.
+      The typed specs (ram_gb, storage_gb, storage_type, screen_inches,
+      quantity_int, budget_usd, deadline_date) are only returned when listed.
+    - ram_gb_min/max, storage_gb_min/max, storage_type, screen_inches_min/max,
+      quantity_min/max, budget_usd_min/max, deadline_after/before: inclusive
+      filters on the typed specs (tickets whose spec could not be parsed
+      are excluded)
+    - missing: Tickets missing all of these required fields, e.g.
+      missing=warranty; with missing_exact=true, missing only these
+      (missing=&missing_exact=true lists complete tickets)
+
+    Responses carry an ETag; a matching If-None-Match gets 304 without
+    loading the list.
+    """
+    selected = None
+    if fields:
+        selected = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = [f for f in selected if f not in ticket_service.SELECTABLE_COLUMNS]
+        if unknown or not selected:
+            problem = f"Unknown fields: {', '.join(unknown)}" if unknown else "No fields given"
+            raise HTTPException(
+                status_code=400,
+                detail=f"{problem}. Allowed: {', '.join(ticket_service.SELECTABLE_COLUMNS)}"
+            )
+        # Keep the requested order, drop duplicates
+        selected = list(dict.fromkeys(selected))
+
+    specs = {
+        "ram_gb_min": ram_gb_min,
+        "ram_gb_max": ram_gb_max,
+        "storage_gb_min": storage_gb_min,
+        "storage_gb_max": storage_gb_max,
+        "storage_type": storage_type,
+        "screen_inches_min": screen_inches_min,
+        "screen_inches_max": screen_inches_max,
+        "quantity_min": quantity_min,
+        "quantity_max": quantity_max,
+        "budget_usd_min": budget_usd_min,
+        "budget_usd_max": budget_usd_max,
+        "deadline_after": deadline_after.isoformat() if deadline_after else None,
+        "deadline_before": deadline_before.isoformat() if deadline_before else None,
+    }
+
+    missing_masks = None
+    if missing is not None:
+        missing_fields = [f.strip() for f in missing.split(",") if f.strip()]
+        unknown = [f for f in missing_fields if f not in REQUIRED_FIELDS]
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(REQUIRED_FIELDS)}"
+            )
+        missing_masks = ticket_service.missing_masks(missing_fields, exact=missing_exact)
+
+    try:
+        etag = _list_etag(status, selected, specs, missing_masks)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+
+        summaries = ticket_service.get_ticket_summaries(
+            status=status, fields=selected, specs=specs, missing=missing_masks
+        )
+        return ORJSONResponse(summaries, headers=cache_headers(etag))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/missing-fields", response_model=MissingFieldCounts)
+def missing_field_counts(status: Optional[str] = Query(None, description="Filter by status")):
+    """
+    Count tickets by missing required fields: how many miss each field,
+    and how many miss exactly each combination (e.g. only
+    delivery_timeline). List the tickets of a group with
+    GET /tickets/?missing=<fields>&missing_exact=true.
+    """
+    try:
+        return ORJSONResponse(ticket_service.get_missing_field_counts(status))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/stats", response_model=TicketStats)
+def get_ticket_stats(days: int = Query(30, ge=1, le=366, description="Days of daily activity")):
+    """
+    Counts per status, tickets created / made READY / followed up per
+    day, time-to-READY percentiles and follow-ups per ticket.
+
+    Read from rollup tables maintained by triggers, so the cost does not
+    grow with the number of tickets.
+    """
+    try:
+        return ORJSONResponse(ticket_stats.get_ticket_stats(days=days))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/search", response_model=TicketSearchResults)
+def search_tickets(
+    q: str = Query(..., min_length=1, max_length=200, description="Words or \"quoted phrases\""),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=10000)
+):
+    """
+    Full-text search over email subjects/bodies and extracted data.
+
+    Every word must match (the last one as a prefix); results are ranked
+    tickets with a highlighted snippet of their best match. Page with
+    offset while has_more is true.
+    """
+    try:
+        return ORJSONResponse(ticket_service.search_tickets(q, limit=limit, offset=offset))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/export")
+def export_tickets(
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    status: Optional[str] = Query(None, description="Filter by status"),
+    created_from: Optional[date] = Query(None, description="Created on or after (YYYY-MM-DD)"),
+    created_to: Optional[date] = Query(None, description="Created on or before (YYYY-MM-DD)"),
+    accept_encoding: Optional[str] = Header(None)
+):
+    """
+    Export tickets with their extracted data as NDJSON or CSV.
+
+    Rows are streamed in ID order, settings.export_chunk_size at a time,
+    so memory use does not grow with the table. Gzipped on the fly when
+    the client sends Accept-Encoding: gzip (e.g. curl --compressed).
+    """
+    chunks = ticket_service.iter_export_chunks(
+        status=status,
+        created_from=created_from.isoformat() if created_from else None,
+        created_to=created_to.isoformat() if created_to else None,
+        chunk_size=settings.export_chunk_size
+    )
+    encode = csv_chunks if export_format == "csv" else ndjson_chunks
+    body = encode(ticket_service.EXPORT_FIELDS, chunks)
+
+    filename = f"tickets-{datetime.now(timezone.utc):%Y%m%d}.{export_format}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"', "Vary": "Accept-Encoding"}
+    if accepts_gzip(accept_encoding):
+        body = gzip_chunks(body)
+        headers["Content-Encoding"] = "gzip"
+
+    return StreamingResponse(body, media_type=EXPORT_MEDIA_TYPES[export_format], headers=headers)
+
+
+@router.get("/changes", response_model=TicketChanges)
+def list_changes(
+    since: int = Query(0, ge=0, description="Return changes after this seq"),
+    limit: int = Query(500, ge=1, le=5000, description="Maximum changes per page")
+):
+    """
+    Incremental sync: ticket changes in commit order.
+
+    Start with since=0 (or the seq of a stream event), then keep passing
+    next_since back while has_more is true. Each change names the ticket,
+    what happened and the ticket's status and version afterwards; fetch
+    GET /tickets/{id} for the full record.
     """
     try:
-        tickets = ticket_service.get_tickets(status=status)
-        return tickets
+        return ORJSONResponse(ticket_service.get_changes(since=since, limit=limit))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/stream")
+async def stream_ticket_events(last_event_id: Optional[str] = Header(None)):
+    """
+    Server-Sent Events stream of ticket changes for open dashboards.
+
+    Events:
+    - ticket.created / ticket.updated: {"ticket": <TicketSummary>}
+    - reset: events were missed; reload the list and ticket views
+
+    Idle streams get a heartbeat comment every sse_heartbeat_interval
+    seconds. Reconnecting with Last-Event-ID (EventSource does this
+    automatically) replays the events missed in between.
+    """
+    if ticket_events.subscribers >= settings.sse_max_clients:
+        raise HTTPException(status_code=503, detail="Too many open ticket streams")
+
+    return StreamingResponse(
+        ticket_events.stream(last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/{ticket_id}", response_model=Ticket)
-def get_ticket(ticket_id: int):
+def get_ticket(ticket_id: int, if_none_match: Optional[str] = Header(None)):
     """
-    Get a single ticket by ID with all details including email thread.
+    Get a single ticket by ID with its extracted data. The email thread
+    is paged separately via GET /tickets/{id}/threads.
+
+    Responses carry an ETag; a matching If-None-Match gets 304 without
+    loading the ticket.
     """
+    version = ticket_service.get_ticket_version(ticket_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Ticket not found")
+
+    etag = _ticket_etag(ticket_id, version)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
     ticket = ticket_service.get_ticket_by_id(ticket_id)
 
     if not ticket:
         raise HTTPException(status_code=404, detail="Ticket not found")
 
-    return ticket
+    return json_response(TICKET_ADAPTER, ticket, headers=cache_headers(etag))
+
+
+@router.get("/{ticket_id}/threads", response_model=EmailThreadPage)
+def list_ticket_threads(
+    ticket_id: int,
+    cursor: Optional[int] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(20, ge=1, le=100),
+    order: str = Query("asc", pattern="^(asc|desc)$", description="asc = oldest first"),
+    if_none_match: Optional[str] = Header(None)
+):
+    """
+    Page through a ticket's email thread. Each entry has the email's
+    metadata, a plain-text preview and the body size; fetch the full
+    body with GET /tickets/{id}/threads/{thread_id}.
+
+    Responses carry an ETag tied to the ticket's version.
+    """
+    version = ticket_service.get_ticket_version(ticket_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Ticket not found")
+
+    etag = f'"t{ticket_id}-v{version}-r{REPRESENTATION_VERSION}-th-{order}-{cursor or 0}-{limit}"'
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    try:
+        page = ticket_service.get_thread_page(
+            ticket_id, cursor=cursor, limit=limit, newest_first=order == "desc"
+        )
+        return ORJSONResponse(page, headers=cache_headers(etag))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/{ticket_id}/threads/{thread_id}", response_model=EmailThread)
+def get_ticket_thread(ticket_id: int, thread_id: int, if_none_match: Optional[str] = Header(None)):
+    """
+    Get one email of a ticket's thread with its full body. Stored emails
+    never change, so the ETag only depends on the email ID and a
+    revalidation only checks that the email exists, without loading
+    its body.
+    """
+    etag = f'"e{thread_id}-r{REPRESENTATION_VERSION}"'
+    if etag_matches(if_none_match, etag) and ticket_service.thread_exists(ticket_id, thread_id):
+        return not_modified(etag)
+
+    # A miss, or an archived email (restored by get_thread)
+    thread = ticket_service.get_thread(ticket_id, thread_id)
+    if not thread:
+        raise HTTPException(status_code=404, detail="Email not found")
+
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    return json_response(THREAD_ADAPTER, thread, headers=cache_headers(etag))
 
 
 @router.patch("/{ticket_id}", response_model=Ticket)
@@ -53,7 +367,7 @@ def update_ticket(ticket_id: int, update_data: TicketUpdate):
     if not ticket:
         raise HTTPException(status_code=404, detail="Ticket not found")
 
-    return ticket
+    return json_response(TICKET_ADAPTER, ticket)
 
 
 @router.post("/{ticket_id}/send-email")
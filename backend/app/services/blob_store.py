@@ -0,0 +1,446 @@
+"""
+Content-addressed, compressed storage for email bodies.
+
+Email bodies (email_threads, mock_emails) are stored once per distinct
+text in the blobs table, keyed by the SHA-256 of the text and
+compressed with raw deflate. Rows reference them by body_hash and keep
+an empty email_body / body. Identical follow-up templates and forwarded
+history therefore take one row, however many tickets repeat them.
+
+Short emails compress poorly on their own, so a preset dictionary can
+be trained from our own corpus (the lines that recur across emails:
+greetings, signatures, template paragraphs) and stored in
+blob_dictionaries. Each blob records the dictionary it was compressed
+with, so training a new one never affects existing blobs.
+
+Rows written before this table existed still have their text in
+email_body; readers fall back to it (see decode_body), and `migrate`
+moves them over.
+
+Usage (from backend/):
+    python -m app.services.blob_store migrate [--train] [--batch-size 500]
+    python -m app.services.blob_store train [--samples 2000]
+    python -m app.services.blob_store report
+    python -m app.services.blob_store gc
+    python -m app.services.blob_store reindex   # rebuild the email search index
+"""
+
+import hashlib
+import threading
+import zlib
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.database import THREAD_SEARCH_INDEX, get_db_client
+
+CODEC_RAW = "raw"  # stored as-is: compression did not make it smaller
+CODEC_DEFLATE = "deflate"  # raw deflate (no zlib header), optionally with a dictionary
+
+# zlib only looks back 32KB, so a larger dictionary would not be used
+DICTIONARY_SIZE = 32 * 1024
+_COMPRESSION_LEVEL = 9
+
+
+def body_hash(text: str) -> str:
+    """Content address of a body: SHA-256 of its UTF-8 bytes, hex."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class BlobStore:
+    """Encodes bodies into blobs rows and decodes them back."""
+
+    def __init__(self):
+        self._dictionaries: Dict[int, bytes] = {}
+        self._active_dictionary: Optional[Tuple[int, bytes]] = None
+        self._active_loaded = False
+        self._lock = threading.Lock()
+
+    def put(self, text: str) -> Tuple[str, tuple]:
+        """
+        Statement storing a body, to run in the same batch as the row
+        that references it.
+
+        Args:
+            text: Email body
+
+        Returns:
+            (hash, (sql, args)) - INSERT OR IGNORE, so a body already
+            stored is neither compressed again nor duplicated
+        """
+        digest = body_hash(text)
+        codec, dictionary_id, data, size = self.encode(text)
+        return digest, (
+            """
+            INSERT OR IGNORE INTO blobs (hash, codec, dictionary_id, size, data)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            [digest, codec, dictionary_id, size, data]
+        )
+
+    def encode(self, text: str) -> Tuple[str, Optional[int], bytes, int]:
+        """
+        Compress a body with the active dictionary (if any).
+
+        Returns:
+            (codec, dictionary_id, data, uncompressed size in bytes)
+        """
+        raw = text.encode("utf-8")
+        dictionary_id, dictionary = self._active()
+
+        if dictionary:
+            compressor = zlib.compressobj(_COMPRESSION_LEVEL, zlib.DEFLATED, -15, zdict=dictionary)
+        else:
+            compressor = zlib.compressobj(_COMPRESSION_LEVEL, zlib.DEFLATED, -15)
+        data = compressor.compress(raw) + compressor.flush()
+
+        if len(data) >= len(raw):
+            return CODEC_RAW, None, raw, len(raw)
+        return CODEC_DEFLATE, dictionary_id if dictionary else None, data, len(raw)
+
+    def decode(self, codec: str, dictionary_id: Optional[int], data: bytes) -> str:
+        """Text of a blob (codec, dictionary_id and data as stored)."""
+        if codec == CODEC_RAW:
+            return bytes(data).decode("utf-8")
+        if codec != CODEC_DEFLATE:
+            raise ValueError(f"Unknown blob codec: {codec}")
+
+        if dictionary_id is None:
+            decompressor = zlib.decompressobj(-15)
+        else:
+            decompressor = zlib.decompressobj(-15, zdict=self._dictionary(dictionary_id))
+        return (decompressor.decompress(bytes(data)) + decompressor.flush()).decode("utf-8")
+
+    def decode_head(
+        self, codec: str, dictionary_id: Optional[int], data: bytes, max_chars: int
+    ) -> Tuple[str, bool]:
+        """
+        Start of a blob's text, decompressing no more than needed.
+
+        Returns:
+            (at most max_chars characters, whether that is the whole text)
+        """
+        max_bytes = max_chars * 4  # UTF-8 is at most 4 bytes per character
+        if codec == CODEC_RAW:
+            raw = bytes(data[:max_bytes])
+            complete = len(data) <= max_bytes
+        elif codec == CODEC_DEFLATE:
+            if dictionary_id is None:
+                decompressor = zlib.decompressobj(-15)
+            else:
+                decompressor = zlib.decompressobj(-15, zdict=self._dictionary(dictionary_id))
+            raw = decompressor.decompress(bytes(data), max_bytes)
+            complete = decompressor.eof
+        else:
+            raise ValueError(f"Unknown blob codec: {codec}")
+
+        # A character cut at max_bytes is dropped
+        text = raw.decode("utf-8", errors="strict" if complete else "ignore")
+        return text[:max_chars], complete and len(text) <= max_chars
+
+    def decode_body(self, text: Optional[str], codec: Optional[str], dictionary_id, data) -> str:
+        """
+        Body of a row selected with its blob columns (LEFT JOIN blobs):
+        the blob when there is one, else the legacy inline text.
+        """
+        if codec is None:
+            return text or ""
+        return self.decode(codec, dictionary_id, data)
+
+    def load(self, hashes: Iterable[str]) -> Dict[str, str]:
+        """Texts of several blobs in one query, keyed by hash."""
+        hashes = list(dict.fromkeys(hashes))
+        if not hashes:
+            return {}
+
+        client = get_db_client()
+        result = client.execute(
+            f"SELECT hash, codec, dictionary_id, data FROM blobs WHERE hash IN ({', '.join('?' for _ in hashes)})",
+            hashes
+        )
+        return {row[0]: self.decode(row[1], row[2], row[3]) for row in result.rows}
+
+    def _active(self) -> Tuple[Optional[int], Optional[bytes]]:
+        """Newest dictionary (loaded once per process)."""
+        if not self._active_loaded:
+            with self._lock:
+                if not self._active_loaded:
+                    client = get_db_client()
+                    result = client.execute(
+                        "SELECT id, data FROM blob_dictionaries ORDER BY id DESC LIMIT 1"
+                    )
+                    if result.rows:
+                        dictionary_id, data = result.rows[0][0], bytes(result.rows[0][1])
+                        self._dictionaries[dictionary_id] = data
+                        self._active_dictionary = (dictionary_id, data)
+                    self._active_loaded = True
+        return self._active_dictionary or (None, None)
+
+    def _dictionary(self, dictionary_id: int) -> bytes:
+        data = self._dictionaries.get(dictionary_id)
+        if data is None:
+            client = get_db_client()
+            result = client.execute("SELECT data FROM blob_dictionaries WHERE id = ?", [dictionary_id])
+            if not result.rows:
+                raise ValueError(f"Blob dictionary {dictionary_id} not found")
+            data = self._dictionaries[dictionary_id] = bytes(result.rows[0][0])
+        return data
+
+    def train_dictionary(self, samples: int = 2000) -> Optional[int]:
+        """
+        Build a dictionary from the newest `samples` email bodies and
+        make it the active one.
+
+        Returns:
+            New dictionary ID, or None if the corpus has nothing recurring
+        """
+        client = get_db_client()
+        result = client.execute(
+            """
+            SELECT th.email_body, b.codec, b.dictionary_id, b.data
+            FROM email_threads th
+            LEFT JOIN blobs b ON b.hash = th.body_hash
+            ORDER BY th.id DESC LIMIT ?
+            """,
+            [samples]
+        )
+        bodies = [self.decode_body(*row) for row in result.rows]
+
+        dictionary = build_dictionary(bodies)
+        if not dictionary:
+            return None
+
+        results = client.batch([(
+            "INSERT INTO blob_dictionaries (data, sample_count) VALUES (?, ?)",
+            [dictionary, len(bodies)]
+        )])
+        dictionary_id = results[0].last_insert_rowid
+        with self._lock:
+            self._dictionaries[dictionary_id] = dictionary
+            self._active_dictionary = (dictionary_id, dictionary)
+            self._active_loaded = True
+        return dictionary_id
+
+    def collect_garbage(self, hashes: Optional[List[str]] = None) -> int:
+        """
+        Delete blobs no row references any more (after threads or mock
+        emails are deleted or archived).
+
+        Args:
+            hashes: Only consider these blobs (default: all of them)
+
+        Returns:
+            Number of blobs deleted
+        """
+        sql = """
+            DELETE FROM blobs
+            WHERE NOT EXISTS (SELECT 1 FROM email_threads WHERE body_hash = blobs.hash)
+              AND NOT EXISTS (SELECT 1 FROM mock_emails WHERE body_hash = blobs.hash)
+        """
+        args = []
+        if hashes is not None:
+            hashes = list(dict.fromkeys(hashes))
+            if not hashes:
+                return 0
+            sql += f" AND hash IN ({', '.join('?' for _ in hashes)})"
+            args = hashes
+
+        client = get_db_client()
+        return client.execute(sql, args).rows_affected
+
+
+# Create singleton instance
+blob_store = BlobStore()
+
+
+def build_dictionary(bodies: List[str], size: int = DICTIONARY_SIZE) -> bytes:
+    """
+    Preset dictionary from recurring lines: every line found in at least
+    two bodies, most valuable (occurrences x length) last, because
+    deflate reaches the end of the dictionary with the shortest distances.
+    """
+    document_counts: Counter = Counter()
+    for body in bodies:
+        lines = {line.strip() for line in body.splitlines()}
+        document_counts.update(line for line in lines if len(line) >= 8)
+
+    recurring = [(count * len(line), line) for line, count in document_counts.items() if count >= 2]
+    recurring.sort(reverse=True)
+
+    chosen = []
+    used = 0
+    for _, line in recurring:
+        encoded = line.encode("utf-8") + b"\n"
+        if used + len(encoded) > size:
+            continue
+        chosen.append(encoded)
+        used += len(encoded)
+
+    return b"".join(reversed(chosen))
+
+
+def migrate_bodies(batch_size: int = 500) -> Dict[str, int]:
+    """
+    Move inline bodies (email_threads.email_body, mock_emails.body) into
+    blobs, in keyset-paginated batches of one read and one write each.
+    Search is unaffected: the contentless index already holds these texts.
+
+    Returns:
+        Counts of migrated rows per table
+    """
+    client = get_db_client()
+    migrated = {}
+
+    for table, column in (("email_threads", "email_body"), ("mock_emails", "body")):
+        count = 0
+        last_id = 0
+        while True:
+            result = client.execute(
+                f"""
+                SELECT id, {column} FROM {table}
+                WHERE id > ? AND body_hash IS NULL
+                ORDER BY id LIMIT ?
+                """,
+                [last_id, batch_size]
+            )
+            if not result.rows:
+                break
+
+            statements = []
+            for row_id, text in result.rows:
+                digest, statement = blob_store.put(text or "")
+                statements.append(statement)
+                statements.append((
+                    f"UPDATE {table} SET body_hash = ?, {column} = '' WHERE id = ?",
+                    [digest, row_id]
+                ))
+            client.batch(statements)
+
+            count += len(result.rows)
+            last_id = result.rows[-1][0]
+            print(f"[BLOBS] {table}: {count} rows migrated")
+        migrated[table] = count
+
+    return migrated
+
+
+def rebuild_thread_search_index(batch_size: int = 500) -> int:
+    """
+    Refill the contentless email search index from every thread, for
+    repairs (the index cannot be rebuilt by FTS5 itself: it does not
+    know the compressed bodies).
+
+    Returns:
+        Number of threads indexed
+    """
+    client = get_db_client()
+    client.execute(f"INSERT INTO {THREAD_SEARCH_INDEX}({THREAD_SEARCH_INDEX}) VALUES ('delete-all')")
+
+    count = 0
+    last_id = 0
+    while True:
+        result = client.execute(
+            """
+            SELECT th.id, th.email_subject, th.email_body, b.codec, b.dictionary_id, b.data
+            FROM email_threads th
+            LEFT JOIN blobs b ON b.hash = th.body_hash
+            WHERE th.id > ?
+            ORDER BY th.id LIMIT ?
+            """,
+            [last_id, batch_size]
+        )
+        if not result.rows:
+            break
+
+        client.batch([
+            (
+                f"INSERT INTO {THREAD_SEARCH_INDEX}(rowid, email_subject, email_body) VALUES (?, ?, ?)",
+                [row[0], row[1], blob_store.decode_body(*row[2:])]
+            )
+            for row in result.rows
+        ])
+        count += len(result.rows)
+        last_id = result.rows[-1][0]
+
+    return count
+
+
+def storage_report() -> Dict[str, int]:
+    """
+    Bytes used by email bodies: inline text still in rows, the text the
+    blobs stand for (counted once per referencing row) and what the
+    blobs and dictionaries actually take.
+    """
+    client = get_db_client()
+    inline, referenced, rows, distinct, raw, stored, dictionaries = client.batch([
+        """
+        SELECT (SELECT COALESCE(SUM(length(CAST(email_body AS BLOB))), 0) FROM email_threads)
+             + (SELECT COALESCE(SUM(length(CAST(body AS BLOB))), 0) FROM mock_emails)
+        """,
+        """
+        SELECT (SELECT COALESCE(SUM(b.size), 0) FROM email_threads th JOIN blobs b ON b.hash = th.body_hash)
+             + (SELECT COALESCE(SUM(b.size), 0) FROM mock_emails m JOIN blobs b ON b.hash = m.body_hash)
+        """,
+        """
+        SELECT (SELECT COUNT(*) FROM email_threads WHERE body_hash IS NOT NULL)
+             + (SELECT COUNT(*) FROM mock_emails WHERE body_hash IS NOT NULL)
+        """,
+        "SELECT COUNT(*) FROM blobs",
+        "SELECT COALESCE(SUM(size), 0) FROM blobs",
+        "SELECT COALESCE(SUM(length(data)), 0) FROM blobs",
+        "SELECT COALESCE(SUM(length(data)), 0) FROM blob_dictionaries",
+    ])
+    page_size, page_count, freelist_count = (
+        client.execute(f"PRAGMA {pragma}").rows[0][0]
+        for pragma in ("page_size", "page_count", "freelist_count")
+    )
+    return {
+        "inline_bytes": inline.rows[0][0],
+        "blob_rows": rows.rows[0][0],
+        "blob_text_bytes": referenced.rows[0][0],
+        "distinct_blobs": distinct.rows[0][0],
+        "distinct_text_bytes": raw.rows[0][0],
+        "stored_bytes": stored.rows[0][0] + dictionaries.rows[0][0],
+        "file_bytes": page_size * page_count,
+        "free_bytes": page_size * freelist_count,
+    }
+
+
+def _print_report(before: Dict[str, int], after: Dict[str, int]) -> None:
+    before_total = before["inline_bytes"] + before["stored_bytes"]
+    after_total = after["inline_bytes"] + after["stored_bytes"]
+    logical = after["inline_bytes"] + after["blob_text_bytes"]
+    print(f"[BLOBS] Bodies: {after['blob_rows']} rows in blobs, {after['distinct_blobs']} distinct")
+    print(f"[BLOBS] Text: {logical:,} bytes, {after['distinct_text_bytes']:,} after dedup")
+    print(f"[BLOBS] Stored: {before_total:,} -> {after_total:,} bytes"
+          + (f" ({after_total / before_total:.1%})" if before_total else ""))
+    if after["free_bytes"]:
+        print(f"[BLOBS] Database file: {after['file_bytes']:,} bytes, {after['free_bytes']:,} free "
+              "(VACUUM returns them to the OS)")
+
+
+if __name__ == "__main__":
+    import argparse
+    from app.database import close_db_clients, initialize_database
+
+    parser = argparse.ArgumentParser(description="Email body blob storage")
+    parser.add_argument("command", choices=["migrate", "train", "report", "gc", "reindex"])
+    parser.add_argument("--train", action="store_true", help="train a dictionary before migrating")
+    parser.add_argument("--samples", type=int, default=2000, help="bodies to train the dictionary on")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    initialize_database()
+    try:
+        before = storage_report()
+        if args.command == "train" or (args.command == "migrate" and args.train):
+            dictionary_id = blob_store.train_dictionary(samples=args.samples)
+            print(f"[BLOBS] Trained dictionary {dictionary_id}" if dictionary_id else "[BLOBS] Nothing recurring to train on")
+        if args.command == "migrate":
+            print(f"[BLOBS] Migrated {migrate_bodies(batch_size=args.batch_size)}")
+        if args.command == "gc":
+            print(f"[BLOBS] Deleted {blob_store.collect_garbage()} unreferenced blobs")
+        if args.command == "reindex":
+            print(f"[BLOBS] Indexed {rebuild_thread_search_index()} email threads")
+        _print_report(before, storage_report())
+    finally:
+        close_db_clients()
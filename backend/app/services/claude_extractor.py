@@ -3,15 +3,82 @@ Claude API integration for extracting quote details from emails
 and generating follow-up messages.
 """
 
-import anthropic
 import json
+import threading
+import time
 from typing import Dict, List
 from app.config import settings
 from app.models.ticket import ExtractedData
+from app.services.llm_ledger import LLMCall, llm_ledger
+from app.utils.metrics import time_dependency
 
 
-# Initialize Claude client
-claude_client = anthropic.Anthropic(api_key=settings.anthropic_api_key)
+# The anthropic SDK takes ~0.3s to import, and only ingestion needs it:
+# the client is built on first use instead of on every cold start
+_claude_client = None
+_claude_client_lock = threading.Lock()
+
+
+def get_claude_client():
+    """Shared Claude client, created (and the SDK imported) on first use."""
+    global _claude_client
+    if _claude_client is None:
+        with _claude_client_lock:
+            if _claude_client is None:
+                import anthropic
+                _claude_client = anthropic.Anthropic(
+                    api_key=settings.anthropic_api_key,
+                    base_url=settings.anthropic_base_url
+                )
+    return _claude_client
+
+CLAUDE_MODEL = "claude-sonnet-4-5-20250929"
+
+
+def _create_message(prompt: str, call: LLMCall):
+    """
+    Send a single-turn prompt to Claude, filling in the ledger entry
+    with latency, retries and token usage.
+    """
+    start = time.perf_counter()
+    try:
+        with time_dependency("anthropic", call.purpose):
+            raw_response = get_claude_client().messages.with_raw_response.create(
+                model=call.model,
+                max_tokens=1024,
+                messages=[
+                    {"role": "user", "content": prompt}
+                ]
+            )
+        message = raw_response.parse()
+    except Exception as e:
+        call.error = type(e).__name__
+        raise
+    finally:
+        call.latency_ms = (time.perf_counter() - start) * 1000
+
+    call.retries = getattr(raw_response, "retries_taken", 0)
+    usage = message.usage
+    call.input_tokens = usage.input_tokens
+    call.output_tokens = usage.output_tokens
+    call.cache_creation_input_tokens = getattr(usage, "cache_creation_input_tokens", None) or 0
+    call.cache_read_input_tokens = getattr(usage, "cache_read_input_tokens", None) or 0
+
+    return message
+
+
+def _parse_json_response(response_text: str) -> Dict:
+    """Parse a JSON reply, tolerating markdown code fences around it."""
+    response_text = response_text.strip()
+
+    # Remove markdown code blocks if present
+    if response_text.startswith("```"):
+        response_text = response_text.split("```")[1]
+        if response_text.startswith("json"):
+            response_text = response_text[4:]
+        response_text = response_text.strip()
+
+    return json.loads(response_text)
 
 
 def extract_quote_details(email_body: str, email_subject: str = "") -> ExtractedData:
@@ -48,36 +115,27 @@ Extract the following fields as JSON. If a field is not mentioned, set it to nul
 
 Return ONLY valid JSON with these exact field names. Do not include any explanation or markdown formatting."""
 
+    call = LLMCall(model=CLAUDE_MODEL, purpose="extract")
+
     try:
-        message = claude_client.messages.create(
-            model="claude-sonnet-4-5-20250929",
-            max_tokens=1024,
-            messages=[
-                {"role": "user", "content": prompt}
-            ]
-        )
+        message = _create_message(prompt, call)
 
         # Extract JSON from response
-        response_text = message.content[0].text.strip()
-
-        # Remove markdown code blocks if present
-        if response_text.startswith("```"):
-            response_text = response_text.split("```")[1]
-            if response_text.startswith("json"):
-                response_text = response_text[4:]
-            response_text = response_text.strip()
-
-        # Parse JSON
-        extracted_dict = json.loads(response_text)
+        extracted_dict = _parse_json_response(message.content[0].text)
 
         # Create ExtractedData object
-        return ExtractedData(**extracted_dict)
+        extracted_data = ExtractedData(**extracted_dict)
+        call.parse_success = True
+        return extracted_data
 
     except Exception as e:
         print(f"Error extracting data with Claude: {e}")
         # Return empty ExtractedData on error
         return ExtractedData()
 
+    finally:
+        llm_ledger.record(call)
+
 
 def generate_followup_email(
     customer_name: str,
@@ -148,26 +206,14 @@ Return in this exact JSON format:
 
 Return ONLY the JSON, no markdown formatting or explanations."""
 
+    call = LLMCall(model=CLAUDE_MODEL, purpose="followup")
+
     try:
-        message = claude_client.messages.create(
-            model="claude-sonnet-4-5-20250929",
-            max_tokens=1024,
-            messages=[
-                {"role": "user", "content": prompt}
-            ]
-        )
-
-        response_text = message.content[0].text.strip()
-
-        # Remove markdown code blocks if present
-        if response_text.startswith("```"):
-            response_text = response_text.split("```")[1]
-            if response_text.startswith("json"):
-                response_text = response_text[4:]
-            response_text = response_text.strip()
+        message = _create_message(prompt, call)
 
         # Parse JSON
-        email_dict = json.loads(response_text)
+        email_dict = _parse_json_response(message.content[0].text)
+        call.parse_success = True
 
         return email_dict
 
@@ -187,3 +233,6 @@ Please reply to this email with the above information, and I'll get your quote t
 Best regards,
 Sales Team"""
         }
+
+    finally:
+        llm_ledger.record(call)
@@ -4,9 +4,11 @@ Unified email service supporting both production (Resend) and development (Mock)
 
 from typing import Optional, Dict, List
 from datetime import datetime
-import resend
+import threading
 from app.config import settings
 from app.database import get_db_client
+from app.services.blob_store import blob_store
+from app.utils.metrics import time_dependency
 
 
 class EmailService:
@@ -14,12 +16,23 @@ class EmailService:
 
     def __init__(self):
         self.is_production = settings.is_production
-
-        if self.is_production:
-            # Initialize Resend for production
-            if not settings.resend_api_key:
-                raise ValueError("RESEND_API_KEY is required in production mode")
-            resend.api_key = settings.resend_api_key
+        self._resend = None
+        self._resend_lock = threading.Lock()
+
+        if self.is_production and not settings.resend_api_key:
+            raise ValueError("RESEND_API_KEY is required in production mode")
+
+    def _resend_client(self):
+        """The resend SDK, imported and configured on the first send (not at startup)."""
+        if self._resend is None:
+            with self._resend_lock:
+                if self._resend is None:
+                    import resend
+                    resend.api_key = settings.resend_api_key
+                    if settings.resend_api_url:
+                        resend.api_url = settings.resend_api_url
+                    self._resend = resend
+        return self._resend
 
     def send_email(
         self,
@@ -65,7 +78,9 @@ class EmailService:
                 "text": body
             }
 
-            response = resend.Emails.send(params)
+            resend = self._resend_client()
+            with time_dependency("resend", "send_email"):
+                response = resend.Emails.send(params)
 
             return {
                 "success": True,
@@ -95,18 +110,22 @@ class EmailService:
 
             client = get_db_client()
 
-            # Insert into mock_emails table
-            result = client.execute(
-                """
-                INSERT INTO mock_emails (to_email, from_email, subject, body)
-                VALUES (?, ?, ?, ?)
-                """,
-                [to_email, from_addr, subject, body]
-            )
+            # Insert into mock_emails table (body stored in blobs)
+            digest, put_blob = blob_store.put(body)
+            results = client.batch([
+                put_blob,
+                (
+                    """
+                    INSERT INTO mock_emails (to_email, from_email, subject, body, body_hash)
+                    VALUES (?, ?, ?, '', ?)
+                    """,
+                    [to_email, from_addr, subject, digest]
+                ),
+            ])
 
             return {
                 "success": True,
-                "message_id": f"mock_{result.last_insert_rowid}",
+                "message_id": f"mock_{results[-1].last_insert_rowid}",
                 "mode": "development (mock)",
                 "note": "Email stored in database, not actually sent"
             }
@@ -138,9 +157,11 @@ class EmailService:
 
             result = client.execute(
                 """
-                SELECT id, to_email, from_email, subject, body, timestamp
-                FROM mock_emails
-                ORDER BY timestamp DESC
+                SELECT m.id, m.to_email, m.from_email, m.subject, m.timestamp,
+                       m.body, b.codec, b.dictionary_id, b.data
+                FROM mock_emails m
+                LEFT JOIN blobs b ON b.hash = m.body_hash
+                ORDER BY m.timestamp DESC
                 LIMIT ?
                 """,
                 [limit]
@@ -153,8 +174,8 @@ class EmailService:
                     "to": row[1],
                     "from": row[2],
                     "subject": row[3],
-                    "body": row[4],
-                    "timestamp": row[5]
+                    "body": blob_store.decode_body(*row[5:]),
+                    "timestamp": row[4]
                 })
 
             return emails
@@ -177,6 +198,7 @@ class EmailService:
         try:
             client = get_db_client()
             client.execute("DELETE FROM mock_emails")
+            blob_store.collect_garbage()
 
             return {"success": True, "message": "All mock emails cleared"}
 
@@ -0,0 +1,431 @@
+"""
+Follow-up reminders for tickets waiting on the customer.
+
+A WAITING_ON_CUSTOMER ticket nobody has touched for
+settings.followup_reminder_after_hours gets a reminder, generated by
+the same path as every other follow-up (generate_followup_email). The
+next one comes after twice as long, and so on, up to
+settings.followup_max_reminders. A customer reply (or a status change)
+starts over. Every reminder moves updated_at, so the idle time is
+always measured from the last activity.
+
+Each run has two steps:
+
+1. Sweep: one range query over idx_tickets_status_updated finds the
+   stale tickets, in keyset batches of settings.followup_batch_size.
+   Tickets idle for longer than the whole reminder schedule
+   (reminder_horizon) are out of range and treated as abandoned. So a
+   run reads only the tickets that went stale recently, however large
+   the tickets table grows. Each reminder is generated and queued in
+   followup_outbox. The reminder count and updated_at of its ticket are
+   updated in the same transaction, and only if the ticket has not
+   changed since the sweep read it.
+2. Deliver: due outbox rows are sent through email_service and stored
+   in the thread (ticket_service.record_followup). Failed sends are
+   retried with exponential backoff and marked failed after
+   settings.followup_send_attempts. A customer reply or a status change
+   deletes the ticket's pending rows (ticket_service), and rows whose
+   ticket is no longer waiting are dropped here too.
+
+Every replica runs the scheduler, but a run only proceeds while it holds
+the "followup-reminders" row of scheduler_leases. The lease is renewed
+between batches and expires on its own if its holder dies.
+
+Usage (from backend/):
+    python -m app.services.followup_scheduler run      # one run now (e.g. from a cron job)
+    python -m app.services.followup_scheduler report
+"""
+
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, Optional
+
+from app.config import settings
+from app.database import get_db_client
+from app.models.ticket import TicketStatus
+from app.services.claude_extractor import generate_followup_email
+from app.services.email_service import email_service
+from app.services.llm_ledger import llm_ledger
+from app.services.ticket_service import get_ticket_by_id, record_followup
+from app.utils.metrics import CallbackMetric, Counter
+
+LEASE_NAME = "followup-reminders"
+
+_WAITING = TicketStatus.WAITING_ON_CUSTOMER.value
+
+
+def _reminder_delay(reminders_sent: int) -> float:
+    """Seconds of inactivity before reminder number reminders_sent + 1."""
+    return settings.followup_reminder_after_hours * 3600 * (2 ** reminders_sent)
+
+
+def reminder_horizon() -> float:
+    """
+    Idle seconds after which a ticket is no longer swept: the last
+    reminder's delay, plus as long again for a scheduler that was down.
+    """
+    return 2 * _reminder_delay(max(settings.followup_max_reminders - 1, 0))
+
+
+def acquire_lease(holder: str, ttl: Optional[float] = None, name: str = LEASE_NAME) -> bool:
+    """
+    Take or renew a lease. Succeeds if nobody holds it, it expired or
+    holder already holds it.
+
+    Args:
+        holder: Unique ID of the caller (process)
+        ttl: Seconds until the lease expires unless renewed
+        name: Lease name
+
+    Returns:
+        True if holder holds the lease now
+    """
+    now = time.time()
+    results = get_db_client().batch([
+        (
+            """
+            INSERT INTO scheduler_leases (name, holder, expires_at) VALUES (?, ?, ?)
+            ON CONFLICT(name) DO UPDATE SET holder = excluded.holder, expires_at = excluded.expires_at
+            WHERE scheduler_leases.holder = excluded.holder OR scheduler_leases.expires_at < ?
+            """,
+            [name, holder, now + (ttl or settings.followup_lease_seconds), now]
+        ),
+        ("SELECT holder FROM scheduler_leases WHERE name = ?", [name]),
+    ])
+    return bool(results[-1].rows) and results[-1].rows[0][0] == holder
+
+
+def release_lease(holder: str, name: str = LEASE_NAME) -> None:
+    """Give up a lease held by holder, so another replica can take it at once."""
+    get_db_client().execute(
+        "DELETE FROM scheduler_leases WHERE name = ? AND holder = ?",
+        [name, holder]
+    )
+
+
+def sweep_stale_tickets(holder: str, max_batches: Optional[int] = None) -> Dict[str, int]:
+    """
+    Queue a reminder for every WAITING_ON_CUSTOMER ticket that is due one.
+
+    Args:
+        holder: Lease holder; renewed before each batch, the sweep stops if it is lost
+        max_batches: Stop after this many batches (default settings.followup_max_batches)
+
+    Returns:
+        Counts of tickets checked, reminders queued and tickets skipped
+    """
+    max_batches = max_batches or settings.followup_max_batches
+    client = get_db_client()
+    base_seconds = settings.followup_reminder_after_hours * 3600
+
+    totals = {"checked": 0, "queued": 0, "skipped": 0}
+    last = ("", 0)
+    for _ in range(max_batches):
+        if not acquire_lease(holder):
+            break
+
+        # Range scan of (status, updated_at): only tickets idle between one
+        # reminder delay and the horizon; the per-ticket delay is a filter
+        result = client.execute(
+            """
+            SELECT id, updated_at, reminders_sent FROM tickets
+            WHERE status = ?
+              AND updated_at < datetime('now', ?)
+              AND updated_at >= max(datetime('now', ?), ?)
+              AND (updated_at, id) > (?, ?)
+              AND reminders_sent < ?
+              AND (julianday('now') - julianday(updated_at)) * 86400 >= ? * (1 << reminders_sent)
+            ORDER BY updated_at, id
+            LIMIT ?
+            """,
+            [
+                _WAITING, f"-{int(base_seconds)} seconds", f"-{int(reminder_horizon())} seconds",
+                last[0], *last, settings.followup_max_reminders, base_seconds,
+                settings.followup_batch_size
+            ]
+        )
+        if not result.rows:
+            break
+
+        for ticket_id, updated_at, reminders_sent in result.rows:
+            totals["checked"] += 1
+            try:
+                queued = _queue_reminder(ticket_id, updated_at, reminders_sent)
+            except Exception as e:
+                print(f"[REMINDERS] Could not queue a reminder for ticket {ticket_id}: {e}")
+                queued = False
+            totals["queued" if queued else "skipped"] += 1
+            followup_reminders.inc(("queued" if queued else "skipped",))
+
+        last = tuple(result.rows[-1][:2])
+        if len(result.rows) < settings.followup_batch_size:
+            break
+
+    return totals
+
+
+@llm_ledger.track_ticket
+def _queue_reminder(ticket_id: int, updated_at: str, reminders_sent: int) -> bool:
+    """Generate a reminder and queue it, unless the ticket changed since it was read."""
+    llm_ledger.bind_ticket(ticket_id)
+    ticket = get_ticket_by_id(ticket_id)
+    if ticket is None or ticket.extracted_data is None:
+        return False
+    missing_fields = ticket.extracted_data.get_missing_required_fields()
+    if not missing_fields:
+        return False
+
+    followup = generate_followup_email(
+        ticket.customer_name or "there",
+        missing_fields,
+        ticket.extracted_data
+    )
+
+    # Both conditional on the row the sweep read: a reply that arrived
+    # during generation wins, and the reminder is dropped
+    unchanged = "id = ? AND status = ? AND updated_at = ? AND reminders_sent = ?"
+    unchanged_args = [ticket_id, _WAITING, updated_at, reminders_sent]
+    results = get_db_client().batch([
+        (
+            f"""
+            INSERT INTO followup_outbox (ticket_id, reminder, subject, body, next_attempt_at)
+            SELECT ?, ?, ?, ?, ? WHERE EXISTS (SELECT 1 FROM tickets WHERE {unchanged})
+            """,
+            [ticket_id, reminders_sent + 1, followup["subject"], followup["body"], time.time(), *unchanged_args]
+        ),
+        (
+            f"""
+            UPDATE tickets SET reminders_sent = reminders_sent + 1, updated_at = CURRENT_TIMESTAMP
+            WHERE {unchanged}
+            """,
+            unchanged_args
+        ),
+    ])
+    return results[0].rows_affected > 0
+
+
+def deliver_due(holder: str, max_batches: Optional[int] = None) -> Dict[str, int]:
+    """
+    Send queued reminders that are due.
+
+    Args:
+        holder: Lease holder; renewed before each batch, delivery stops if it is lost
+        max_batches: Stop after this many batches (default settings.followup_max_batches)
+
+    Returns:
+        Counts of reminders sent, retried, failed and cancelled
+    """
+    max_batches = max_batches or settings.followup_max_batches
+    client = get_db_client()
+
+    totals = {"sent": 0, "retried": 0, "failed": 0, "cancelled": 0}
+    for _ in range(max_batches):
+        if not acquire_lease(holder):
+            break
+
+        # Each row leaves the range once handled (deleted, failed or
+        # pushed into the future), so no cursor is needed
+        result = client.execute(
+            """
+            SELECT id, ticket_id, subject, body, attempts FROM followup_outbox
+            WHERE status = 'pending' AND next_attempt_at <= ?
+            ORDER BY next_attempt_at
+            LIMIT ?
+            """,
+            [time.time(), settings.followup_batch_size]
+        )
+        if not result.rows:
+            break
+
+        for row in result.rows:
+            outcome = _deliver(*row)
+            totals[outcome] += 1
+            followup_reminders.inc((outcome,))
+
+        if len(result.rows) < settings.followup_batch_size:
+            break
+
+    return totals
+
+
+def _deliver(outbox_id: int, ticket_id: int, subject: str, body: str, attempts: int) -> str:
+    """Send one queued reminder; returns sent, retried, failed or cancelled."""
+    client = get_db_client()
+    ticket = get_ticket_by_id(ticket_id)
+    if ticket is None or ticket.status != TicketStatus.WAITING_ON_CUSTOMER:
+        client.execute("DELETE FROM followup_outbox WHERE id = ?", [outbox_id])
+        return "cancelled"
+
+    email_result = email_service.send_email(
+        to_email=ticket.customer_email,
+        subject=subject,
+        body=body
+    )
+
+    if email_result.get("success"):
+        # One transaction: the row leaves the outbox only with the thread
+        # entry and change event recording the send
+        record_followup(
+            ticket, subject, body, email_result.get("message_id"),
+            statements=[("DELETE FROM followup_outbox WHERE id = ?", [outbox_id])]
+        )
+        return "sent"
+
+    attempts += 1
+    error = email_result.get("error")
+    if attempts >= settings.followup_send_attempts:
+        client.execute(
+            "UPDATE followup_outbox SET status = 'failed', attempts = ?, last_error = ? WHERE id = ?",
+            [attempts, error, outbox_id]
+        )
+        print(f"[REMINDERS] Giving up on reminder {outbox_id} for ticket {ticket_id}: {error}")
+        return "failed"
+
+    retry_at = time.time() + settings.followup_retry_seconds * 2 ** (attempts - 1)
+    client.execute(
+        "UPDATE followup_outbox SET attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+        [attempts, retry_at, error, outbox_id]
+    )
+    return "retried"
+
+
+class FollowupScheduler:
+    """
+    Runs the sweep and delivery every settings.followup_sweep_interval
+    seconds on an APScheduler background thread, while this process
+    holds the lease.
+    """
+
+    def __init__(self):
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._scheduler = None
+        self._lock = threading.Lock()
+        self._lease_held = False
+        self._runs = 0
+        self._last_run: Optional[str] = None
+        self._last_result: Dict = {}
+
+    def start(self) -> None:
+        """Start the scheduler in the background (APScheduler is imported there, not at startup)."""
+        if not settings.followup_reminders_enabled:
+            print("[REMINDERS] Follow-up reminders disabled")
+            return
+        threading.Thread(target=self._start, name="followup-scheduler-start", daemon=True).start()
+
+    def _start(self) -> None:
+        from apscheduler.executors.pool import ThreadPoolExecutor
+        from apscheduler.schedulers.background import BackgroundScheduler
+
+        with self._lock:
+            if self._scheduler is not None:
+                return
+            scheduler = BackgroundScheduler(executors={"default": ThreadPoolExecutor(1)}, daemon=True)
+            scheduler.add_job(
+                self.run_once, "interval",
+                seconds=settings.followup_sweep_interval,
+                id=LEASE_NAME, max_instances=1, coalesce=True
+            )
+            scheduler.start()
+            self._scheduler = scheduler
+        print(f"[REMINDERS] Scheduler started (every {settings.followup_sweep_interval:.0f}s)")
+
+    def shutdown(self) -> None:
+        """Stop scheduling runs and hand the lease over."""
+        with self._lock:
+            scheduler, self._scheduler = self._scheduler, None
+        if scheduler is None:
+            return
+        scheduler.shutdown(wait=False)
+        if self._lease_held:
+            try:
+                release_lease(self.holder)
+            except Exception as e:
+                print(f"[REMINDERS] Could not release the lease: {e}")
+
+    def run_once(self) -> Dict:
+        """
+        One sweep and delivery, if this process gets the lease.
+
+        Returns:
+            Counts from both steps, or {"lease": False} if another replica holds it
+        """
+        start = time.perf_counter()
+        try:
+            self._lease_held = acquire_lease(self.holder)
+            result = {"lease": self._lease_held}
+            if self._lease_held:
+                result["sweep"] = sweep_stale_tickets(self.holder)
+                result["deliver"] = deliver_due(self.holder)
+                if result["sweep"]["queued"] or any(result["deliver"].values()):
+                    print(f"[REMINDERS] {result['sweep']} {result['deliver']} "
+                          f"in {(time.perf_counter() - start) * 1000:.0f}ms")
+        except Exception as e:
+            print(f"[REMINDERS] Run failed: {e}")
+            result = {"error": str(e)}
+
+        self._runs += 1
+        self._last_run = datetime.now().isoformat(timespec="seconds")
+        self._last_result = result
+        return result
+
+    def snapshot(self) -> Dict:
+        """Scheduler state for /health."""
+        return {
+            "enabled": settings.followup_reminders_enabled,
+            "running": self._scheduler is not None,
+            "lease_held": self._lease_held,
+            "runs": self._runs,
+            "last_run": self._last_run,
+            "last_result": self._last_result,
+        }
+
+
+def reminder_report() -> Dict[str, int]:
+    """Queued, failed and total reminders, and tickets currently waiting."""
+    client = get_db_client()
+    results = client.batch([
+        "SELECT status, COUNT(*) FROM followup_outbox GROUP BY status",
+        ("SELECT COUNT(*), COALESCE(SUM(reminders_sent), 0) FROM tickets WHERE status = ?", [_WAITING]),
+    ])
+    report = {"pending": 0, "failed": 0}
+    report.update({status: count for status, count in results[0].rows})
+    report["waiting_tickets"], report["reminders_sent"] = results[1].rows[0]
+    return report
+
+
+# Create singleton instance
+followup_scheduler = FollowupScheduler()
+
+followup_reminders = Counter(
+    "followup_reminders_total",
+    "Follow-up reminders by outcome (queued, skipped, sent, retried, failed, cancelled).",
+    labelnames=("outcome",),
+)
+
+CallbackMetric(
+    "followup_scheduler_lease_held", "1 if this process holds the follow-up reminder lease.",
+    lambda: int(followup_scheduler.snapshot()["lease_held"]),
+)
+
+
+if __name__ == "__main__":
+    import argparse
+    from app.database import close_db_clients, initialize_database
+
+    parser = argparse.ArgumentParser(description="Send follow-up reminders for tickets waiting on the customer")
+    parser.add_argument("command", choices=["run", "report"])
+    args = parser.parse_args()
+
+    initialize_database()
+    try:
+        if args.command == "run":
+            result = followup_scheduler.run_once()
+            release_lease(followup_scheduler.holder)
+            print(f"[REMINDERS] {result}")
+        print(f"[REMINDERS] {reminder_report()}")
+    finally:
+        close_db_clients()
@@ -0,0 +1,378 @@
+"""
+Ledger of every Claude call: model, purpose, token usage, latency,
+retries, parse success and the ticket it was made for.
+
+Recording is buffered in memory and written in batches by a background
+thread, so the request path only appends to a deque. Calls made inside
+a ticket-tracked function are held until the function returns, which
+lets create_ticket_from_email attribute its extraction call to the
+ticket it creates afterwards.
+"""
+
+import functools
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Deque, Dict, List, Optional
+
+from app.config import settings
+from app.database import get_db_client
+from app.utils.metrics import CallbackMetric, Counter
+
+# USD per million tokens: (input, output, cache write, cache read)
+MODEL_PRICING = {
+    "claude-sonnet-4-5": (3.00, 15.00, 3.75, 0.30),
+    "claude-haiku-4-5": (1.00, 5.00, 1.25, 0.10),
+    "claude-opus-4-1": (15.00, 75.00, 18.75, 1.50),
+}
+
+
+@dataclass
+class LLMCall:
+    """One Claude API call."""
+    model: str
+    purpose: str  # "extract" or "followup"
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_creation_input_tokens: int = 0
+    cache_read_input_tokens: int = 0
+    latency_ms: float = 0.0
+    retries: int = 0
+    parse_success: bool = False
+    error: Optional[str] = None
+    ticket_id: Optional[int] = None
+    created_at: str = field(
+        default_factory=lambda: datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    )
+
+    @property
+    def cost_usd(self) -> float:
+        prices = next(
+            (p for prefix, p in MODEL_PRICING.items() if self.model.startswith(prefix)),
+            None
+        )
+        if prices is None:
+            return 0.0
+        input_price, output_price, cache_write_price, cache_read_price = prices
+        return (
+            self.input_tokens * input_price
+            + self.output_tokens * output_price
+            + self.cache_creation_input_tokens * cache_write_price
+            + self.cache_read_input_tokens * cache_read_price
+        ) / 1_000_000
+
+
+@dataclass
+class _TicketScope:
+    ticket_id: Optional[int] = None
+    calls: List[LLMCall] = field(default_factory=list)
+
+
+_current_scope: ContextVar[Optional[_TicketScope]] = ContextVar("llm_ticket_scope", default=None)
+
+
+class LLMLedger:
+    """Buffered, asynchronous writer for the llm_calls table."""
+
+    def __init__(self):
+        self._buffer: Deque[LLMCall] = deque(maxlen=settings.llm_ledger_max_buffer)
+        self._wakeup = threading.Event()
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self.dropped = 0
+
+    @property
+    def buffered(self) -> int:
+        return len(self._buffer)
+
+    def track_ticket(self, func):
+        """
+        Decorator collecting the Claude calls made by func and writing
+        them with the ticket id bound via bind_ticket().
+        """
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            scope = _TicketScope()
+            token = _current_scope.set(scope)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _current_scope.reset(token)
+                for call in scope.calls:
+                    if call.ticket_id is None:
+                        call.ticket_id = scope.ticket_id
+                    self._enqueue(call)
+
+        return wrapper
+
+    def bind_ticket(self, ticket_id: int) -> None:
+        """Attribute calls of the current tracked function to a ticket."""
+        scope = _current_scope.get()
+        if scope is not None:
+            scope.ticket_id = ticket_id
+
+    def record(self, call: LLMCall) -> None:
+        """Record a finished call (cheap; never touches the database)."""
+        llm_tokens.inc((call.purpose, "input"), call.input_tokens)
+        llm_tokens.inc((call.purpose, "output"), call.output_tokens)
+        llm_tokens.inc((call.purpose, "cache_creation"), call.cache_creation_input_tokens)
+        llm_tokens.inc((call.purpose, "cache_read"), call.cache_read_input_tokens)
+
+        scope = _current_scope.get()
+        if scope is not None:
+            scope.calls.append(call)
+        else:
+            self._enqueue(call)
+
+    def _enqueue(self, call: LLMCall) -> None:
+        if len(self._buffer) == self._buffer.maxlen:
+            self.dropped += 1
+        self._buffer.append(call)
+        self._ensure_writer()
+        if len(self._buffer) >= settings.llm_ledger_batch_size:
+            self._wakeup.set()
+
+    def _ensure_writer(self) -> None:
+        if self._writer is not None and self._writer.is_alive():
+            return
+        with self._writer_lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(
+                    target=self._run, name="llm-ledger-writer", daemon=True
+                )
+                self._writer.start()
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait(timeout=settings.llm_ledger_flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        Write all buffered calls in one batch. If the write fails they
+        stay buffered and the next flush retries them.
+
+        Returns:
+            Number of calls written
+        """
+        with self._flush_lock:
+            calls = []
+            while self._buffer:
+                calls.append(self._buffer.popleft())
+
+            if not calls:
+                return 0
+
+            statements = [
+                (
+                    """
+                    INSERT INTO llm_calls (
+                        ticket_id, model, purpose, input_tokens, output_tokens,
+                        cache_creation_input_tokens, cache_read_input_tokens,
+                        latency_ms, retries, parse_success, error, cost_usd, created_at
+                    )
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    [
+                        call.ticket_id, call.model, call.purpose,
+                        call.input_tokens, call.output_tokens,
+                        call.cache_creation_input_tokens, call.cache_read_input_tokens,
+                        call.latency_ms, call.retries, int(call.parse_success),
+                        call.error, call.cost_usd, call.created_at
+                    ]
+                )
+                for call in calls
+            ]
+
+            try:
+                get_db_client().batch(statements)
+            except Exception as e:
+                # Back in front, in order, for the next tick; if the buffer
+                # fills up meanwhile the newest calls are the ones dropped
+                overflow = max(0, len(self._buffer) + len(calls) - self._buffer.maxlen)
+                self.dropped += overflow
+                self._buffer.extendleft(reversed(calls))
+                print(f"[LLM LEDGER] Error writing {len(calls)} calls, will retry: {e}")
+                return 0
+
+            return len(calls)
+
+
+def _percentile_offset(count: int, pct: float) -> int:
+    """Row offset of the pct-th percentile among count sorted values."""
+    return min(count - 1, int(round(pct / 100 * (count - 1))))
+
+
+def get_latency_stats(days: int = 7) -> List[Dict]:
+    """
+    Latency percentiles and token averages per purpose. Sums and counts
+    are aggregated in SQL; each percentile reads one latency_ms value.
+
+    Args:
+        days: Look-back window in days
+
+    Returns:
+        One dict per purpose
+    """
+    client = get_db_client()
+    window = f"-{int(days)} days"
+
+    result = client.execute(
+        """
+        SELECT purpose, COUNT(*), MAX(latency_ms), AVG(input_tokens), AVG(output_tokens),
+               SUM(retries), AVG(parse_success), COUNT(NULLIF(error, ''))
+        FROM llm_calls
+        WHERE created_at >= datetime('now', ?)
+        GROUP BY purpose
+        ORDER BY purpose
+        """,
+        [window]
+    )
+    if not result.rows:
+        return []
+
+    percentile_sql = """
+        SELECT latency_ms FROM llm_calls
+        WHERE created_at >= datetime('now', ?) AND purpose = ?
+        ORDER BY latency_ms
+        LIMIT 1 OFFSET ?
+    """
+    percentiles = client.batch([
+        (percentile_sql, [window, row[0], _percentile_offset(row[1], pct)])
+        for row in result.rows
+        for pct in (50, 95)
+    ])
+
+    stats = []
+    for i, row in enumerate(result.rows):
+        p50, p95 = percentiles[2 * i], percentiles[2 * i + 1]
+        stats.append({
+            "purpose": row[0],
+            "calls": row[1],
+            "p50_latency_ms": round(p50.rows[0][0], 1) if p50.rows else None,
+            "p95_latency_ms": round(p95.rows[0][0], 1) if p95.rows else None,
+            "max_latency_ms": round(row[2], 1),
+            "avg_input_tokens": round(row[3], 1),
+            "avg_output_tokens": round(row[4], 1),
+            "retries": row[5],
+            "parse_success_rate": round(row[6], 4),
+            "errors": row[7],
+        })
+
+    return stats
+
+
+def get_ticket_usage(limit: int = 50) -> Dict:
+    """
+    Token usage and cost per ticket, most expensive first.
+
+    Args:
+        limit: Maximum number of tickets to list
+
+    Returns:
+        Dict with overall per-ticket averages and the ticket list
+    """
+    client = get_db_client()
+
+    totals = client.execute(
+        """
+        SELECT COUNT(DISTINCT ticket_id), COUNT(*),
+               COALESCE(SUM(input_tokens), 0), COALESCE(SUM(output_tokens), 0),
+               COALESCE(SUM(cost_usd), 0)
+        FROM llm_calls
+        WHERE ticket_id IS NOT NULL
+        """
+    ).rows[0]
+
+    result = client.execute(
+        """
+        SELECT ticket_id, COUNT(*), SUM(input_tokens), SUM(output_tokens),
+               SUM(cost_usd), SUM(latency_ms)
+        FROM llm_calls
+        WHERE ticket_id IS NOT NULL
+        GROUP BY ticket_id
+        ORDER BY SUM(cost_usd) DESC
+        LIMIT ?
+        """,
+        [limit]
+    )
+
+    ticket_count = totals[0] or 0
+    return {
+        "tickets": ticket_count,
+        "avg_calls_per_ticket": round(totals[1] / ticket_count, 2) if ticket_count else 0,
+        "avg_input_tokens_per_ticket": round(totals[2] / ticket_count, 1) if ticket_count else 0,
+        "avg_output_tokens_per_ticket": round(totals[3] / ticket_count, 1) if ticket_count else 0,
+        "avg_cost_usd_per_ticket": round(totals[4] / ticket_count, 6) if ticket_count else 0,
+        "top_tickets": [
+            {
+                "ticket_id": row[0],
+                "calls": row[1],
+                "input_tokens": row[2],
+                "output_tokens": row[3],
+                "cost_usd": round(row[4], 6),
+                "total_latency_ms": round(row[5], 1),
+            }
+            for row in result.rows
+        ],
+    }
+
+
+def get_daily_cost(days: int = 30) -> List[Dict]:
+    """
+    Calls, tokens and cost per day.
+
+    Args:
+        days: Look-back window in days
+
+    Returns:
+        One dict per day, most recent first
+    """
+    client = get_db_client()
+
+    result = client.execute(
+        """
+        SELECT date(created_at) AS day, COUNT(*),
+               SUM(input_tokens), SUM(output_tokens),
+               SUM(cache_creation_input_tokens), SUM(cache_read_input_tokens),
+               SUM(cost_usd)
+        FROM llm_calls
+        WHERE created_at >= datetime('now', ?)
+        GROUP BY day
+        ORDER BY day DESC
+        """,
+        [f"-{int(days)} days"]
+    )
+
+    return [
+        {
+            "day": row[0],
+            "calls": row[1],
+            "input_tokens": row[2],
+            "output_tokens": row[3],
+            "cache_creation_input_tokens": row[4],
+            "cache_read_input_tokens": row[5],
+            "cost_usd": round(row[6], 6),
+        }
+        for row in result.rows
+    ]
+
+
+llm_tokens = Counter(
+    "llm_tokens_total",
+    "Claude tokens consumed by purpose and token kind.",
+    labelnames=("purpose", "kind"),
+)
+
+# Create singleton instance
+llm_ledger = LLMLedger()
+
+CallbackMetric(
+    "llm_ledger_buffered_calls", "Claude calls waiting to be written to llm_calls.",
+    lambda: llm_ledger.buffered,
+)
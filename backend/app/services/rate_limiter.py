@@ -0,0 +1,391 @@
+"""
+Per-sender and global rate limiting for inbound email.
+
+Every inbound email costs a Claude extraction and usually a generated
+follow-up, so a looping auto-responder can drain the Anthropic quota on
+its own. Token buckets per sender address, per sender domain and global
+are checked before any Claude call; mail that trips a limit or looks
+automated is parked in the quarantine table instead of being processed.
+"""
+
+import json
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parseaddr
+from typing import Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.database import get_db_client
+from app.utils.metrics import CallbackMetric, Counter
+
+
+# Shared mailbox providers: unrelated customers, so no per-domain bucket
+FREE_MAIL_DOMAINS = {
+    "gmail.com", "googlemail.com", "outlook.com", "hotmail.com", "live.com",
+    "msn.com", "yahoo.com", "icloud.com", "me.com", "aol.com",
+    "proton.me", "protonmail.com", "gmx.com", "zoho.com",
+}
+
+AUTOMATED_SENDER_PREFIXES = (
+    "mailer-daemon", "postmaster", "noreply", "no-reply", "do-not-reply",
+    "donotreply", "auto-reply", "autoreply",
+)
+
+AUTO_REPLY_SUBJECT_PREFIXES = (
+    "auto:", "automatic reply", "autoreply", "auto-reply", "out of office",
+    "out of the office", "undeliverable", "delivery status notification",
+    "mail delivery failed", "returned mail",
+)
+
+
+@dataclass
+class TokenBucket:
+    """Classic token bucket; refills continuously up to capacity."""
+    capacity: float
+    refill_per_second: float
+    tokens: float
+    updated_at: float
+
+    def refill(self, now: float) -> None:
+        elapsed = max(0.0, now - self.updated_at)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_per_second)
+        self.updated_at = now
+
+    @property
+    def is_full(self) -> bool:
+        return self.tokens >= self.capacity
+
+
+@dataclass
+class GuardDecision:
+    """Outcome of an inbound email check."""
+    allowed: bool
+    reason: Optional[str] = None
+
+
+def parse_sender(from_header: str) -> Tuple[str, str]:
+    """
+    Split a From header into (address, domain), both lowercased.
+
+    Accepts bare addresses and "Name <addr>" forms.
+    """
+    address = parseaddr(from_header or "")[1].strip().lower()
+    domain = address.rsplit("@", 1)[1] if "@" in address else ""
+    return address, domain
+
+
+def detect_automated_email(
+    sender: str,
+    subject: Optional[str],
+    headers: Optional[Dict[str, str]] = None
+) -> Optional[str]:
+    """
+    Detect auto-replies, bounces and mail loops (RFC 3834 heuristics).
+
+    Args:
+        sender: Sender address (already parsed)
+        subject: Email subject
+        headers: Raw email headers (any case)
+
+    Returns:
+        Reason string if the email looks automated, otherwise None
+    """
+    headers = {str(k).lower(): str(v).strip().lower() for k, v in (headers or {}).items()}
+
+    auto_submitted = headers.get("auto-submitted")
+    if auto_submitted and auto_submitted != "no":
+        return "auto_reply"
+
+    # (X-Auto-Response-Suppress is not one of these: it asks recipients
+    # not to auto-reply, and Outlook and CRMs set it on human-sent mail)
+    if "x-autoreply" in headers or "x-autorespond" in headers:
+        return "auto_reply"
+
+    if headers.get("precedence") in ("bulk", "junk", "list", "auto_reply"):
+        return "auto_reply"
+
+    if "x-failed-recipients" in headers:
+        return "bounce"
+
+    our_address = (settings.resend_from_email or "").lower()
+    if our_address:
+        if sender == parse_sender(our_address)[0]:
+            return "mail_loop"
+        if our_address in headers.get("x-loop", ""):
+            return "mail_loop"
+
+    local_part = sender.split("@", 1)[0]
+    if local_part.startswith(AUTOMATED_SENDER_PREFIXES):
+        return "automated_sender"
+
+    normalized_subject = (subject or "").strip().lower()
+    if normalized_subject.startswith(AUTO_REPLY_SUBJECT_PREFIXES):
+        return "auto_reply"
+
+    return None
+
+
+class InboundEmailGuard:
+    """
+    Token-bucket limiter applied to inbound email before extraction.
+
+    Buckets live in memory and are periodically flushed to the
+    rate_limit_buckets table so limits survive restarts and scale-to-zero.
+    Buckets that have refilled completely are dropped from both, which
+    keeps the working set proportional to currently active senders.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._dirty: set = set()
+        self._loaded = False
+        self._last_flush = time.time()
+
+    @property
+    def bucket_count(self) -> int:
+        return len(self._buckets)
+
+    def check(
+        self,
+        from_header: str,
+        subject: Optional[str] = None,
+        headers: Optional[Dict[str, str]] = None
+    ) -> GuardDecision:
+        """
+        Decide whether an inbound email may be processed.
+
+        Consumes one token from each applicable bucket only when all of
+        them have capacity, so a globally rejected email does not also
+        eat into the sender's allowance.
+        """
+        sender, domain = parse_sender(from_header)
+
+        automated = detect_automated_email(sender, subject, headers)
+        if automated:
+            inbound_decisions.inc((automated,))
+            return GuardDecision(allowed=False, reason=automated)
+
+        self._ensure_loaded()
+        now = time.time()
+
+        keys = ["global"]
+        if sender:
+            keys.append(f"sender:{sender}")
+        if domain and domain not in FREE_MAIL_DOMAINS:
+            keys.append(f"domain:{domain}")
+
+        with self._lock:
+            buckets = [self._bucket(key, now) for key in keys]
+
+            for key, bucket in zip(keys, buckets):
+                if bucket.tokens < 1:
+                    scope = key.split(":", 1)[0]
+                    inbound_decisions.inc((f"{scope}_rate_limit",))
+                    return GuardDecision(allowed=False, reason=f"{scope}_rate_limit")
+
+            for bucket in buckets:
+                bucket.tokens -= 1
+            self._dirty.update(keys)
+
+        inbound_decisions.inc(("allowed",))
+        self._maybe_flush(now)
+        return GuardDecision(allowed=True)
+
+    def _bucket(self, key: str, now: float) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            capacity, per_hour = self._limits_for(key)
+            bucket = TokenBucket(capacity, per_hour / 3600.0, capacity, now)
+            self._buckets[key] = bucket
+        else:
+            bucket.refill(now)
+        return bucket
+
+    @staticmethod
+    def _limits_for(key: str) -> Tuple[float, float]:
+        if key == "global":
+            return settings.global_email_burst, settings.global_emails_per_hour
+        if key.startswith("domain:"):
+            return settings.domain_email_burst, settings.domain_emails_per_hour
+        return settings.sender_email_burst, settings.sender_emails_per_hour
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+
+        try:
+            client = get_db_client()
+            result = client.execute(
+                "SELECT bucket_key, tokens, updated_at FROM rate_limit_buckets"
+            )
+        except Exception as e:
+            print(f"[RATE LIMIT] Could not load persisted buckets: {e}")
+            result = None
+
+        with self._lock:
+            if self._loaded:
+                return
+            now = time.time()
+            for key, tokens, updated_at in (result.rows if result else []):
+                capacity, per_hour = self._limits_for(key)
+                bucket = TokenBucket(capacity, per_hour / 3600.0, min(tokens, capacity), updated_at)
+                bucket.refill(now)
+                if not bucket.is_full:
+                    self._buckets[key] = bucket
+            self._loaded = True
+
+    def _maybe_flush(self, now: float) -> None:
+        if now - self._last_flush < settings.rate_limit_persist_interval:
+            return
+        self.flush()
+
+    def flush(self) -> None:
+        """Persist dirty buckets and forget the ones that have refilled."""
+        now = time.time()
+        with self._lock:
+            self._last_flush = now
+            upserts = []
+            deletes = []
+            for key in list(self._buckets):
+                bucket = self._buckets[key]
+                bucket.refill(now)
+                if bucket.is_full:
+                    del self._buckets[key]
+                    deletes.append(key)
+                elif key in self._dirty:
+                    upserts.append((key, bucket.tokens, bucket.updated_at))
+            self._dirty.clear()
+
+        if not upserts and not deletes:
+            return
+
+        statements = [
+            (
+                """
+                INSERT INTO rate_limit_buckets (bucket_key, tokens, updated_at)
+                VALUES (?, ?, ?)
+                ON CONFLICT(bucket_key) DO UPDATE SET
+                    tokens = excluded.tokens, updated_at = excluded.updated_at
+                """,
+                list(row)
+            )
+            for row in upserts
+        ]
+        statements += [
+            ("DELETE FROM rate_limit_buckets WHERE bucket_key = ?", [key])
+            for key in deletes
+        ]
+
+        try:
+            get_db_client().batch(statements)
+        except Exception as e:
+            print(f"[RATE LIMIT] Error persisting buckets: {e}")
+
+
+def quarantine_email(
+    from_header: str,
+    subject: Optional[str],
+    body: str,
+    reason: str,
+    headers: Optional[Dict[str, str]] = None,
+    message_id: Optional[str] = None
+) -> int:
+    """
+    Park an email that was not processed.
+
+    Returns:
+        ID of the quarantine row
+    """
+    client = get_db_client()
+
+    result = client.execute(
+        """
+        INSERT INTO quarantined_emails (
+            from_email, subject, body, reason, headers, email_message_id
+        )
+        VALUES (?, ?, ?, ?, ?, ?)
+        """,
+        [from_header, subject, body or "", reason, json.dumps(headers or {}), message_id]
+    )
+
+    print(f"[RATE LIMIT] Quarantined email from {from_header}: {reason}")
+
+    return result.last_insert_rowid
+
+
+def get_quarantined_emails(limit: int = 50) -> List[Dict]:
+    """Most recently quarantined emails."""
+    client = get_db_client()
+
+    result = client.execute(
+        """
+        SELECT id, from_email, subject, reason, email_message_id, received_at
+        FROM quarantined_emails
+        ORDER BY id DESC
+        LIMIT ?
+        """,
+        [limit]
+    )
+
+    return [
+        {
+            "id": row[0],
+            "from": row[1],
+            "subject": row[2],
+            "reason": row[3],
+            "message_id": row[4],
+            "received_at": row[5]
+        }
+        for row in result.rows
+    ]
+
+
+def get_quarantined_email(quarantine_id: int) -> Optional[Dict]:
+    """One quarantined email with its body and headers, or None."""
+    client = get_db_client()
+
+    result = client.execute(
+        """
+        SELECT id, from_email, subject, body, reason, headers, email_message_id, received_at
+        FROM quarantined_emails
+        WHERE id = ?
+        """,
+        [quarantine_id]
+    )
+
+    if not result.rows:
+        return None
+
+    row = result.rows[0]
+    return {
+        "id": row[0],
+        "from": row[1],
+        "subject": row[2],
+        "body": row[3],
+        "reason": row[4],
+        "headers": json.loads(row[5]) if row[5] else {},
+        "message_id": row[6],
+        "received_at": row[7]
+    }
+
+
+def delete_quarantined_email(quarantine_id: int) -> None:
+    """Remove an email from quarantine (after it was released)."""
+    get_db_client().execute("DELETE FROM quarantined_emails WHERE id = ?", [quarantine_id])
+
+
+# Create singleton instance
+inbound_guard = InboundEmailGuard()
+
+inbound_decisions = Counter(
+    "inbound_email_decisions_total",
+    "Inbound emails by rate limiter decision (allowed or quarantine reason).",
+    labelnames=("decision",),
+)
+
+CallbackMetric(
+    "rate_limit_buckets", "Token buckets currently held in memory.",
+    lambda: inbound_guard.bucket_count,
+)
@@ -0,0 +1,390 @@
+"""
+Normalization of extracted quote fields into typed columns.
+
+Claude returns every field as free text ("16GB DDR5", "25 units",
+"around 50k"). After each extraction the text is parsed into typed
+extracted_data columns (SPEC_COLUMNS), which are indexed and back the
+range filters on GET /tickets/. The raw text is kept as-is; a value
+that cannot be parsed is stored as NULL.
+
+Rules worth knowing:
+- Ranges ("10-15", "$800-1000") use the lower bound.
+- Sizes are in GB (1TB = 1024GB); "512GB SSD + 1TB HDD" adds up and
+  has storage_type HYBRID.
+- budget_usd is the total budget: per-unit amounts ("$900 each") are
+  multiplied by the quantity. Amounts in another currency (₹, lakh, €,
+  £) are left NULL rather than converted at a guessed rate.
+- deadline_date resolves relative timelines ("within 2 weeks", "end of
+  month", "by Friday") against a reference date, the ticket's creation
+  date, so re-running the normalizer gives the same result.
+
+Bump NORMALIZER_VERSION when the rules change; the backfill re-parses
+rows normalized by an older version.
+
+Usage (from backend/):
+    python -m app.services.spec_normalizer   # backfill existing rows
+"""
+
+import calendar
+import re
+import threading
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.database import get_db_client
+from app.models.ticket import ExtractedData
+
+NORMALIZER_VERSION = 1
+
+# Typed columns written next to the raw extracted_data text
+SPEC_COLUMNS = (
+    "ram_gb", "storage_gb", "storage_type", "screen_inches",
+    "quantity_int", "budget_usd", "deadline_date", "specs_version",
+)
+
+STORAGE_TYPES = ("SSD", "HDD", "HYBRID", "EMMC")
+
+_NUMBER = r"(\d+(?:,\d{3})*(?:\.\d+)?)"
+_SIZE = re.compile(_NUMBER + r"\s*(tb|gb|gig|g|mb)\b", re.IGNORECASE)
+_SIZE_RANGE = re.compile(_NUMBER + r"\s*(?:-|–|to)\s*\d+(?:\.\d+)?\s*(tb|gb|gig|g|mb)\b", re.IGNORECASE)
+_BARE_NUMBER = re.compile(_NUMBER)
+_SCREEN = re.compile(r"(\d{1,2}(?:\.\d)?)\s*(?:\"|”|''|-?\s*inch(?:es)?\b|in\b)", re.IGNORECASE)
+_DOLLAR_AMOUNT = re.compile(r"(?:\$|usd\s*)" + _NUMBER + r"\s*(k|thousand|m|mn|million)?\b", re.IGNORECASE)
+_SCALED_AMOUNT = re.compile(_NUMBER + r"\s*(k|thousand|m|mn|million)\b", re.IGNORECASE)
+_AMOUNT = re.compile(_NUMBER + r"()")
+_PER_UNIT = re.compile(r"\b(each|per\s+(unit|laptop|device|piece|machine|pc)|a\s+piece|/\s*unit)\b", re.IGNORECASE)
+_FOREIGN_CURRENCY = re.compile(r"₹|€|£|\b(rs\.?|inr|eur|euros?|gbp|pounds?|lakhs?|lac|crores?)\b", re.IGNORECASE)
+
+_AMOUNT_MULTIPLIERS = {
+    "k": 1_000, "thousand": 1_000,
+    "m": 1_000_000, "mn": 1_000_000, "million": 1_000_000,
+}
+
+_NUMBER_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12,
+    "fifteen": 15, "twenty": 20, "thirty": 30, "forty": 40, "fifty": 50,
+    "hundred": 100, "dozen": 12, "a dozen": 12, "couple": 2, "a couple": 2,
+}
+
+_MONTHS = {
+    name.lower(): index
+    for index in range(1, 13)
+    for name in (calendar.month_name[index], calendar.month_abbr[index])
+}
+_MONTHS["sept"] = 9
+_MONTH_NAMES = "|".join(sorted(_MONTHS, key=len, reverse=True))
+_WEEKDAYS = {name.lower(): index for index, name in enumerate(calendar.day_name)}
+
+_ISO_DATE = re.compile(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b")
+_DAY_MONTH = re.compile(rf"\b(\d{{1,2}})(?:st|nd|rd|th)?\s+(?:of\s+)?({_MONTH_NAMES})\.?(?:,?\s+(\d{{4}}))?\b", re.IGNORECASE)
+_MONTH_DAY = re.compile(rf"\b({_MONTH_NAMES})\.?\s+(\d{{1,2}})(?:st|nd|rd|th)?(?:,?\s+(\d{{4}}))?\b", re.IGNORECASE)
+_COUNT_WORDS = "a|an|one|two|three|four|five|six|seven|eight|nine|ten|couple of|few"
+_RELATIVE = re.compile(
+    rf"\b(\d+|{_COUNT_WORDS})(?:\s*(?:-|–|to)\s*\d+)?\s+(business\s+|working\s+)?(day|week|month)s?\b",
+    re.IGNORECASE
+)
+_RELATIVE_COUNTS = {"a": 1, "an": 1, "couple of": 2, "few": 3, **{
+    word: value for word, value in _NUMBER_WORDS.items() if " " not in word
+}}
+_WEEKDAY = re.compile(r"\b(?:by|on|before|this|next)\s+(" + "|".join(_WEEKDAYS) + r")\b", re.IGNORECASE)
+
+
+def _to_float(text: str) -> float:
+    return float(text.replace(",", ""))
+
+
+def _size_gb(value: float, unit: str) -> float:
+    unit = unit.lower()
+    if unit == "tb":
+        return value * 1024
+    if unit == "mb":
+        return value / 1024
+    return value
+
+
+def _clean_number(value: Optional[float]) -> Optional[float]:
+    if value is None:
+        return None
+    return int(value) if float(value).is_integer() else round(value, 2)
+
+
+def parse_ram_gb(text: Optional[str]) -> Optional[float]:
+    """RAM in GB: "16GB DDR5" -> 16, "8 - 16 GB" -> 8."""
+    if not text:
+        return None
+    match = _SIZE_RANGE.search(text) or _SIZE.search(text)
+    if match:
+        return _clean_number(_size_gb(_to_float(match.group(1)), match.group(2)))
+    match = _BARE_NUMBER.search(text)
+    if match and 1 <= _to_float(match.group(1)) <= 512:
+        return _clean_number(_to_float(match.group(1)))
+    return None
+
+
+def parse_storage(text: Optional[str]) -> Tuple[Optional[float], Optional[str]]:
+    """Storage size in GB and type: "512GB SSD + 1TB HDD" -> (1536, "HYBRID")."""
+    if not text:
+        return None, None
+
+    lowered = text.lower()
+    has_ssd = bool(re.search(r"ssd|nvme|m\.2|solid[\s-]state|pcie", lowered))
+    has_hdd = bool(re.search(r"hdd|hard\s*(disk|drive)|\brpm\b", lowered))
+    if has_ssd and has_hdd:
+        storage_type = "HYBRID"
+    elif has_ssd:
+        storage_type = "SSD"
+    elif has_hdd:
+        storage_type = "HDD"
+    elif "emmc" in lowered:
+        storage_type = "EMMC"
+    else:
+        storage_type = None
+
+    sizes = [_size_gb(_to_float(number), unit) for number, unit in _SIZE.findall(text)]
+    if not sizes:
+        return None, storage_type
+    # "512GB + 1TB" is two drives; "512GB or 1TB" / "512GB-1TB" is a choice
+    combined = storage_type == "HYBRID" or re.search(r"\+|\band\b", lowered)
+    total = sum(sizes) if combined else sizes[0]
+    return _clean_number(total), storage_type
+
+
+def parse_screen_inches(text: Optional[str]) -> Optional[float]:
+    """Screen diagonal: '15.6" FHD' -> 15.6, "14 inch" -> 14."""
+    if not text:
+        return None
+    match = _SCREEN.search(text)
+    if match is None:
+        match = _BARE_NUMBER.search(text)
+    if match:
+        value = _to_float(match.group(1))
+        if 7 <= value <= 21:
+            return _clean_number(value)
+    return None
+
+
+def parse_quantity(text: Optional[str]) -> Optional[int]:
+    """Number of units: "25 units" -> 25, "100+" -> 100, "a dozen" -> 12."""
+    if not text:
+        return None
+    match = _BARE_NUMBER.search(text)
+    if match:
+        return int(_to_float(match.group(1)))
+    lowered = text.lower()
+    for word in sorted(_NUMBER_WORDS, key=len, reverse=True):
+        if re.search(rf"\b{word}\b", lowered):
+            return _NUMBER_WORDS[word]
+    return None
+
+
+def parse_budget_usd(text: Optional[str], quantity: Optional[int] = None) -> Optional[float]:
+    """Total budget in USD: "around 50k" -> 50000, "$900 each" x 10 -> 9000."""
+    if not text or _FOREIGN_CURRENCY.search(text):
+        return None
+
+    # Prefer "$50,000" / "USD 900", then "50k", then any number
+    match = _DOLLAR_AMOUNT.search(text) or _SCALED_AMOUNT.search(text) or _AMOUNT.search(text)
+    if match is None:
+        return None
+    amount = _to_float(match.group(1)) * _AMOUNT_MULTIPLIERS.get((match.group(2) or "").lower(), 1)
+
+    if _PER_UNIT.search(text):
+        if not quantity:
+            return None
+        amount *= quantity
+    return _clean_number(amount)
+
+
+def _add_months(day: date, months: int) -> date:
+    month_index = day.month - 1 + months
+    year, month = day.year + month_index // 12, month_index % 12 + 1
+    return date(year, month, min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def _future_date(reference: date, month: int, day: int, year: Optional[str]) -> Optional[date]:
+    """Calendar date, rolled into next year when no year is given and it has passed."""
+    try:
+        result = date(int(year) if year else reference.year, month, day)
+    except ValueError:
+        return None
+    if not year and result < reference:
+        result = date(result.year + 1, month, min(day, calendar.monthrange(result.year + 1, month)[1]))
+    return result
+
+
+def parse_deadline(text: Optional[str], reference: date) -> Optional[date]:
+    """
+    Delivery deadline: absolute ("March 15", "2026-03-15") or relative to
+    reference ("within 2 weeks", "end of month", "by Friday", "ASAP").
+    """
+    if not text:
+        return None
+    lowered = text.lower()
+
+    match = _ISO_DATE.search(text)
+    if match:
+        try:
+            return date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+        except ValueError:
+            return None
+
+    match = _DAY_MONTH.search(text)
+    if match:
+        return _future_date(reference, _MONTHS[match.group(2).lower()], int(match.group(1)), match.group(3))
+
+    match = _MONTH_DAY.search(text)
+    if match:
+        return _future_date(reference, _MONTHS[match.group(1).lower()], int(match.group(2)), match.group(3))
+
+    if re.search(r"\bend\s+of\s+(the\s+|this\s+)?month\b", lowered):
+        return date(reference.year, reference.month, calendar.monthrange(reference.year, reference.month)[1])
+    if re.search(r"\bend\s+of\s+next\s+month\b", lowered):
+        following = _add_months(reference.replace(day=1), 1)
+        return following.replace(day=calendar.monthrange(following.year, following.month)[1])
+
+    # "within 2 weeks", "2-3 weeks", "10 business days", "a month"
+    match = _RELATIVE.search(text)
+    if match:
+        count = _RELATIVE_COUNTS.get(match.group(1).lower())
+        if count is None:
+            count = _to_float(match.group(1))
+        unit = match.group(3).lower()
+        if unit == "month":
+            return _add_months(reference, int(count))
+        days = count * (7 if unit == "week" else 1)
+        if match.group(2):  # business days
+            days = days * 7 / 5
+        return reference + timedelta(days=round(days))
+    if re.search(r"\bnext\s+week\b", lowered):
+        return reference + timedelta(days=7)
+    if re.search(r"\bnext\s+month\b", lowered):
+        return _add_months(reference, 1)
+
+    match = _WEEKDAY.search(text)
+    if match:
+        ahead = (_WEEKDAYS[match.group(1).lower()] - reference.weekday()) % 7 or 7
+        return reference + timedelta(days=ahead)
+
+    if re.search(r"\btomorrow\b", lowered):
+        return reference + timedelta(days=1)
+    if re.search(r"\b(asap|urgent(ly)?|immediately|right away|today)\b", lowered):
+        return reference
+    return None
+
+
+def normalize_specs(data: ExtractedData, reference: date) -> Dict[str, Any]:
+    """
+    Typed values for SPEC_COLUMNS from extracted text.
+
+    Args:
+        data: Extracted (free text) fields
+        reference: Date relative timelines are resolved against
+
+    Returns:
+        Dict keyed by SPEC_COLUMNS (deadline_date as YYYY-MM-DD)
+    """
+    storage_gb, storage_type = parse_storage(data.storage)
+    quantity = parse_quantity(data.quantity)
+    deadline = parse_deadline(data.delivery_timeline, reference)
+
+    return {
+        "ram_gb": parse_ram_gb(data.ram),
+        "storage_gb": storage_gb,
+        "storage_type": storage_type,
+        "screen_inches": parse_screen_inches(data.screen_size),
+        "quantity_int": quantity,
+        "budget_usd": parse_budget_usd(data.budget, quantity),
+        "deadline_date": deadline.isoformat() if deadline else None,
+        "specs_version": NORMALIZER_VERSION,
+    }
+
+
+def spec_values(data: ExtractedData, reference: date) -> List[Any]:
+    """normalize_specs() as a list in SPEC_COLUMNS order, for SQL parameters."""
+    specs = normalize_specs(data, reference)
+    return [specs[column] for column in SPEC_COLUMNS]
+
+
+def reference_date(created_at) -> date:
+    """Reference date for a ticket created at created_at (datetime, SQLite text or None)."""
+    if isinstance(created_at, datetime):
+        return created_at.date()
+    if isinstance(created_at, str) and created_at:
+        try:
+            return datetime.fromisoformat(created_at).date()
+        except ValueError:
+            pass
+    return datetime.now(timezone.utc).date()
+
+
+def backfill_specs(batch_size: int = 500) -> int:
+    """
+    Normalize extracted_data rows written before NORMALIZER_VERSION, in
+    keyset-paginated batches (one read and one batched write each).
+
+    Returns:
+        Number of rows updated
+    """
+    client = get_db_client()
+    fields = ("laptop_model", "ram", "storage", "screen_size", "warranty", "quantity",
+              "delivery_location", "delivery_timeline", "budget")
+    assignments = ", ".join(f"{column} = ?" for column in SPEC_COLUMNS)
+
+    updated = 0
+    last_id = 0
+    while True:
+        result = client.execute(
+            f"""
+            SELECT e.id, t.created_at, {', '.join(f'e.{f}' for f in fields)}
+            FROM extracted_data e
+            JOIN tickets t ON t.id = e.ticket_id
+            WHERE e.id > ? AND COALESCE(e.specs_version, 0) < ?
+            ORDER BY e.id
+            LIMIT ?
+            """,
+            [last_id, NORMALIZER_VERSION, batch_size]
+        )
+        if not result.rows:
+            break
+
+        statements = []
+        for row in result.rows:
+            data = ExtractedData(**dict(zip(fields, row[2:])))
+            statements.append((
+                f"UPDATE extracted_data SET {assignments} WHERE id = ?",
+                [*spec_values(data, reference_date(row[1])), row[0]]
+            ))
+        client.batch(statements)
+
+        updated += len(statements)
+        last_id = result.rows[-1][0]
+
+    return updated
+
+
+def start_backfill() -> threading.Thread:
+    """Run backfill_specs on a background thread (used at startup)."""
+    def run():
+        try:
+            count = backfill_specs()
+            if count:
+                print(f"[SPECS] Normalized {count} extracted_data rows (v{NORMALIZER_VERSION})")
+        except Exception as e:
+            print(f"[SPECS] Backfill failed: {e}")
+        finally:
+            get_db_client().close()  # this thread's client, so it does not hold the process open
+
+    thread = threading.Thread(target=run, name="spec-backfill", daemon=True)
+    thread.start()
+    return thread
+
+
+if __name__ == "__main__":
+    from app.database import close_db_clients, initialize_database
+
+    initialize_database()
+    try:
+        print(f"[SPECS] Normalized {backfill_specs()} extracted_data rows (v{NORMALIZER_VERSION})")
+    finally:
+        close_db_clients()
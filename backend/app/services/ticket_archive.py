@@ -0,0 +1,255 @@
+"""
+Hot/cold tiering for the email threads of finished tickets.
+
+READY tickets that have not changed for settings.archive_after_days are
+almost never opened again, but their emails dominate email_threads,
+its indexes, the search index and blobs. Archiving moves a ticket's
+whole thread into one compressed ticket_archive row, in bounded
+batches of one transaction each. What stays hot:
+
+- the tickets row (the stub, with archived_at set) and extracted_data,
+  so lists, filters, stats and extracted-data search are unchanged
+- ticket_archive_threads, one small row per archived email, so
+  find_ticket_by_email_headers still matches In-Reply-To headers
+
+The thread comes back (same IDs) the first time the ticket is opened,
+replied to or its thread is paged: ticket_service calls restore_ticket.
+Archived emails are not found by email search until then.
+
+Usage (from backend/):
+    python -m app.services.ticket_archive archive [--days 90] [--batch-size 50] [--max-batches N]
+    python -m app.services.ticket_archive restore TICKET_ID
+    python -m app.services.ticket_archive report
+"""
+
+import json
+from typing import Dict, List, Optional
+
+from app.config import settings
+from app.database import THREAD_SEARCH_INDEX, get_db_client
+from app.services.blob_store import blob_store
+
+
+def archive_tickets(
+    older_than_days: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    max_batches: Optional[int] = None
+) -> Dict[str, int]:
+    """
+    Archive the threads of READY tickets not updated for older_than_days.
+
+    Args:
+        older_than_days: Age threshold (default settings.archive_after_days)
+        batch_size: Tickets per transaction (default settings.archive_batch_size)
+        max_batches: Stop after this many batches (default: until done)
+
+    Returns:
+        Counts of archived tickets, emails and freed blobs
+    """
+    older_than_days = older_than_days if older_than_days is not None else settings.archive_after_days
+    batch_size = batch_size or settings.archive_batch_size
+    client = get_db_client()
+
+    totals = {"tickets": 0, "emails": 0, "blobs_deleted": 0}
+    last_id = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        result = client.execute(
+            """
+            SELECT id FROM tickets
+            WHERE status = 'READY' AND archived_at IS NULL
+              AND updated_at < datetime('now', ?)
+              AND id > ?
+            ORDER BY id LIMIT ?
+            """,
+            [f"-{older_than_days} days", last_id, batch_size]
+        )
+        ticket_ids = [row[0] for row in result.rows]
+        if not ticket_ids:
+            break
+
+        emails, blobs_deleted = _archive_batch(ticket_ids)
+        totals["tickets"] += len(ticket_ids)
+        totals["emails"] += emails
+        totals["blobs_deleted"] += blobs_deleted
+        last_id = ticket_ids[-1]
+        batches += 1
+        print(f"[ARCHIVE] {totals['tickets']} tickets, {totals['emails']} emails archived")
+
+    return totals
+
+
+def _archive_batch(ticket_ids: List[int]) -> tuple:
+    """Archive the threads of these tickets in one transaction. Returns (emails, blobs deleted)."""
+    client = get_db_client()
+    result = client.execute(
+        f"""
+        SELECT th.id, th.ticket_id, th.email_subject, th.direction, th.email_message_id,
+               th.in_reply_to, th.timestamp, th.body_hash,
+               th.email_body, b.codec, b.dictionary_id, b.data
+        FROM email_threads th
+        LEFT JOIN blobs b ON b.hash = th.body_hash
+        WHERE th.ticket_id IN ({', '.join('?' for _ in ticket_ids)})
+        ORDER BY th.id
+        """,
+        ticket_ids
+    )
+
+    threads: Dict[int, List] = {ticket_id: [] for ticket_id in ticket_ids}
+    for row in result.rows:
+        threads[row[1]].append(row)
+
+    statements = []
+    archived_ids = []
+    hashes = []
+    for ticket_id, rows in threads.items():
+        emails = []
+        for row in rows:
+            thread_id, _, subject, direction, message_id, in_reply_to, timestamp, digest = row[:8]
+            body = blob_store.decode_body(*row[8:])
+            emails.append([thread_id, subject, body, direction, message_id, in_reply_to, timestamp])
+            statements.append((
+                """
+                INSERT INTO ticket_archive_threads (id, ticket_id, direction, email_message_id, timestamp)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                [thread_id, ticket_id, direction, message_id, timestamp]
+            ))
+            # Contentless index: entries are removed by their original text
+            statements.append((
+                f"""
+                INSERT INTO {THREAD_SEARCH_INDEX}({THREAD_SEARCH_INDEX}, rowid, email_subject, email_body)
+                VALUES ('delete', ?, ?, ?)
+                """,
+                [thread_id, subject, body]
+            ))
+            archived_ids.append(thread_id)
+            if digest:
+                hashes.append(digest)
+
+        codec, dictionary_id, data, size = blob_store.encode(json.dumps({"threads": emails}))
+        statements.append((
+            """
+            INSERT INTO ticket_archive (ticket_id, thread_count, size, codec, dictionary_id, data)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            [ticket_id, len(emails), size, codec, dictionary_id, data]
+        ))
+        statements.append((
+            "UPDATE tickets SET archived_at = CURRENT_TIMESTAMP WHERE id = ?",
+            [ticket_id]
+        ))
+
+    # By ID, so an email that arrived after the read above stays hot
+    if archived_ids:
+        statements.append((
+            f"DELETE FROM email_threads WHERE id IN ({', '.join('?' for _ in archived_ids)})",
+            archived_ids
+        ))
+    client.batch(statements)
+
+    return len(archived_ids), blob_store.collect_garbage(hashes)
+
+
+def restore_ticket(ticket_id: int) -> bool:
+    """
+    Move an archived thread back into email_threads (same IDs), its
+    bodies into blobs and its emails into the search index.
+
+    Safe to call concurrently: every insert is conditional on the
+    archive row, which the same transaction deletes, so only the first
+    restore writes anything.
+
+    Args:
+        ticket_id: Ticket ID
+
+    Returns:
+        True if the ticket was archived
+    """
+    client = get_db_client()
+    result = client.execute(
+        "SELECT codec, dictionary_id, data FROM ticket_archive WHERE ticket_id = ?",
+        [ticket_id]
+    )
+    if not result.rows:
+        return False
+
+    payload = json.loads(blob_store.decode(*result.rows[0]))
+    archived = "EXISTS (SELECT 1 FROM ticket_archive WHERE ticket_id = ?)"
+
+    statements = []
+    for thread_id, subject, body, direction, message_id, in_reply_to, timestamp in payload["threads"]:
+        digest, put_blob = blob_store.put(body)
+        statements.append(put_blob)
+        statements.append((
+            f"""
+            INSERT INTO email_threads (
+                id, ticket_id, email_subject, email_body, body_hash,
+                direction, email_message_id, in_reply_to, timestamp
+            )
+            SELECT ?, ?, ?, '', ?, ?, ?, ?, ? WHERE {archived}
+            """,
+            [thread_id, ticket_id, subject, digest, direction, message_id, in_reply_to, timestamp, ticket_id]
+        ))
+        statements.append((
+            f"""
+            INSERT INTO {THREAD_SEARCH_INDEX}(rowid, email_subject, email_body)
+            SELECT ?, ?, ? WHERE {archived}
+            """,
+            [thread_id, subject, body, ticket_id]
+        ))
+
+    # Stubs last: while they exist, the stats trigger knows these
+    # emails were already counted
+    statements += [
+        ("DELETE FROM ticket_archive_threads WHERE ticket_id = ?", [ticket_id]),
+        ("UPDATE tickets SET archived_at = NULL WHERE id = ?", [ticket_id]),
+        ("DELETE FROM ticket_archive WHERE ticket_id = ?", [ticket_id]),
+    ]
+    client.batch(statements)
+
+    print(f"[ARCHIVE] Restored ticket {ticket_id} ({len(payload['threads'])} emails)")
+    return True
+
+
+def archive_report() -> Dict[str, int]:
+    """Archived tickets and emails, and their size before and after compression."""
+    client = get_db_client()
+    result = client.execute(
+        """
+        SELECT COUNT(*), COALESCE(SUM(thread_count), 0),
+               COALESCE(SUM(size), 0), COALESCE(SUM(length(data)), 0)
+        FROM ticket_archive
+        """
+    )
+    tickets, emails, size, stored = result.rows[0]
+    return {"tickets": tickets, "emails": emails, "size_bytes": size, "stored_bytes": stored}
+
+
+if __name__ == "__main__":
+    import argparse
+    from app.database import close_db_clients, initialize_database
+
+    parser = argparse.ArgumentParser(description="Archive email threads of old READY tickets")
+    parser.add_argument("command", choices=["archive", "restore", "report"])
+    parser.add_argument("ticket_id", nargs="?", type=int, help="ticket to restore")
+    parser.add_argument("--days", type=int, default=None, help="archive tickets untouched this long")
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--max-batches", type=int, default=None)
+    args = parser.parse_args()
+
+    initialize_database()
+    try:
+        if args.command == "archive":
+            totals = archive_tickets(args.days, args.batch_size, args.max_batches)
+            print(f"[ARCHIVE] Archived {totals}")
+        elif args.command == "restore":
+            if args.ticket_id is None:
+                parser.error("restore needs a ticket ID")
+            if not restore_ticket(args.ticket_id):
+                print(f"[ARCHIVE] Ticket {args.ticket_id} is not archived")
+        report = archive_report()
+        print(f"[ARCHIVE] {report['tickets']} tickets, {report['emails']} emails archived: "
+              f"{report['size_bytes']:,} bytes stored in {report['stored_bytes']:,}")
+    finally:
+        close_db_clients()
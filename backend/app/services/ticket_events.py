@@ -0,0 +1,188 @@
+"""
+In-process pub/sub for ticket changes, feeding GET /tickets/stream.
+
+ticket_service publishes a small delta (the ticket's list summary) after
+every mutation. Each event is encoded as a Server-Sent Events frame once
+and fanned out to every connected dashboard, instead of each dashboard
+re-running the list query on a timer.
+
+- Events carry ids "<epoch>-<seq>". The last settings.sse_replay_buffer
+  frames are kept, so a client reconnecting with Last-Event-ID receives
+  what it missed. If that is no longer possible (id from another process
+  or too old), it gets a `reset` event and reloads.
+- Every subscriber has a bounded queue (settings.sse_client_queue). A
+  client too slow to keep up has its queue dropped and replaced with a
+  single `reset` event, so one stalled connection never grows memory.
+- Publishing happens on threadpool workers; frames are handed to each
+  subscriber's event loop with call_soon_threadsafe.
+
+The bus is per process: with several workers, a dashboard only sees
+changes made by the worker it is connected to.
+"""
+
+import asyncio
+import threading
+import uuid
+from collections import deque
+from typing import AsyncIterator, Deque, Dict, List, Optional, Set, Tuple
+
+import orjson
+
+from app.config import settings
+from app.utils.metrics import CallbackMetric, Counter
+
+HEARTBEAT_FRAME = b": heartbeat\n\n"
+
+
+def format_event(event_id: str, event_type: str, data: Dict) -> bytes:
+    """Encode one Server-Sent Events frame."""
+    return b"id: %s\nevent: %s\ndata: %s\n\n" % (
+        event_id.encode(), event_type.encode(), orjson.dumps(data)
+    )
+
+
+class Subscription:
+    """One connected stream client."""
+
+    def __init__(self, bus: "TicketEventBus", loop: asyncio.AbstractEventLoop, max_queue: int):
+        self.bus = bus
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+
+    def push(self, frame: bytes) -> None:
+        """Queue a frame from any thread."""
+        try:
+            self.loop.call_soon_threadsafe(self._deliver, frame)
+        except RuntimeError:
+            # Event loop already closed; the stream is gone
+            self.bus.unsubscribe(self)
+
+    def _deliver(self, frame: bytes) -> None:
+        try:
+            self.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            # Too far behind to catch up event by event: replace the
+            # backlog with one reset so the client reloads the list
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(self.bus.reset_frame("overflow"))
+            sse_overflows.inc()
+
+
+class TicketEventBus:
+    """Fan-out of ticket change events to stream subscribers."""
+
+    def __init__(self, replay_buffer: int, client_queue: int):
+        # Event ids from a previous process (or another worker) never match
+        self.epoch = uuid.uuid4().hex[:8]
+        self.client_queue = client_queue
+        self._seq = 0
+        self._buffer: Deque[Tuple[int, bytes]] = deque(maxlen=replay_buffer)
+        self._subscribers: Set[Subscription] = set()
+        self._lock = threading.Lock()
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def _event_id(self, seq: int) -> str:
+        return f"{self.epoch}-{seq}"
+
+    def reset_frame(self, reason: str) -> bytes:
+        """Frame telling a client to reload, resuming after the latest event."""
+        return format_event(self._event_id(self._seq), "reset", {"reason": reason})
+
+    def publish(self, event_type: str, data: Dict) -> None:
+        """
+        Record an event and send it to every subscriber.
+
+        Args:
+            event_type: SSE event name (e.g. ticket.created)
+            data: JSON-serializable payload
+        """
+        with self._lock:
+            self._seq += 1
+            frame = format_event(self._event_id(self._seq), event_type, data)
+            self._buffer.append((self._seq, frame))
+            subscribers = list(self._subscribers)
+
+        sse_events.inc((event_type,))
+        for subscription in subscribers:
+            subscription.push(frame)
+
+    def subscribe(self, last_event_id: Optional[str] = None) -> Subscription:
+        """
+        Register a subscriber on the running event loop, pre-filled with
+        the events after last_event_id (or a reset if they are gone).
+        """
+        subscription = Subscription(self, asyncio.get_running_loop(), self.client_queue)
+        with self._lock:
+            backlog = self._backlog(last_event_id)
+            self._subscribers.add(subscription)
+
+        # Runs on the subscriber's loop before any pushed frame, so the
+        # replayed events come first and in order
+        for frame in backlog:
+            subscription._deliver(frame)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def _backlog(self, last_event_id: Optional[str]) -> List[bytes]:
+        """Frames a client resuming from last_event_id missed (lock held)."""
+        if not last_event_id:
+            return []
+
+        epoch, _, seq_text = last_event_id.strip().partition("-")
+        if epoch != self.epoch or not seq_text.isdigit() or int(seq_text) > self._seq:
+            return [self.reset_frame("unknown_event_id")]
+
+        last_seq = int(seq_text)
+        oldest = self._buffer[0][0] if self._buffer else self._seq + 1
+        if last_seq < oldest - 1:
+            return [self.reset_frame("expired_event_id")]
+        return [frame for seq, frame in self._buffer if seq > last_seq]
+
+    async def stream(self, last_event_id: Optional[str] = None) -> AsyncIterator[bytes]:
+        """
+        Frames for one client: replayed events, then live ones, with a
+        heartbeat comment whenever the stream is idle.
+        """
+        subscription = self.subscribe(last_event_id)
+        try:
+            yield b"retry: %d\n\n" % int(settings.sse_retry_ms)
+            while True:
+                try:
+                    frame = await asyncio.wait_for(
+                        subscription.queue.get(), timeout=settings.sse_heartbeat_interval
+                    )
+                except asyncio.TimeoutError:
+                    frame = HEARTBEAT_FRAME
+                yield frame
+        finally:
+            self.unsubscribe(subscription)
+
+
+sse_events = Counter(
+    "ticket_events_total",
+    "Ticket change events published to stream subscribers.",
+    labelnames=("event",),
+)
+
+sse_overflows = Counter(
+    "ticket_stream_overflows_total",
+    "Stream clients reset because their event queue was full.",
+)
+
+# Create singleton instance
+ticket_events = TicketEventBus(
+    replay_buffer=settings.sse_replay_buffer,
+    client_queue=settings.sse_client_queue,
+)
+
+CallbackMetric(
+    "ticket_stream_clients", "Connected GET /tickets/stream clients.",
+    lambda: ticket_events.subscribers,
+)
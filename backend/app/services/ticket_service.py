@@ -3,16 +3,83 @@ Ticket service containing all business logic for creating,
 updating, and managing quote request tickets.
 """
 
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Iterator
 from datetime import datetime
+import html
+import re
+import unicodedata
 import uuid
-from app.database import get_db_client
+from app.config import settings
+from app.database import THREAD_SEARCH_INDEX, get_db_client
 from app.models.ticket import (
-    Ticket, TicketCreate, TicketUpdate, ExtractedData,
-    EmailThread, TicketStatus, MockEmailCreate
+    Ticket, TicketCreate, TicketUpdate, ExtractedData, EmailThread, TicketStatus,
+    MockEmailCreate, REQUIRED_FIELDS, construct_trusted, fields_to_mask, mask_to_fields
 )
+from app.services.blob_store import blob_store
 from app.services.claude_extractor import extract_quote_details, generate_followup_email
 from app.services.email_service import email_service
+from app.services.llm_ledger import llm_ledger
+from app.services.spec_normalizer import SPEC_COLUMNS, reference_date, spec_values
+from app.services.ticket_archive import restore_ticket
+from app.services.ticket_events import ticket_events
+
+
+# extracted_data writes keep the typed spec columns in step with the text
+_SPEC_COLUMN_LIST = ", ".join(SPEC_COLUMNS)
+_SPEC_PLACEHOLDERS = ", ".join("?" for _ in SPEC_COLUMNS)
+_UPDATE_EXTRACTED_DATA = f"""
+    UPDATE extracted_data
+    SET laptop_model = ?, ram = ?, storage = ?, screen_size = ?,
+        warranty = ?, quantity = ?, delivery_location = ?,
+        delivery_timeline = ?, budget = ?,
+        {', '.join(f"{column} = ?" for column in SPEC_COLUMNS)}
+    WHERE ticket_id = ?
+"""
+
+
+# Reminders queued by app.services.followup_scheduler and not sent yet:
+# dropped whenever reminders start over (a reply or a status change)
+_CANCEL_REMINDERS = "DELETE FROM followup_outbox WHERE ticket_id = ? AND status = 'pending'"
+
+
+def _thread_insert_statements(
+    ticket_ref: str,
+    ticket_args: list,
+    subject: Optional[str],
+    body: str,
+    direction: str,
+    message_id: Optional[str]
+) -> List[tuple]:
+    """
+    Statements adding an email to a thread: its body in blobs, the
+    thread row referencing it and the row's search index entry (the
+    index cannot read compressed bodies, so it is written here).
+
+    Args:
+        ticket_ref: SQL for the ticket ID ("?" or a subquery)
+        ticket_args: Arguments of ticket_ref
+        subject, body, direction, message_id: The email
+
+    Returns:
+        Statements for client.batch, in order
+    """
+    digest, put_blob = blob_store.put(body)
+    return [
+        put_blob,
+        (
+            f"""
+            INSERT INTO email_threads (
+                ticket_id, email_subject, email_body, body_hash, direction, email_message_id
+            )
+            VALUES ({ticket_ref}, ?, '', ?, ?, ?)
+            """,
+            [*ticket_args, subject, digest, direction, message_id]
+        ),
+        (
+            f"INSERT INTO {THREAD_SEARCH_INDEX}(rowid, email_subject, email_body) VALUES (last_insert_rowid(), ?, ?)",
+            [subject, body]
+        ),
+    ]
 
 
 def generate_ticket_number() -> str:
@@ -20,6 +87,7 @@ def generate_ticket_number() -> str:
     return f"TKT-{uuid.uuid4().hex[:8].upper()}"
 
 
+@llm_ledger.track_ticket
 def create_ticket_from_email(
     email_body: str,
     email_subject: str,
@@ -66,50 +134,52 @@ def create_ticket_from_email(
     else:
         status = TicketStatus.WAITING_ON_CUSTOMER
 
-    # Create ticket
-    result = client.execute(
-        """
-        INSERT INTO tickets (ticket_number, customer_name, customer_email, status)
-        VALUES (?, ?, ?, ?)
-        """,
-        [ticket_number, customer_name, customer_email_final, status.value]
-    )
-
-    ticket_id = result.last_insert_rowid
-
-    # Store extracted data
-    client.execute(
-        """
-        INSERT INTO extracted_data (
-            ticket_id, laptop_model, ram, storage, screen_size,
-            warranty, quantity, delivery_location, delivery_timeline, budget
-        )
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """,
-        [
-            ticket_id,
-            extracted_data.laptop_model,
-            extracted_data.ram,
-            extracted_data.storage,
-            extracted_data.screen_size,
-            extracted_data.warranty,
-            extracted_data.quantity,
-            extracted_data.delivery_location,
-            extracted_data.delivery_timeline,
-            extracted_data.budget
-        ]
-    )
+    # Create ticket, extracted data, incoming email and change record in
+    # one transaction; later statements find the ticket by its number
+    new_ticket_id = "(SELECT id FROM tickets WHERE ticket_number = ?)"
+    results = client.batch([
+        (
+            """
+            INSERT INTO tickets (ticket_number, customer_name, customer_email, status, missing_mask)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            [
+                ticket_number, customer_name, customer_email_final, status.value,
+                extracted_data.get_missing_mask()
+            ]
+        ),
+        (
+            f"""
+            INSERT INTO extracted_data (
+                ticket_id, laptop_model, ram, storage, screen_size,
+                warranty, quantity, delivery_location, delivery_timeline, budget,
+                {_SPEC_COLUMN_LIST}
+            )
+            VALUES ({new_ticket_id}, ?, ?, ?, ?, ?, ?, ?, ?, ?, {_SPEC_PLACEHOLDERS})
+            """,
+            [
+                ticket_number,
+                extracted_data.laptop_model,
+                extracted_data.ram,
+                extracted_data.storage,
+                extracted_data.screen_size,
+                extracted_data.warranty,
+                extracted_data.quantity,
+                extracted_data.delivery_location,
+                extracted_data.delivery_timeline,
+                extracted_data.budget,
+                *spec_values(extracted_data, reference_date(None))
+            ]
+        ),
+        *_thread_insert_statements(
+            new_ticket_id, [ticket_number], email_subject, email_body, "inbound", email_message_id
+        ),
+        _change_statement("created", ticket_number=ticket_number),
+    ])
 
-    # Store incoming email in thread
-    client.execute(
-        """
-        INSERT INTO email_threads (
-            ticket_id, email_subject, email_body, direction, email_message_id
-        )
-        VALUES (?, ?, ?, ?, ?)
-        """,
-        [ticket_id, email_subject, email_body, "inbound", email_message_id]
-    )
+    ticket_id = results[0].last_insert_rowid
+    seq = results[-1].last_insert_rowid
+    llm_ledger.bind_ticket(ticket_id)
 
     # Send follow-up if fields are missing
     if len(missing_fields) > 0:
@@ -127,26 +197,22 @@ def create_ticket_from_email(
         )
 
         # Store outbound email in thread
-        client.execute(
-            """
-            INSERT INTO email_threads (
-                ticket_id, email_subject, email_body, direction, email_message_id
-            )
-            VALUES (?, ?, ?, ?, ?)
-            """,
-            [
-                ticket_id,
-                followup["subject"],
-                followup["body"],
-                "outbound",
-                email_result.get("message_id")
-            ]
-        )
+        results = client.batch([
+            *_thread_insert_statements(
+                "?", [ticket_id], followup["subject"], followup["body"],
+                "outbound", email_result.get("message_id")
+            ),
+            _change_statement("followup_sent", ticket_id),
+        ])
+        seq = results[-1].last_insert_rowid
 
     # Return created ticket
-    return get_ticket_by_id(ticket_id)
+    ticket = get_ticket_by_id(ticket_id)
+    _publish_change("ticket.created", ticket, seq)
+    return ticket
 
 
+@llm_ledger.track_ticket
 def update_ticket_from_reply(
     ticket_id: int,
     email_body: str,
@@ -173,44 +239,35 @@ def update_ticket_from_reply(
     """
 
     client = get_db_client()
+    llm_ledger.bind_ticket(ticket_id)
 
-    # Get existing ticket
+    # Get existing ticket and the inbound emails received so far
     ticket = get_ticket_by_id(ticket_id)
 
     if not ticket:
         raise ValueError(f"Ticket {ticket_id} not found")
 
-    # Store incoming reply in thread
-    client.execute(
-        """
-        INSERT INTO email_threads (
-            ticket_id, email_subject, email_body, direction, email_message_id
-        )
-        VALUES (?, ?, ?, ?, ?)
-        """,
-        [ticket_id, email_subject, email_body, "inbound", email_message_id]
-    )
+    inbound_bodies = _get_inbound_bodies(ticket_id)
 
-    # Combine all inbound emails for re-extraction
-    all_inbound = []
-    for thread in ticket.email_threads:
-        if thread.direction == "inbound":
-            all_inbound.append(thread.email_body)
+    # Store incoming reply in thread (before extraction, so the reply is
+    # kept even if Claude fails)
+    client.batch([
+        *_thread_insert_statements(
+            "?", [ticket_id], email_subject, email_body, "inbound", email_message_id
+        ),
+        (_CANCEL_REMINDERS, [ticket_id]),
+        _change_statement("reply_received", ticket_id),
+    ])
 
-    combined_email = "\n\n---\n\n".join(all_inbound)
+    # Combine all inbound emails for re-extraction
+    combined_email = "\n\n---\n\n".join(inbound_bodies)
 
     # Re-extract data with full context
     extracted_data = extract_quote_details(combined_email, email_subject)
 
     # Update extracted data in database
-    client.execute(
-        """
-        UPDATE extracted_data
-        SET laptop_model = ?, ram = ?, storage = ?, screen_size = ?,
-            warranty = ?, quantity = ?, delivery_location = ?,
-            delivery_timeline = ?, budget = ?
-        WHERE ticket_id = ?
-        """,
+    statements = [(
+        _UPDATE_EXTRACTED_DATA,
         [
             extracted_data.laptop_model,
             extracted_data.ram,
@@ -221,32 +278,39 @@ def update_ticket_from_reply(
             extracted_data.delivery_location,
             extracted_data.delivery_timeline,
             extracted_data.budget,
+            *spec_values(extracted_data, reference_date(ticket.created_at)),
             ticket_id
         ]
-    )
+    )]
+    changed_fields = ["extracted_data"]
 
     # Update customer name and email if newly extracted
     if extracted_data.customer_name:
-        client.execute(
+        statements.append((
             "UPDATE tickets SET customer_name = ? WHERE id = ?",
             [extracted_data.customer_name, ticket_id]
-        )
+        ))
+        changed_fields.append("customer_name")
 
     if extracted_data.customer_email:
-        client.execute(
+        statements.append((
             "UPDATE tickets SET customer_email = ? WHERE id = ?",
             [extracted_data.customer_email, ticket_id]
-        )
+        ))
+        changed_fields.append("customer_email")
 
     # Check if all fields are now present
     missing_fields = extracted_data.get_missing_required_fields()
+    missing_mask = fields_to_mask(missing_fields)
 
     if len(missing_fields) == 0:
         # All fields present, mark as READY
-        client.execute(
-            "UPDATE tickets SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
-            [TicketStatus.READY.value, ticket_id]
-        )
+        statements.append((
+            "UPDATE tickets SET status = ?, missing_mask = ?, reminders_sent = 0, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+            [TicketStatus.READY.value, missing_mask, ticket_id]
+        ))
+        statements.append((_CANCEL_REMINDERS, [ticket_id]))
+        event_type = "updated"
     else:
         # Still missing fields, send another follow-up
         followup = generate_followup_email(
@@ -263,92 +327,651 @@ def update_ticket_from_reply(
         )
 
         # Store outbound email in thread
-        client.execute(
-            """
-            INSERT INTO email_threads (
-                ticket_id, email_subject, email_body, direction, email_message_id
-            )
-            VALUES (?, ?, ?, ?, ?)
-            """,
-            [
-                ticket_id,
-                followup["subject"],
-                followup["body"],
-                "outbound",
-                email_result.get("message_id")
-            ]
+        statements += _thread_insert_statements(
+            "?", [ticket_id], followup["subject"], followup["body"],
+            "outbound", email_result.get("message_id")
         )
 
-        # Update status to WAITING_ON_CUSTOMER
-        client.execute(
-            "UPDATE tickets SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
-            [TicketStatus.WAITING_ON_CUSTOMER.value, ticket_id]
-        )
+        # Update status to WAITING_ON_CUSTOMER (the customer replied, so
+        # reminders start over)
+        statements.append((
+            "UPDATE tickets SET status = ?, missing_mask = ?, reminders_sent = 0, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+            [TicketStatus.WAITING_ON_CUSTOMER.value, missing_mask, ticket_id]
+        ))
+        # Also queued during extraction (the reply did not move updated_at)
+        statements.append((_CANCEL_REMINDERS, [ticket_id]))
+        event_type = "followup_sent"
+
+    # Apply the extraction results and record the change in one transaction
+    changed_fields.append("status")
+    statements.append(_change_statement(event_type, ticket_id, fields=changed_fields))
+    results = client.batch(statements)
 
     # Return updated ticket
-    return get_ticket_by_id(ticket_id)
+    ticket = get_ticket_by_id(ticket_id)
+    _publish_change("ticket.updated", ticket, results[-1].last_insert_rowid)
+    return ticket
 
 
-def get_tickets(status: Optional[str] = None) -> List[Ticket]:
+# TicketSummary field -> SQL expression (t = tickets, e = extracted_data)
+SUMMARY_COLUMNS = {
+    "id": "t.id",
+    "ticket_number": "t.ticket_number",
+    "customer_name": "t.customer_name",
+    "customer_email": "t.customer_email",
+    "status": "t.status",
+    "created_at": "t.created_at",
+    "updated_at": "t.updated_at",
+    "laptop_model": "e.laptop_model",
+    "quantity": "e.quantity",
+}
+SUMMARY_FIELDS = tuple(SUMMARY_COLUMNS)
+_TIMESTAMP_FIELDS = {"created_at", "updated_at"}
+
+# Typed spec columns: selectable with fields=, not returned by default
+SELECTABLE_COLUMNS = {
+    **SUMMARY_COLUMNS,
+    **{column: f"e.{column}" for column in SPEC_COLUMNS if column != "specs_version"},
+    "missing_mask": "t.missing_mask",
+}
+
+# List filter -> condition on the typed spec columns (one parameter each).
+# Rows whose text could not be parsed (NULL) never match a filter.
+SPEC_FILTERS = {
+    "ram_gb_min": "e.ram_gb >= ?",
+    "ram_gb_max": "e.ram_gb <= ?",
+    "storage_gb_min": "e.storage_gb >= ?",
+    "storage_gb_max": "e.storage_gb <= ?",
+    "storage_type": "e.storage_type = ?",
+    "screen_inches_min": "e.screen_inches >= ?",
+    "screen_inches_max": "e.screen_inches <= ?",
+    "quantity_min": "e.quantity_int >= ?",
+    "quantity_max": "e.quantity_int <= ?",
+    "budget_usd_min": "e.budget_usd >= ?",
+    "budget_usd_max": "e.budget_usd <= ?",
+    "deadline_after": "e.deadline_date >= ?",
+    "deadline_before": "e.deadline_date <= ?",
+}
+
+
+def _has_spec_filters(specs: Optional[Dict]) -> bool:
+    return any(value is not None for value in (specs or {}).values())
+
+
+def missing_masks(fields: List[str], exact: bool = False) -> List[int]:
     """
-    Get all tickets, optionally filtered by status.
+    missing_mask values of tickets missing every one of fields (only
+    those fields when exact). A bitwise test cannot use an index, so
+    missing= filters list the matching masks instead (at most 256).
+
+    Args:
+        fields: REQUIRED_FIELDS names
+        exact: Match tickets missing exactly these fields
+
+    Returns:
+        List of missing_mask values
+    """
+    required = fields_to_mask(fields)
+    if exact:
+        return [required]
+    return [mask for mask in range(1 << len(REQUIRED_FIELDS)) if mask & required == required]
+
+
+def _list_conditions(
+    status: Optional[str],
+    specs: Optional[Dict],
+    missing: Optional[List[int]] = None
+) -> tuple:
+    """WHERE conditions and parameters shared by the list query and its version."""
+    conditions = []
+    params = []
+    if status:
+        conditions.append("t.status = ?")
+        params.append(status)
+    if missing is not None:
+        conditions.append(f"t.missing_mask IN ({', '.join('?' for _ in missing)})")
+        params.extend(missing)
+    for name, value in (specs or {}).items():
+        if value is not None:
+            conditions.append(SPEC_FILTERS[name])
+            params.append(value)
+    return conditions, params
+
+
+def get_ticket_summaries(
+    status: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+    specs: Optional[Dict] = None,
+    missing: Optional[List[int]] = None
+) -> List[Dict]:
+    """
+    Get list-view rows for all tickets in one query, optionally filtered
+    by status, spec ranges and missing fields.
 
     Args:
         status: Optional status filter (NEW, WAITING_ON_CUSTOMER, READY)
+        fields: Subset of SELECTABLE_COLUMNS to return (default: SUMMARY_FIELDS)
+        specs: Optional SPEC_FILTERS values, e.g. {"ram_gb_min": 16}
+        missing: Optional missing_mask values to match (see missing_masks)
 
     Returns:
-        List of Ticket objects
+        List of dicts shaped like TicketSummary (restricted to fields)
     """
 
     client = get_db_client()
+    fields = list(fields or SUMMARY_FIELDS)
+    conditions, params = _list_conditions(status, specs, missing)
+
+    sql = f"SELECT {', '.join(SELECTABLE_COLUMNS[f] for f in fields)} FROM tickets t"
+    if _has_spec_filters(specs):
+        sql += " JOIN extracted_data e ON e.ticket_id = t.id"
+    elif any(SELECTABLE_COLUMNS[f].startswith("e.") for f in fields):
+        sql += " LEFT JOIN extracted_data e ON e.ticket_id = t.id"
+
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += " ORDER BY t.created_at DESC"
+
+    result = client.execute(sql, params)
+    return _summary_rows(fields, result.rows)
+
+
+# Export field -> SQL expression: ticket columns plus all extracted data
+EXPORT_COLUMNS = {
+    "id": "t.id",
+    "ticket_number": "t.ticket_number",
+    "customer_name": "t.customer_name",
+    "customer_email": "t.customer_email",
+    "status": "t.status",
+    "created_at": "t.created_at",
+    "updated_at": "t.updated_at",
+    "laptop_model": "e.laptop_model",
+    "ram": "e.ram",
+    "storage": "e.storage",
+    "screen_size": "e.screen_size",
+    "warranty": "e.warranty",
+    "quantity": "e.quantity",
+    "delivery_location": "e.delivery_location",
+    "delivery_timeline": "e.delivery_timeline",
+    "budget": "e.budget",
+}
+EXPORT_FIELDS = tuple(EXPORT_COLUMNS)
+
+
+def iter_export_chunks(
+    status: Optional[str] = None,
+    created_from: Optional[str] = None,
+    created_to: Optional[str] = None,
+    chunk_size: int = 500
+) -> Iterator[List[tuple]]:
+    """
+    Stream tickets joined with their extracted data, in ID order, as
+    chunks of at most chunk_size rows (values in EXPORT_FIELDS order).
+
+    Each chunk is one keyset-paginated query (WHERE t.id > last id), so
+    memory stays bounded however many tickets there are.
 
+    Args:
+        status: Optional status filter
+        created_from: Optional first creation date, YYYY-MM-DD (inclusive)
+        created_to: Optional last creation date, YYYY-MM-DD (inclusive)
+        chunk_size: Rows per query
+
+    Yields:
+        Lists of row tuples; timestamps as ISO 8601 strings
+    """
+    conditions = ["t.id > ?"]
+    params = []
     if status:
-        result = client.execute(
-            """
-            SELECT id, ticket_number, customer_name, customer_email,
-                   status, created_at, updated_at
-            FROM tickets
-            WHERE status = ?
-            ORDER BY created_at DESC
-            """,
-            [status]
-        )
-    else:
-        result = client.execute(
-            """
-            SELECT id, ticket_number, customer_name, customer_email,
-                   status, created_at, updated_at
-            FROM tickets
-            ORDER BY created_at DESC
-            """
-        )
+        conditions.append("t.status = ?")
+        params.append(status)
+    if created_from:
+        conditions.append("t.created_at >= ?")
+        params.append(created_from)
+    if created_to:
+        conditions.append("t.created_at < date(?, '+1 day')")
+        params.append(created_to)
+
+    sql = (
+        f"SELECT {', '.join(EXPORT_COLUMNS.values())} FROM tickets t "
+        "LEFT JOIN extracted_data e ON e.ticket_id = t.id "
+        f"WHERE {' AND '.join(conditions)} ORDER BY t.id LIMIT ?"
+    )
+    timestamp_indexes = [i for i, f in enumerate(EXPORT_FIELDS) if f in _TIMESTAMP_FIELDS]
 
-    tickets = []
-    for row in result.rows:
-        ticket = Ticket(
-            id=row[0],
-            ticket_number=row[1],
-            customer_name=row[2],
-            customer_email=row[3],
-            status=TicketStatus(row[4]),
-            created_at=row[5],
-            updated_at=row[6]
-        )
+    last_id = 0
+    while True:
+        # Resolved per chunk: a streaming response may resume on another worker thread
+        result = get_db_client().execute(sql, [last_id, *params, chunk_size])
+        if not result.rows:
+            return
+
+        chunk = []
+        for row in result.rows:
+            values = list(row)
+            for i in timestamp_indexes:
+                # SQLite's "YYYY-MM-DD HH:MM:SS" -> the ISO form the API returns
+                if values[i]:
+                    values[i] = values[i].replace(" ", "T", 1)
+            chunk.append(tuple(values))
+        yield chunk
+
+        if len(result.rows) < chunk_size:
+            return
+        last_id = result.rows[-1][0]
+
+
+_SEARCH_TERM = re.compile(r'"([^"]*)"?|(\S+)')
+_WORD = re.compile(r"\w+")
+
+SNIPPET_OPEN = "<mark>"
+SNIPPET_CLOSE = "</mark>"
+SNIPPET_TOKENS = 16
+
+
+def build_match_query(q: str) -> Optional[str]:
+    """
+    Turn free text into a safe FTS5 MATCH expression: every word must
+    match, "quoted text" is matched as a phrase and the last word as a
+    prefix (for as-you-type search). Punctuation never reaches FTS5, so
+    input like "12 Baker St." or "a+b" cannot cause a syntax error.
+
+    Returns:
+        MATCH expression, or None if q has no searchable words
+    """
+    terms = []
+    for match in _SEARCH_TERM.finditer(q):
+        phrase, word = match.groups()
+        words = _WORD.findall(phrase if phrase is not None else word)
+        if not words:
+            continue
+        if phrase is not None:
+            terms.append('"' + " ".join(words) + '"')
+        else:
+            terms.extend(f'"{w}"' for w in words)
+
+    if not terms:
+        return None
+    if not q.rstrip().endswith('"'):
+        terms[-1] += "*"
+    return " ".join(terms)
+
+
+def search_tickets(q: str, limit: int = 20, offset: int = 0) -> Dict:
+    """
+    Full-text search over email threads and extracted data.
+
+    Tickets are ranked by their best-matching email or extracted data
+    row (BM25; email subjects weigh double) among the newest
+    settings.search_candidate_limit matches of each, with a snippet of
+    that row where matches are wrapped in <mark>...</mark>.
+
+    Args:
+        q: Search text
+        limit: Page size
+        offset: Results to skip
+
+    Returns:
+        Dict with results (ticket summary + score, source, snippet) and has_more
+    """
+    match = build_match_query(q)
+    if match is None:
+        return {"results": [], "has_more": False}
+
+    client = get_db_client()
+
+    # FTS5 walks matches in descending rowid order and stops at the
+    # LIMIT, so a word found in millions of emails costs about the same
+    # as a rare one. Extracted data snippets are built in the same pass:
+    # FTS5 cannot look rows up again by rowid without re-running the
+    # whole match. The email index is contentless (bodies are
+    # compressed), so email snippets are built below for the returned
+    # page only. The best hit per ticket comes from MIN(), whose bare
+    # columns SQLite takes from the minimum row.
+    candidates = settings.search_candidate_limit
+    result = client.execute(
+        f"""
+        SELECT {', '.join(SUMMARY_COLUMNS[f] for f in SUMMARY_FIELDS)}, h.score, h.source, h.snippet, h.hit_id
+        FROM (
+            SELECT ticket_id, MIN(score) AS score, source, snippet, hit_id
+            FROM (
+                SELECT th.ticket_id, c.score, 'email' AS source, NULL AS snippet, c.hit_id
+                FROM (
+                    SELECT rowid AS hit_id, bm25({THREAD_SEARCH_INDEX}, 2.0, 1.0) AS score
+                    FROM {THREAD_SEARCH_INDEX}
+                    WHERE {THREAD_SEARCH_INDEX} MATCH ?
+                    ORDER BY rowid DESC LIMIT ?
+                ) c
+                JOIN email_threads th ON th.id = c.hit_id
+                UNION ALL
+                SELECT ed.ticket_id, c.score, 'extracted_data', c.snippet, c.hit_id
+                FROM (
+                    SELECT rowid AS hit_id, bm25(extracted_data_fts) AS score,
+                           snippet(extracted_data_fts, -1, ?, ?, '…', {SNIPPET_TOKENS}) AS snippet
+                    FROM extracted_data_fts
+                    WHERE extracted_data_fts MATCH ?
+                    ORDER BY rowid DESC LIMIT ?
+                ) c
+                JOIN extracted_data ed ON ed.id = c.hit_id
+            )
+            GROUP BY ticket_id
+            ORDER BY score, ticket_id
+            LIMIT ? OFFSET ?
+        ) h
+        JOIN tickets t ON t.id = h.ticket_id
+        LEFT JOIN extracted_data e ON e.ticket_id = t.id
+        ORDER BY h.score, t.id
+        """,
+        [
+            match, candidates,
+            SNIPPET_OPEN, SNIPPET_CLOSE, match, candidates,
+            limit + 1, offset
+        ]
+    )
+
+    rows = result.rows[:limit]
+    width = len(SUMMARY_FIELDS)
+    email_snippets = _email_snippets(
+        [row[width + 3] for row in rows if row[width + 1] == "email"], q
+    )
+    summaries = _summary_rows(list(SUMMARY_FIELDS), [row[:width] for row in rows])
+    results = [
+        {
+            **summary,
+            "score": round(-row[width], 4),
+            "source": row[width + 1],
+            "snippet": email_snippets.get(row[width + 3]) if row[width + 1] == "email" else row[width + 2],
+        }
+        for summary, row in zip(summaries, rows)
+    ]
+    return {"results": results, "has_more": len(result.rows) > limit}
+
+
+def _email_snippets(thread_ids: List[int], q: str) -> Dict[int, str]:
+    """Snippets of the matched emails (subject or body), keyed by thread ID."""
+    if not thread_ids:
+        return {}
+
+    client = get_db_client()
+    result = client.execute(
+        f"""
+        SELECT th.id, th.email_subject, th.email_body, b.codec, b.dictionary_id, b.data
+        FROM email_threads th {_THREAD_BLOBS}
+        WHERE th.id IN ({', '.join('?' for _ in thread_ids)})
+        """,
+        thread_ids
+    )
+
+    terms = _snippet_terms(q)
+    return {
+        row[0]: build_snippet([row[1] or "", _plain_text(blob_store.decode_body(*row[2:]))], terms)
+        for row in result.rows
+    }
+
+
+def _fold(word: str) -> str:
+    """Case- and accent-insensitive form of a word, like the search tokenizer's."""
+    decomposed = unicodedata.normalize("NFKD", word.casefold())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def _snippet_terms(q: str) -> List[tuple]:
+    """(folded word, is prefix) for every word of a query, as build_match_query reads it."""
+    words = [_fold(w) for w in _WORD.findall(q)]
+    prefix_last = bool(words) and not q.rstrip().endswith('"')
+    return [(w, prefix_last and i == len(words) - 1) for i, w in enumerate(words)]
 
-        # Load extracted data
-        ticket.extracted_data = _get_extracted_data(ticket.id)
 
-        tickets.append(ticket)
+def build_snippet(texts: List[str], terms: List[tuple]) -> str:
+    """
+    Python counterpart of FTS5 snippet(): the SNIPPET_TOKENS-word window
+    of texts (columns) with the most matching words, matches wrapped in
+    SNIPPET_OPEN/SNIPPET_CLOSE and "…" where the text is cut.
+    """
+    def matches(token: str) -> bool:
+        folded = _fold(token)
+        return any(folded.startswith(w) if prefix else folded == w for w, prefix in terms)
+
+    best = None
+    for text in texts:
+        tokens = list(_WORD.finditer(text))
+        hits = [i for i, token in enumerate(tokens) if matches(token.group())]
+        starts = [max(0, min(h - 2, len(tokens) - SNIPPET_TOKENS)) for h in hits] or [0]
+        for start in starts:
+            count = sum(1 for h in hits if start <= h < start + SNIPPET_TOKENS)
+            if best is None or count > best[0]:
+                best = (count, text, tokens, set(hits), start)
+
+    _, text, tokens, hits, start = best
+    if not tokens:
+        return text
+    end = min(start + SNIPPET_TOKENS, len(tokens))
+
+    parts = ["…" if start > 0 else ""]
+    position = tokens[start].start() if start > 0 else 0
+    for i in range(start, end):
+        token = tokens[i]
+        parts.append(text[position:token.start()])
+        if i in hits:
+            parts.append(SNIPPET_OPEN + token.group() + SNIPPET_CLOSE)
+        else:
+            parts.append(token.group())
+        position = token.end()
+    parts.append(text[position:] if end == len(tokens) else "…")
+    return "".join(parts)
+
+
+def get_list_version(
+    status: Optional[str] = None,
+    specs: Optional[Dict] = None,
+    missing: Optional[List[int]] = None
+) -> tuple:
+    """
+    Cheap change marker for the ticket list: (ticket count, highest
+    version). Any write to a listed ticket raises the version, and
+    deletions change the count.
+
+    Args:
+        status: Optional status filter, matching get_ticket_summaries
+        specs: Optional spec filters, matching get_ticket_summaries
+        missing: Optional missing_mask values, matching get_ticket_summaries
+
+    Returns:
+        (count, max_version) tuple
+    """
+    client = get_db_client()
+    conditions, params = _list_conditions(status, specs, missing)
+
+    sql = "SELECT COUNT(*), COALESCE(MAX(t.version), 0) FROM tickets t"
+    if _has_spec_filters(specs):
+        sql += " JOIN extracted_data e ON e.ticket_id = t.id"
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    result = client.execute(sql, params)
+
+    row = result.rows[0]
+    return row[0], row[1]
+
+
+def get_missing_field_counts(status: Optional[str] = None) -> Dict:
+    """
+    Completeness breakdown: tickets grouped by their exact set of missing
+    required fields, plus per-field totals. One GROUP BY over the
+    missing_mask index.
+
+    Args:
+        status: Optional status filter
+
+    Returns:
+        Dict shaped like MissingFieldCounts
+    """
+    client = get_db_client()
+
+    sql = "SELECT missing_mask, COUNT(*) FROM tickets WHERE missing_mask IS NOT NULL"
+    params = []
+    if status:
+        sql += " AND status = ?"
+        params.append(status)
+    sql += " GROUP BY missing_mask"
+    result = client.execute(sql, params)
+
+    field_counts = dict.fromkeys(REQUIRED_FIELDS, 0)
+    groups = []
+    for mask, count in result.rows:
+        missing = mask_to_fields(mask)
+        for field in missing:
+            field_counts[field] += count
+        groups.append({"missing_mask": mask, "missing": missing, "count": count})
+    groups.sort(key=lambda group: (-group["count"], group["missing_mask"]))
+
+    return {
+        "total": sum(group["count"] for group in groups),
+        "complete": next((g["count"] for g in groups if g["missing_mask"] == 0), 0),
+        "fields": field_counts,
+        "groups": groups,
+    }
+
+
+def get_ticket_version(ticket_id: int) -> Optional[int]:
+    """
+    Current version of a ticket (changes on any write to the ticket, its
+    extracted data or its email thread).
+
+    Returns:
+        Version number or None if the ticket does not exist
+    """
+    client = get_db_client()
+
+    result = client.execute("SELECT version FROM tickets WHERE id = ?", [ticket_id])
+    return result.rows[0][0] if result.rows else None
+
+
+def _summary_rows(fields: List[str], rows) -> List[Dict]:
+    """Map summary rows to dicts, parsing timestamp columns."""
+    timestamp_indexes = [i for i, f in enumerate(fields) if f in _TIMESTAMP_FIELDS]
+    summaries = []
+    for row in rows:
+        values = list(row)
+        for i in timestamp_indexes:
+            values[i] = _parse_timestamp(values[i])
+        summaries.append(dict(zip(fields, values)))
+    return summaries
+
+
+def _change_statement(
+    event_type: str,
+    ticket_id: Optional[int] = None,
+    ticket_number: Optional[str] = None,
+    fields: Optional[List[str]] = None
+) -> tuple:
+    """
+    Statement appending a ticket_events row. Put it last in the batch
+    with the writes it describes, so both commit together and the row
+    records the ticket's status and version after them.
+
+    Args:
+        event_type: created, reply_received, updated or followup_sent
+        ticket_id: Ticket ID (or ticket_number for a ticket created in the same batch)
+        ticket_number: Ticket number
+        fields: Fields written, for updates
+
+    Returns:
+        (sql, args) tuple for client.batch
+    """
+    column, value = ("id", ticket_id) if ticket_number is None else ("ticket_number", ticket_number)
+    return (
+        "INSERT INTO ticket_events (ticket_id, event_type, status, version, fields) "
+        f"SELECT id, ?, status, version, ? FROM tickets WHERE {column} = ?",
+        [event_type, ",".join(fields) if fields else None, value]
+    )
 
-    return tickets
 
+def get_changes(since: int = 0, limit: int = 500) -> Dict:
+    """
+    Page through the change log in commit order.
+
+    Args:
+        since: Return changes with seq greater than this
+        limit: Maximum number of changes
 
-def get_ticket_by_id(ticket_id: int) -> Optional[Ticket]:
+    Returns:
+        Dict with changes, next_since (pass back as since) and has_more
     """
-    Get a single ticket by ID with all related data.
+    client = get_db_client()
+
+    result = client.execute(
+        """
+        SELECT seq, ticket_id, event_type, status, version, fields, created_at
+        FROM ticket_events
+        WHERE seq > ?
+        ORDER BY seq
+        LIMIT ?
+        """,
+        [since, limit + 1]
+    )
+
+    rows = result.rows[:limit]
+    changes = [
+        {
+            "seq": row[0],
+            "ticket_id": row[1],
+            "event_type": row[2],
+            "status": row[3],
+            "version": row[4],
+            "fields": row[5].split(",") if row[5] else [],
+            "created_at": _parse_timestamp(row[6]),
+        }
+        for row in rows
+    ]
+    return {
+        "changes": changes,
+        "next_since": changes[-1]["seq"] if changes else since,
+        "has_more": len(result.rows) > limit,
+    }
+
+
+def _publish_change(event_type: str, ticket: Optional[Ticket], seq: Optional[int] = None) -> None:
+    """
+    Send a changed ticket's list summary to GET /tickets/stream clients.
+    seq is the change log entry, so clients can resume from
+    GET /tickets/changes after a reset.
+    """
+    if ticket is None:
+        return
+
+    extracted = ticket.extracted_data
+    try:
+        ticket_events.publish(event_type, {
+            "seq": seq,
+            "ticket": {
+                "id": ticket.id,
+                "ticket_number": ticket.ticket_number,
+                "customer_name": ticket.customer_name,
+                "customer_email": ticket.customer_email,
+                "status": ticket.status,
+                "created_at": ticket.created_at,
+                "updated_at": ticket.updated_at,
+                "laptop_model": extracted.laptop_model if extracted else None,
+                "quantity": extracted.quantity if extracted else None,
+            }
+        })
+    except Exception as e:
+        # The write already happened; clients catch up on their next reload
+        print(f"[ERROR] Failed to publish {event_type} for ticket {ticket.id}: {e}")
+
+
+def get_ticket_by_id(ticket_id: int, include_threads: bool = False) -> Optional[Ticket]:
+    """
+    Get a single ticket by ID with its extracted data, in one query.
+
+    The email thread can be long (large HTML bodies), so it is left out
+    (email_threads = None) unless asked for; the API pages through it
+    with get_thread_page and get_thread instead. An archived thread is
+    restored, since the ticket is being worked on again.
 
     Args:
         ticket_id: Ticket ID
+        include_threads: Also load every email with its full body
 
     Returns:
         Ticket object or None if not found
@@ -358,10 +981,13 @@ def get_ticket_by_id(ticket_id: int) -> Optional[Ticket]:
 
     result = client.execute(
         """
-        SELECT id, ticket_number, customer_name, customer_email,
-               status, created_at, updated_at
-        FROM tickets
-        WHERE id = ?
+        SELECT t.id, t.ticket_number, t.customer_name, t.customer_email,
+               t.status, t.created_at, t.updated_at, t.archived_at,
+               e.id, e.laptop_model, e.ram, e.storage, e.screen_size, e.warranty,
+               e.quantity, e.delivery_location, e.delivery_timeline, e.budget
+        FROM tickets t
+        LEFT JOIN extracted_data e ON e.ticket_id = t.id
+        WHERE t.id = ?
         """,
         [ticket_id]
     )
@@ -370,21 +996,15 @@ def get_ticket_by_id(ticket_id: int) -> Optional[Ticket]:
         return None
 
     row = result.rows[0]
-    ticket = Ticket(
-        id=row[0],
-        ticket_number=row[1],
-        customer_name=row[2],
-        customer_email=row[3],
-        status=TicketStatus(row[4]),
-        created_at=row[5],
-        updated_at=row[6]
-    )
+    if row[7] is not None:
+        restore_ticket(ticket_id)
 
-    # Load extracted data
-    ticket.extracted_data = _get_extracted_data(ticket.id)
+    ticket = _row_to_ticket(row[:7])
+    if row[8] is not None:
+        ticket.extracted_data = _row_to_extracted_data(row[9:])
 
-    # Load email threads
-    ticket.email_threads = _get_email_threads(ticket.id)
+    if include_threads:
+        ticket.email_threads = _get_email_threads(ticket.id)
 
     return ticket
 
@@ -403,106 +1023,302 @@ def update_ticket(ticket_id: int, update_data: TicketUpdate) -> Optional[Ticket]
 
     client = get_db_client()
 
+    statements = []
+    changed_fields = []
+
     # Update tickets table
     if update_data.customer_name is not None:
-        client.execute(
+        statements.append((
             "UPDATE tickets SET customer_name = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
             [update_data.customer_name, ticket_id]
-        )
+        ))
+        changed_fields.append("customer_name")
 
     if update_data.customer_email is not None:
-        client.execute(
+        statements.append((
             "UPDATE tickets SET customer_email = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
             [update_data.customer_email, ticket_id]
-        )
+        ))
+        changed_fields.append("customer_email")
 
     if update_data.status is not None:
-        client.execute(
-            "UPDATE tickets SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+        statements.append((
+            "UPDATE tickets SET status = ?, reminders_sent = 0, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
             [update_data.status.value, ticket_id]
-        )
+        ))
+        statements.append((_CANCEL_REMINDERS, [ticket_id]))
+        changed_fields.append("status")
 
     # Update extracted data if provided
     if update_data.extracted_data is not None:
         ed = update_data.extracted_data
-        client.execute(
-            """
-            UPDATE extracted_data
-            SET laptop_model = ?, ram = ?, storage = ?, screen_size = ?,
-                warranty = ?, quantity = ?, delivery_location = ?,
-                delivery_timeline = ?, budget = ?
-            WHERE ticket_id = ?
-            """,
+        created = client.execute("SELECT created_at FROM tickets WHERE id = ?", [ticket_id])
+        reference = reference_date(created.rows[0][0] if created.rows else None)
+        statements.append((
+            _UPDATE_EXTRACTED_DATA,
             [
                 ed.laptop_model, ed.ram, ed.storage, ed.screen_size,
                 ed.warranty, ed.quantity, ed.delivery_location,
-                ed.delivery_timeline, ed.budget, ticket_id
+                ed.delivery_timeline, ed.budget,
+                *spec_values(ed, reference), ticket_id
             ]
-        )
+        ))
+        statements.append((
+            "UPDATE tickets SET missing_mask = ? WHERE id = ?",
+            [ed.get_missing_mask(), ticket_id]
+        ))
+        changed_fields.append("extracted_data")
 
-    return get_ticket_by_id(ticket_id)
+    seq = None
+    if statements:
+        statements.append(_change_statement("updated", ticket_id, fields=changed_fields))
+        results = client.batch(statements)
+        seq = results[-1].last_insert_rowid if results[-1].rows_affected else None
+
+    ticket = get_ticket_by_id(ticket_id)
+    if seq is not None:
+        _publish_change("ticket.updated", ticket, seq)
+    return ticket
+
+
+# Thread columns as _row_to_thread expects them: bodies in blobs come
+# with the blob columns, legacy rows keep their text in email_body
+_THREAD_COLUMNS = """
+    th.id, th.ticket_id, th.email_subject, th.email_body, th.direction,
+    th.email_message_id, th.in_reply_to, th.timestamp, b.codec, b.dictionary_id, b.data
+"""
+_THREAD_BLOBS = "LEFT JOIN blobs b ON b.hash = th.body_hash"
 
 
-def _get_extracted_data(ticket_id: int) -> Optional[ExtractedData]:
-    """Helper to get extracted data for a ticket."""
+def _get_email_threads(ticket_id: int) -> List[EmailThread]:
+    """Helper to get email threads for a ticket."""
     client = get_db_client()
 
     result = client.execute(
-        """
-        SELECT laptop_model, ram, storage, screen_size, warranty,
-               quantity, delivery_location, delivery_timeline, budget
-        FROM extracted_data
-        WHERE ticket_id = ?
+        f"""
+        SELECT {_THREAD_COLUMNS}
+        FROM email_threads th {_THREAD_BLOBS}
+        WHERE th.ticket_id = ?
+        ORDER BY th.timestamp ASC
         """,
         [ticket_id]
     )
 
-    if not result.rows:
-        return None
-
-    row = result.rows[0]
-    return ExtractedData(
-        laptop_model=row[0],
-        ram=row[1],
-        storage=row[2],
-        screen_size=row[3],
-        warranty=row[4],
-        quantity=row[5],
-        delivery_location=row[6],
-        delivery_timeline=row[7],
-        budget=row[8]
-    )
+    return [_row_to_thread(row) for row in result.rows]
 
 
-def _get_email_threads(ticket_id: int) -> List[EmailThread]:
-    """Helper to get email threads for a ticket."""
+def _get_inbound_bodies(ticket_id: int) -> List[str]:
+    """Bodies of a ticket's inbound emails, oldest first (for re-extraction)."""
     client = get_db_client()
 
     result = client.execute(
-        """
-        SELECT id, ticket_id, email_subject, email_body, direction,
-               email_message_id, in_reply_to, timestamp
-        FROM email_threads
-        WHERE ticket_id = ?
-        ORDER BY timestamp ASC
+        f"""
+        SELECT th.email_body, b.codec, b.dictionary_id, b.data
+        FROM email_threads th {_THREAD_BLOBS}
+        WHERE th.ticket_id = ? AND th.direction = 'inbound'
+        ORDER BY th.timestamp ASC
         """,
         [ticket_id]
     )
 
+    return [blob_store.decode_body(*row) for row in result.rows]
+
+
+_STYLE_OR_SCRIPT = re.compile(r"<(style|script)\b.*?(</\1\s*>|$)", re.IGNORECASE | re.DOTALL)
+_HTML_TAG = re.compile(r"<[a-zA-Z!/][^>]*>?")  # unclosed at the end = cut-off tag
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _plain_text(body: str) -> str:
+    """Email body (or its start) as one line of text: tags dropped, whitespace collapsed."""
+    if _HTML_TAG.search(body):
+        body = html.unescape(_HTML_TAG.sub(" ", _STYLE_OR_SCRIPT.sub(" ", body)))
+    return _WHITESPACE.sub(" ", body).strip()
+
+
+def get_thread_page(
+    ticket_id: int,
+    cursor: Optional[int] = None,
+    limit: int = 20,
+    newest_first: bool = False
+) -> Dict:
+    """
+    One page of a ticket's email thread, as previews: the first
+    settings.thread_preview_chars characters of each body (as plain
+    text) and its size, without transferring whole bodies. An archived
+    thread is restored when its first page is requested.
+
+    Args:
+        ticket_id: Ticket ID
+        cursor: next_cursor of the previous page (None for the first page)
+        limit: Emails per page
+        newest_first: Page from the latest email backwards
+
+    Returns:
+        Dict shaped like EmailThreadPage
+    """
+    client = get_db_client()
+    preview_chars = settings.thread_preview_chars
+
+    # Room for markup: HTML bodies shrink once tags are dropped
+    head_chars = preview_chars * 4
+
+    sql = f"""
+        SELECT th.id, th.ticket_id, th.email_subject, th.direction, th.email_message_id,
+               th.in_reply_to, th.timestamp, substr(th.email_body, 1, ?),
+               length(th.email_body), length(CAST(th.email_body AS BLOB)),
+               b.codec, b.dictionary_id, b.data, b.size
+        FROM email_threads th {_THREAD_BLOBS}
+        WHERE th.ticket_id = ?
+    """
+    params = [head_chars, ticket_id]
+    if cursor is not None:
+        sql += " AND th.id < ?" if newest_first else " AND th.id > ?"
+        params.append(cursor)
+    sql += f" ORDER BY th.id {'DESC' if newest_first else 'ASC'} LIMIT ?"
+    params.append(limit + 1)
+
+    result = client.execute(sql, params)
+    if not result.rows and cursor is None and restore_ticket(ticket_id):
+        result = client.execute(sql, params)
+    rows = result.rows[:limit]
+
     threads = []
-    for row in result.rows:
-        threads.append(EmailThread(
-            id=row[0],
-            ticket_id=row[1],
-            email_subject=row[2],
-            email_body=row[3],
-            direction=row[4],
-            email_message_id=row[5],
-            in_reply_to=row[6],
-            timestamp=row[7]
-        ))
+    for row in rows:
+        if row[10] is None:
+            head, body_chars, body_size = row[7] or "", row[8] or 0, row[9] or 0
+        else:
+            # Only the start of the blob is decompressed
+            head, complete = blob_store.decode_head(row[10], row[11], row[12], head_chars)
+            body_size = row[13]
+            body_chars = len(head) + (0 if complete else 1)
+        text = _plain_text(head)
+        threads.append({
+            "id": row[0],
+            "ticket_id": row[1],
+            "email_subject": row[2],
+            "direction": row[3],
+            "email_message_id": row[4],
+            "in_reply_to": row[5],
+            "timestamp": _parse_timestamp(row[6]),
+            "preview": text[:preview_chars],
+            "body_size": body_size,
+            "truncated": body_chars > len(head) or len(text) > preview_chars,
+        })
+
+    has_more = len(result.rows) > limit
+    return {
+        "threads": threads,
+        "next_cursor": rows[-1][0] if has_more else None,
+        "has_more": has_more,
+    }
+
+
+def thread_exists(ticket_id: int, thread_id: int) -> bool:
+    """
+    Whether a ticket has the given email, without loading its body (for
+    revalidating a cached copy). An archived email counts as missing.
+    """
+    client = get_db_client()
+
+    result = client.execute(
+        "SELECT 1 FROM email_threads WHERE id = ? AND ticket_id = ?",
+        [thread_id, ticket_id]
+    )
+    return bool(result.rows)
 
-    return threads
+
+def get_thread(ticket_id: int, thread_id: int) -> Optional[EmailThread]:
+    """
+    One email of a ticket's thread with its full body.
+
+    Returns:
+        EmailThread or None if the ticket has no such email
+    """
+    client = get_db_client()
+
+    result = client.execute(
+        f"""
+        SELECT {_THREAD_COLUMNS}
+        FROM email_threads th {_THREAD_BLOBS}
+        WHERE th.id = ? AND th.ticket_id = ?
+        """,
+        [thread_id, ticket_id]
+    )
+    if not result.rows and restore_ticket(ticket_id):
+        return get_thread(ticket_id, thread_id)
+
+    return _row_to_thread(result.rows[0]) if result.rows else None
+
+
+# Rows below come from our own tables, so they are mapped without
+# per-field validation (construct_trusted); only the conversions the
+# validators would have done (timestamps, status enum) are kept.
+
+def _parse_timestamp(value):
+    """SQLite timestamp text -> datetime (left as-is if unparseable)."""
+    if value is None or isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def _row_to_ticket(row) -> Ticket:
+    """
+    Build a Ticket from a row of
+    (id, ticket_number, customer_name, customer_email, status, created_at, updated_at).
+    """
+    return construct_trusted(Ticket, {
+        "id": row[0],
+        "ticket_number": row[1],
+        "customer_name": row[2],
+        "customer_email": row[3],
+        "status": TicketStatus(row[4]),
+        "created_at": _parse_timestamp(row[5]),
+        "updated_at": _parse_timestamp(row[6]),
+        "extracted_data": None,
+        "email_threads": None
+    })
+
+
+def _row_to_extracted_data(row) -> ExtractedData:
+    """
+    Build ExtractedData from a row of (laptop_model, ram, storage, screen_size,
+    warranty, quantity, delivery_location, delivery_timeline, budget).
+    """
+    return construct_trusted(ExtractedData, {
+        "customer_name": None,
+        "customer_email": None,
+        "laptop_model": row[0],
+        "ram": row[1],
+        "storage": row[2],
+        "screen_size": row[3],
+        "warranty": row[4],
+        "quantity": row[5],
+        "delivery_location": row[6],
+        "delivery_timeline": row[7],
+        "budget": row[8]
+    })
+
+
+def _row_to_thread(row) -> EmailThread:
+    """
+    Build an EmailThread from a row of (id, ticket_id, email_subject, email_body,
+    direction, email_message_id, in_reply_to, timestamp), optionally followed
+    by the blob columns (codec, dictionary_id, data) of a body stored in blobs.
+    """
+    return construct_trusted(EmailThread, {
+        "id": row[0],
+        "ticket_id": row[1],
+        "email_subject": row[2],
+        "email_body": blob_store.decode_body(row[3], row[8], row[9], row[10]) if len(row) > 8 else row[3],
+        "direction": row[4],
+        "email_message_id": row[5],
+        "in_reply_to": row[6],
+        "timestamp": _parse_timestamp(row[7])
+    })
 
 
 def send_manual_followup(ticket_id: int, subject: str, body: str) -> Dict:
@@ -518,7 +1334,6 @@ def send_manual_followup(ticket_id: int, subject: str, body: str) -> Dict:
         Dict with status
     """
 
-    client = get_db_client()
     ticket = get_ticket_by_id(ticket_id)
 
     if not ticket:
@@ -531,15 +1346,32 @@ def send_manual_followup(ticket_id: int, subject: str, body: str) -> Dict:
         body=body
     )
 
-    # Store in email thread
-    client.execute(
-        """
-        INSERT INTO email_threads (
-            ticket_id, email_subject, email_body, direction, email_message_id
-        )
-        VALUES (?, ?, ?, ?, ?)
-        """,
-        [ticket_id, subject, body, "outbound", email_result.get("message_id")]
-    )
-
+    record_followup(ticket, subject, body, email_result.get("message_id"))
     return email_result
+
+
+def record_followup(
+    ticket: Ticket,
+    subject: str,
+    body: str,
+    message_id: Optional[str],
+    statements: Optional[List] = None
+) -> None:
+    """
+    Store a sent follow-up in the ticket's thread and publish the change.
+
+    Args:
+        ticket: The ticket it was sent for
+        subject: Email subject
+        body: Email body
+        message_id: Message ID returned by the email service
+        statements: Other writes to commit in the same transaction
+    """
+
+    results = get_db_client().batch([
+        *(statements or []),
+        *_thread_insert_statements("?", [ticket.id], subject, body, "outbound", message_id),
+        _change_statement("followup_sent", ticket.id),
+    ])
+
+    _publish_change("ticket.updated", ticket, results[-1].last_insert_rowid)
@@ -0,0 +1,160 @@
+"""
+Dashboard statistics from the ticket rollup tables.
+
+ticket_status_counts, ticket_stats_daily and ticket_ready_times are
+kept current by triggers (app.database.STATS_TRIGGERS), so reading
+stats costs a few small indexed reads no matter how many tickets and
+emails there are. If the rollups ever drift (e.g. rows edited by hand),
+rebuild them from the base tables.
+
+Usage (from backend/):
+    python -m app.services.ticket_stats   # rebuild the rollups
+"""
+
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from app.database import READY_TIME_BUCKETS, STATS_REBUILD_STATEMENTS, get_db_client
+from app.models.ticket import TicketStatus
+
+PERCENTILES = (50, 90, 95)
+
+
+def get_ticket_stats(days: int = 30) -> Dict:
+    """
+    Ticket statistics: counts per status, daily activity for the last
+    `days` days, time-to-READY percentiles and follow-ups per ticket.
+
+    Args:
+        days: Number of days of daily activity (today included)
+
+    Returns:
+        Dict shaped like TicketStats
+    """
+    client = get_db_client()
+    first_day = datetime.now(timezone.utc).date() - timedelta(days=days - 1)
+
+    # One round trip, one consistent snapshot
+    status_result, daily_result, totals_result, ready_result = client.batch([
+        "SELECT status, count FROM ticket_status_counts",
+        (
+            """
+            SELECT day, created, ready, ready_seconds, followups_sent, inbound_emails
+            FROM ticket_stats_daily WHERE day >= ? ORDER BY day
+            """,
+            [first_day.isoformat()]
+        ),
+        "SELECT COALESCE(SUM(created), 0), COALESCE(SUM(followups_sent), 0) FROM ticket_stats_daily",
+        "SELECT bucket, count, seconds FROM ticket_ready_times ORDER BY bucket",
+    ])
+
+    status_counts = {status.value: 0 for status in TicketStatus}
+    for status, count in status_result.rows:
+        if count:
+            status_counts[status] = count
+
+    daily = _daily_series(first_day, days, daily_result.rows)
+
+    created_total, followups_total = totals_result.rows[0]
+
+    return {
+        "total": sum(status_counts.values()),
+        "status_counts": status_counts,
+        "daily": daily,
+        "time_to_ready": _time_to_ready(ready_result.rows),
+        "followups_per_ticket": round(followups_total / created_total, 2) if created_total else None,
+    }
+
+
+def _daily_series(first_day: date, days: int, rows) -> List[Dict]:
+    """One entry per day from first_day, zeros for days without activity."""
+    by_day = {row[0]: row for row in rows}
+    series = []
+    for offset in range(days):
+        day = (first_day + timedelta(days=offset)).isoformat()
+        row = by_day.get(day)
+        if row is None:
+            series.append({
+                "day": day, "created": 0, "ready": 0, "avg_seconds_to_ready": None,
+                "followups_sent": 0, "inbound_emails": 0,
+            })
+            continue
+        _, created, ready, ready_seconds, followups_sent, inbound_emails = row
+        series.append({
+            "day": day,
+            "created": created,
+            "ready": ready,
+            "avg_seconds_to_ready": round(ready_seconds / ready) if ready else None,
+            "followups_sent": followups_sent,
+            "inbound_emails": inbound_emails,
+        })
+    return series
+
+
+def _time_to_ready(rows) -> Dict:
+    """
+    Summary of the time-to-READY histogram. Percentiles are the upper
+    bound of the bucket they fall in (None past the last bound).
+    """
+    counts = [0] * (len(READY_TIME_BUCKETS) + 1)
+    total_seconds = 0.0
+    for bucket, count, seconds in rows:
+        counts[bucket] += count
+        total_seconds += seconds
+    total = sum(counts)
+
+    percentiles: Dict[str, Optional[float]] = {}
+    for p in PERCENTILES:
+        percentiles[f"p{p}_seconds"] = _bucket_percentile(counts, total, p) if total else None
+
+    return {
+        "count": total,
+        "mean_seconds": round(total_seconds / total) if total else None,
+        **percentiles,
+        "histogram": [
+            {
+                "le_seconds": READY_TIME_BUCKETS[i] if i < len(READY_TIME_BUCKETS) else None,
+                "count": count,
+            }
+            for i, count in enumerate(counts)
+        ],
+    }
+
+
+def _bucket_percentile(counts: List[int], total: int, p: int) -> Optional[float]:
+    rank = total * p / 100
+    cumulative = 0
+    for i, count in enumerate(counts):
+        cumulative += count
+        if cumulative >= rank and count:
+            return READY_TIME_BUCKETS[i] if i < len(READY_TIME_BUCKETS) else None
+    return None
+
+
+def rebuild_ticket_stats() -> Dict[str, int]:
+    """
+    Recompute every rollup from tickets, email_threads and ticket_events
+    in one transaction (a full scan, for repairs only).
+
+    Returns:
+        Status counts after the rebuild
+    """
+    client = get_db_client()
+    client.batch(STATS_REBUILD_STATEMENTS)
+    result = client.execute("SELECT status, count FROM ticket_status_counts ORDER BY status")
+    return {status: count for status, count in result.rows}
+
+
+if __name__ == "__main__":
+    from app.database import close_db_clients, initialize_database
+
+    initialize_database()
+    try:
+        before = get_ticket_stats(days=1)
+        counts = rebuild_ticket_stats()
+        after = get_ticket_stats(days=1)
+        print(f"[STATS] Rebuilt ticket stats: {counts}")
+        if before["status_counts"] != after["status_counts"] or before["time_to_ready"] != after["time_to_ready"]:
+            print(f"[STATS] Repaired drift (status counts were {before['status_counts']})")
+    finally:
+        close_db_clients()
@@ -0,0 +1,229 @@
+"""
+Admission control and load shedding for the email ingestion endpoints.
+
+Every inbound email fans out into Claude calls and several database
+writes, so a mailbox flood can tie up the worker threads that also serve
+the dashboard. Each ingestion route gets a fixed number of concurrent
+slots plus a bounded wait queue; anything beyond that is rejected with
+429/503 and a Retry-After header so senders (Resend retries webhooks)
+back off instead of piling up.
+"""
+
+import asyncio
+import json
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Optional, Tuple
+
+from app.config import settings
+from app.utils.metrics import CallbackMetric
+
+
+@dataclass(frozen=True)
+class RouteLimit:
+    """Concurrency and queue limits for a single route."""
+    max_concurrency: int
+    max_queue: int
+    queue_timeout: float
+
+
+class RouteGate:
+    """
+    Concurrency gate for one route.
+
+    Slots are handed directly from a finishing request to the oldest
+    waiter, so queued requests are admitted in arrival order. Waiters
+    are plain futures created on the running loop, which keeps the gate
+    usable across event loops (e.g. test clients).
+    """
+
+    def __init__(self, limit: RouteLimit):
+        self.limit = limit
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> Optional[int]:
+        """
+        Wait for a slot.
+
+        Returns:
+            None when admitted, otherwise the HTTP status to reject with
+            (429 when the queue is full, 503 when the wait timed out).
+        """
+        if self.in_flight < self.limit.max_concurrency and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return None
+
+        if len(self._waiters) >= self.limit.max_queue:
+            self.rejected_queue_full += 1
+            return 429
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout=self.limit.queue_timeout)
+        except asyncio.TimeoutError:
+            self._discard(waiter)
+            self.rejected_timeout += 1
+            return 503
+        except asyncio.CancelledError:
+            # Client went away while queued; give back a slot we may
+            # have been handed in the meantime
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            else:
+                self._discard(waiter)
+            raise
+
+        # The releasing request transferred its slot to us
+        self.admitted += 1
+        return None
+
+    def release(self) -> None:
+        """Release a slot, handing it to the oldest live waiter if any."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def _discard(self, waiter: asyncio.Future) -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def snapshot(self) -> Dict:
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "max_concurrency": self.limit.max_concurrency,
+            "max_queue": self.limit.max_queue,
+            "admitted": self.admitted,
+            "rejected": self.rejected_queue_full + self.rejected_timeout,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_timeout": self.rejected_timeout,
+        }
+
+
+class AdmissionController:
+    """Registry of route gates keyed by (method, path)."""
+
+    def __init__(self, retry_after: int):
+        self.retry_after = retry_after
+        self._gates: Dict[Tuple[str, str], RouteGate] = {}
+
+    def limit(self, method: str, path: str, limit: RouteLimit) -> None:
+        """Register limits for a route."""
+        self._gates[(method.upper(), path)] = RouteGate(limit)
+
+    def gate_for(self, method: str, path: str) -> Optional[RouteGate]:
+        return self._gates.get((method, path))
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Current in-flight, queued and rejected counts per route."""
+        return {
+            f"{method} {path}": gate.snapshot()
+            for (method, path), gate in self._gates.items()
+        }
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware enforcing the controller's limits.
+
+    Requests to routes without registered limits pass straight through,
+    so read endpoints such as GET /tickets/ are never queued behind
+    ingestion work.
+    """
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        gate = self.controller.gate_for(scope["method"], scope["path"])
+        if gate is None:
+            await self.app(scope, receive, send)
+            return
+
+        rejection = await gate.acquire()
+        if rejection is not None:
+            await self._reject(send, rejection)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gate.release()
+
+    async def _reject(self, send, status_code: int) -> None:
+        if status_code == 429:
+            detail = "Too many emails queued for processing, retry later"
+        else:
+            detail = "Email processing is overloaded, retry later"
+
+        body = json.dumps({"detail": detail}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+                (b"retry-after", str(self.controller.retry_after).encode("latin-1")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+# Routes that trigger extraction + follow-up work for every request
+INGESTION_ROUTES = [
+    ("POST", "/webhooks/resend"),
+    ("POST", "/dev/receive-email"),
+]
+
+# Create singleton instance
+admission_controller = AdmissionController(retry_after=settings.ingest_retry_after)
+
+for _method, _path in INGESTION_ROUTES:
+    admission_controller.limit(_method, _path, RouteLimit(
+        max_concurrency=settings.ingest_max_concurrency,
+        max_queue=settings.ingest_max_queue,
+        queue_timeout=settings.ingest_queue_timeout,
+    ))
+
+
+def _gate_stat(field: str):
+    def collect() -> Dict[Tuple[str, ...], int]:
+        return {
+            tuple(route.split(" ", 1)): stats[field]
+            for route, stats in admission_controller.snapshot().items()
+        }
+    return collect
+
+
+CallbackMetric(
+    "ingest_in_flight_requests", "Ingestion requests currently being processed.",
+    _gate_stat("in_flight"), labelnames=("method", "route"),
+)
+CallbackMetric(
+    "ingest_queue_depth", "Ingestion requests waiting for a processing slot.",
+    _gate_stat("queued"), labelnames=("method", "route"),
+)
+CallbackMetric(
+    "ingest_rejected_total", "Ingestion requests shed with 429/503.",
+    _gate_stat("rejected"), labelnames=("method", "route"), metric_type="counter",
+)
@@ -0,0 +1,60 @@
+"""
+Encoders for streamed exports.
+
+Each encoder turns an iterator of row chunks into an iterator of byte
+chunks, so a StreamingResponse only ever holds one chunk in memory.
+"""
+
+import csv
+import io
+import zlib
+from typing import Iterable, Iterator, List, Optional, Sequence
+
+import orjson
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",  # starlette appends "; charset=utf-8"
+}
+
+
+def ndjson_chunks(fields: Sequence[str], chunks: Iterable[List[tuple]]) -> Iterator[bytes]:
+    """One JSON object per line."""
+    for rows in chunks:
+        yield b"".join(orjson.dumps(dict(zip(fields, row))) + b"\n" for row in rows)
+
+
+def csv_chunks(fields: Sequence[str], chunks: Iterable[List[tuple]]) -> Iterator[bytes]:
+    """Header line, then one CSV record per row (NULL as empty)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(fields)
+    for rows in chunks:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+
+    # No rows at all: still send the header
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Gzip a byte stream on the fly."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31 = gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """Check whether an Accept-Encoding header allows gzip."""
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if coding.strip().lower() in ("gzip", "*"):
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
@@ -0,0 +1,340 @@
+"""
+Minimal Prometheus metrics: counters, histograms and callback gauges
+rendered in the text exposition format.
+
+Hot-path updates are lock-free: every thread writes into its own shard
+(a plain dict reached through threading.local), and shards are only
+summed when /metrics is scraped. The one lock is taken the first time a
+thread touches a metric, to register its shard. Shards of threads that
+have exited (threadpool workers are retired when idle) are folded into
+one base shard, so their number follows the live threads.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.utils.startup import startup_timer
+
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# Seconds; covers fast DB reads up to slow Claude generations
+DEFAULT_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+LabelValues = Tuple[str, ...]
+
+
+class Registry:
+    """Ordered collection of metrics to render."""
+
+    def __init__(self):
+        self._metrics: List = []
+        self._lock = threading.Lock()
+
+    def register(self, metric) -> None:
+        with self._lock:
+            self._metrics.append(metric)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics)
+
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _ShardedMetric:
+    """Base class holding one dict shard per writing thread."""
+
+    metric_type = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        registry: Optional[Registry] = REGISTRY
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[Tuple[threading.Thread, Dict]] = []
+        # Totals of the shards of exited threads
+        self._retired: Dict = {}
+        self._shards_lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+
+    def _shard(self) -> Dict:
+        try:
+            return self._local.values
+        except AttributeError:
+            values: Dict = {}
+            with self._shards_lock:
+                self._fold_exited_shards()
+                self._shards.append((threading.current_thread(), values))
+            self._local.values = values
+            return values
+
+    def _snapshot_shards(self) -> List[List]:
+        with self._shards_lock:
+            self._fold_exited_shards()
+            shards = [shard for _, shard in self._shards]
+            retired = list(self._retired.items())
+        # dict.items() -> list is atomic under the GIL, so the owning
+        # thread can keep writing while we copy
+        return [retired] + [list(shard.items()) for shard in shards]
+
+    def _fold_exited_shards(self) -> None:
+        """Merge the shards of exited threads into _retired (lock held)."""
+        live = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+                continue
+            # Nobody writes to it any more; _combine builds new values, so
+            # a snapshot of _retired is never changed under its reader
+            for labels, value in shard.items():
+                previous = self._retired.get(labels)
+                self._retired[labels] = value if previous is None else self._combine(previous, value)
+        self._shards = live
+
+    def _combine(self, a, b):
+        return a + b
+
+    def _header(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.metric_type}",
+        ]
+
+
+class Counter(_ShardedMetric):
+    """Monotonically increasing counter."""
+
+    metric_type = "counter"
+
+    def inc(self, labels: LabelValues = (), amount: float = 1) -> None:
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def values(self) -> Dict[LabelValues, float]:
+        totals: Dict[LabelValues, float] = {}
+        for items in self._snapshot_shards():
+            for labels, value in items:
+                totals[labels] = totals.get(labels, 0) + value
+        return totals
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        for labels, value in sorted(self.values().items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_ShardedMetric):
+    """Histogram with fixed upper bounds (seconds by convention)."""
+
+    metric_type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        registry: Optional[Registry] = REGISTRY
+    ):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, labels: LabelValues, value: float) -> None:
+        shard = self._shard()
+        state = shard.get(labels)
+        if state is None:
+            # per-bucket counts (last slot is +Inf), then sum
+            state = [0] * (len(self.buckets) + 1) + [0.0]
+            shard[labels] = state
+        state[bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    def _combine(self, a: List[float], b: List[float]) -> List[float]:
+        return [x + y for x, y in zip(a, b)]
+
+    def values(self) -> Dict[LabelValues, List[float]]:
+        totals: Dict[LabelValues, List[float]] = {}
+        for items in self._snapshot_shards():
+            for labels, state in items:
+                merged = totals.get(labels)
+                if merged is None:
+                    totals[labels] = list(state)
+                else:
+                    for i, value in enumerate(state):
+                        merged[i] += value
+        return totals
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        for labels, state in sorted(self.values().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), state[:-1]):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}"
+                )
+            label_str = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_str} {_format_value(state[-1])}")
+            lines.append(f"{self.name}_count{label_str} {cumulative}")
+        return lines
+
+
+class CallbackMetric:
+    """
+    Gauge (or externally maintained counter) read from a callback at
+    scrape time, e.g. queue depths and cache sizes owned by other modules.
+
+    The callback returns either a single number or a dict mapping label
+    value tuples to numbers.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], object],
+        labelnames: Sequence[str] = (),
+        metric_type: str = "gauge",
+        registry: Optional[Registry] = REGISTRY
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+        self.labelnames = tuple(labelnames)
+        self.metric_type = metric_type
+        if registry is not None:
+            registry.register(self)
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.metric_type}",
+        ]
+        try:
+            value = self.callback()
+        except Exception as e:
+            print(f"[METRICS] Error collecting {self.name}: {e}")
+            return lines
+
+        samples: Iterable = value.items() if isinstance(value, dict) else [((), value)]
+        for labels, sample in sorted(samples):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(sample)}")
+        return lines
+
+
+# Core application metrics
+http_request_duration = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template and status.",
+    labelnames=("method", "route", "status"),
+)
+
+dependency_call_duration = Histogram(
+    "dependency_call_duration_seconds",
+    "Latency of calls to external dependencies (database, Claude, Resend).",
+    labelnames=("dependency", "operation", "outcome"),
+)
+
+
+@contextmanager
+def time_dependency(dependency: str, operation: str):
+    """Time a block calling an external dependency, labelled ok/error."""
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        dependency_call_duration.observe(
+            (dependency, operation, outcome), time.perf_counter() - start
+        )
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request latency.
+
+    Requests are labelled by route template (e.g. /tickets/{ticket_id})
+    rather than raw path, which keeps label cardinality bounded.
+    Requests answered before routing (CORS preflights, load shedding)
+    or matching no route are labelled "unmatched", except for the fixed
+    known_paths (e.g. the admission-gated ingestion routes).
+    """
+
+    def __init__(self, app, known_paths: Iterable[str] = ()):
+        self.app = app
+        self.known_paths = frozenset(known_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_holder = {"status": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_holder["status"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            status = status_holder["status"]
+            route = scope.get("route")
+            route_path = getattr(route, "path", None)
+            if route_path is None:
+                # Never the raw path: preflights carry every ticket ID
+                route_path = scope["path"] if scope["path"] in self.known_paths else "unmatched"
+            http_request_duration.observe(
+                (scope["method"], route_path, str(status)),
+                time.perf_counter() - start
+            )
+            if not startup_timer.first_response_recorded:
+                startup_timer.record_first_response()
+
+
+def render_metrics() -> str:
+    """Render every registered metric in Prometheus text format."""
+    return REGISTRY.render()
@@ -0,0 +1,312 @@
+"""
+Opt-in per-request profiler.
+
+A request is profiled when it carries `X-Profile: <settings.profiler_token>`
+or is picked by settings.profiler_sample_rate. Profiles are written to
+settings.profiler_dir and the file stem is returned in X-Profile-Id:
+
+- sampling (default): a background thread samples the request's stacks
+  every profiler_interval_ms and writes <id>.speedscope.json (open in
+  https://www.speedscope.app) plus <id>.folded collapsed stacks for
+  flamegraph.pl.
+- cprofile (`X-Profile-Mode: cprofile`): deterministic cProfile output in
+  <id>.prof for pstats/snakeviz.
+
+Sync endpoints and run_in_threadpool work execute on worker threads, so
+the middleware only opens a session; install_profiler hooks the
+threadpool (anyio.to_thread.run_sync, which starlette and FastAPI call)
+so each worker attaches its thread to it. In sampling mode the
+event-loop thread is sampled too, so event-loop work of concurrent
+requests can show up there.
+
+Nothing is installed unless settings.profiler_enabled, so a disabled
+profiler costs nothing on the request path.
+"""
+
+import cProfile
+import functools
+import hmac
+import json
+import os
+import pstats
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter as StackCounter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import anyio.to_thread
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+
+PROFILE_MODES = ("sampling", "cprofile")
+
+# (function name, file, first line) from root to leaf
+Frame = Tuple[str, str, int]
+
+
+class ProfileSession:
+    """Profiling state for one request."""
+
+    def __init__(self, mode: str, label: str):
+        self.mode = mode
+        self.label = label
+        self.id = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{_slug(label)}-{uuid.uuid4().hex[:6]}"
+        self.started = time.perf_counter()
+        self.duration_ms = 0.0
+
+        self._threads: Dict[int, str] = {}
+        self._thread_names: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._samples: Dict[int, StackCounter] = {}
+        self._profiles: List[cProfile.Profile] = []
+
+    def start(self) -> None:
+        if self.mode == "sampling":
+            self.add_thread(threading.get_ident(), "event-loop")
+            self._sampler = threading.Thread(
+                target=self._sample_loop, name="request-profiler", daemon=True
+            )
+            self._sampler.start()
+
+    def stop(self) -> None:
+        self.duration_ms = (time.perf_counter() - self.started) * 1000
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+
+    def add_thread(self, ident: int, name: str) -> None:
+        with self._lock:
+            self._threads[ident] = name
+            self._thread_names[ident] = name
+
+    def remove_thread(self, ident: int) -> None:
+        with self._lock:
+            self._threads.pop(ident, None)
+
+    @contextmanager
+    def attach(self):
+        """Include the current (worker) thread in this profile."""
+        ident = threading.get_ident()
+        if self.mode == "cprofile":
+            profile = cProfile.Profile()
+            profile.enable()
+            try:
+                yield
+            finally:
+                profile.disable()
+                with self._lock:
+                    self._profiles.append(profile)
+            return
+
+        self.add_thread(ident, threading.current_thread().name)
+        try:
+            yield
+        finally:
+            self.remove_thread(ident)
+
+    def _sample_loop(self) -> None:
+        interval = settings.profiler_interval_ms / 1000
+        me = threading.get_ident()
+        while not self._stop.wait(interval):
+            with self._lock:
+                threads = dict(self._threads)
+            frames = sys._current_frames()
+            for ident, name in threads.items():
+                frame = frames.get(ident)
+                if frame is None or ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                    frame = frame.f_back
+                stack.reverse()
+                self._samples.setdefault(ident, StackCounter())[tuple(stack)] += 1
+
+    def write(self, directory: str) -> List[str]:
+        """
+        Write the profile files.
+
+        Returns:
+            Paths written
+        """
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, self.id)
+
+        if self.mode == "cprofile":
+            if not self._profiles:
+                return []
+            stats = pstats.Stats(self._profiles[0])
+            for profile in self._profiles[1:]:
+                stats.add(profile)
+            stats.dump_stats(f"{base}.prof")
+            return [f"{base}.prof"]
+
+        with open(f"{base}.speedscope.json", "w") as f:
+            json.dump(self._speedscope(), f)
+        with open(f"{base}.folded", "w") as f:
+            for ident, counter in self._samples.items():
+                thread = self._thread_label(ident)
+                for stack, count in counter.most_common():
+                    names = ";".join(_frame_name(frame) for frame in stack)
+                    f.write(f"{thread};{names} {count}\n")
+        return [f"{base}.speedscope.json", f"{base}.folded"]
+
+    def _thread_label(self, ident: int) -> str:
+        return self._thread_names.get(ident, f"thread-{ident}")
+
+    def _speedscope(self) -> Dict:
+        interval = settings.profiler_interval_ms
+        frame_index: Dict[Frame, int] = {}
+        frames = []
+        profiles = []
+
+        for ident, counter in self._samples.items():
+            samples, weights = [], []
+            for stack, count in counter.items():
+                indexes = []
+                for frame in stack:
+                    if frame not in frame_index:
+                        frame_index[frame] = len(frames)
+                        frames.append({"name": frame[0], "file": frame[1], "line": frame[2]})
+                    indexes.append(frame_index[frame])
+                samples.append(indexes)
+                weights.append(count * interval)
+
+            profiles.append({
+                "type": "sampled",
+                "name": f"{self.label} ({self._thread_label(ident)})",
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            })
+
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": f"{self.label} ({self.duration_ms:.0f} ms)",
+            "exporter": "customer-followup-bot profiler",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": profiles,
+        }
+
+
+_active_session: ContextVar[Optional[ProfileSession]] = ContextVar("profile_session", default=None)
+_running_sessions = 0
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "_", text).strip("_")[:60] or "root"
+
+
+def _frame_name(frame: Frame) -> str:
+    name, filename, line = frame
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+
+def _attached(func):
+    """Wrap a sync callable so it runs attached to the active profile, if any."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        session = _active_session.get()
+        if session is None:
+            return func(*args, **kwargs)
+        with session.attach():
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def _attach_threadpool() -> None:
+    """Make every threadpool call attach its worker to the active profile."""
+    run_sync = anyio.to_thread.run_sync
+
+    @functools.wraps(run_sync)
+    async def attached_run_sync(func, *args, **kwargs):
+        if _active_session.get() is not None:
+            func = _attached(func)
+        return await run_sync(func, *args, **kwargs)
+
+    anyio.to_thread.run_sync = attached_run_sync
+
+
+class ProfilerMiddleware:
+    """ASGI middleware deciding which requests to profile."""
+
+    def __init__(self, app):
+        self.app = app
+        self.token = settings.profiler_token.encode() if settings.profiler_token else None
+
+    def _requested_mode(self, scope) -> Optional[str]:
+        headers = dict(scope.get("headers") or [])
+        supplied = headers.get(b"x-profile")
+        if supplied is not None and self.token and hmac.compare_digest(supplied, self.token):
+            mode = headers.get(b"x-profile-mode", b"").decode("latin-1").lower()
+            return mode if mode in PROFILE_MODES else settings.profiler_mode
+
+        if (
+            settings.profiler_sample_rate > 0
+            and _running_sessions < settings.profiler_max_concurrent
+            and random.random() < settings.profiler_sample_rate
+        ):
+            return settings.profiler_mode
+        return None
+
+    async def __call__(self, scope, receive, send):
+        global _running_sessions
+
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        mode = self._requested_mode(scope)
+        if mode is None:
+            await self.app(scope, receive, send)
+            return
+
+        session = ProfileSession(mode, f"{scope['method']} {scope['path']}")
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-id", session.id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        _running_sessions += 1
+        token = _active_session.set(session)
+        session.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            session.stop()
+            _active_session.reset(token)
+            _running_sessions -= 1
+            try:
+                paths = await run_in_threadpool(session.write, settings.profiler_dir)
+                print(f"[PROFILER] {session.label} took {session.duration_ms:.1f}ms, wrote {', '.join(paths) or 'nothing'}")
+            except Exception as e:
+                print(f"[PROFILER] Error writing profile {session.id}: {e}")
+
+
+def install_profiler(app) -> None:
+    """
+    Enable request profiling on app: add the middleware and attach
+    threadpool work (sync endpoints and dependencies, run_in_threadpool
+    calls) to the active session.
+    """
+    _attach_threadpool()
+    app.add_middleware(ProfilerMiddleware)
+    print(f"[PROFILER] Enabled ({settings.profiler_mode}, sample rate {settings.profiler_sample_rate}, "
+          f"token {'set' if settings.profiler_token else 'not set'}) -> {settings.profiler_dir}")
@@ -0,0 +1,140 @@
+"""
+Per-request query accounting.
+
+The database wrapper reports every execute/batch here. Each record is
+attached to the request being served (via a context variable that
+follows the request into the threadpool), queries slower than
+settings.slow_query_ms are logged, and the middleware reports the totals
+in X-Query-Count and Server-Timing response headers so N+1 patterns show
+up in the browser's network tab.
+"""
+
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import List, Optional
+
+from app.config import settings
+
+# Keep at most this many records per request; counts keep going past it
+MAX_RECORDS_PER_REQUEST = 500
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_COMMENT = re.compile(r"--[^\n]*")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=1024)
+def fingerprint(sql: str) -> str:
+    """
+    Normalize SQL so the same query shape always maps to one string:
+    comments dropped, literals replaced by '?', IN lists collapsed and
+    whitespace squeezed.
+    """
+    normalized = _COMMENT.sub(" ", sql)
+    normalized = _STRING_LITERAL.sub("?", normalized)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    normalized = _IN_LIST.sub("IN (?+)", normalized)
+    return _WHITESPACE.sub(" ", normalized).strip()
+
+
+@dataclass
+class QueryRecord:
+    """A single database round trip."""
+    fingerprint: str
+    duration_ms: float
+    rows: int
+    statements: int = 1
+
+
+@dataclass
+class RequestQueryLog:
+    """Queries issued while serving one request."""
+    records: List[QueryRecord] = field(default_factory=list)
+    count: int = 0
+    total_ms: float = 0.0
+
+    def add(self, record: QueryRecord) -> None:
+        self.count += 1
+        self.total_ms += record.duration_ms
+        if len(self.records) < MAX_RECORDS_PER_REQUEST:
+            self.records.append(record)
+
+
+_current_log: ContextVar[Optional[RequestQueryLog]] = ContextVar("request_query_log", default=None)
+
+
+def current_query_log() -> Optional[RequestQueryLog]:
+    """Query log of the request being served, if any."""
+    return _current_log.get()
+
+
+@contextmanager
+def capture_queries():
+    """
+    Collect queries issued inside the block (outside of a request, e.g.
+    jobs and benchmarks).
+
+    Yields:
+        The RequestQueryLog being filled
+    """
+    log = RequestQueryLog()
+    token = _current_log.set(log)
+    try:
+        yield log
+    finally:
+        _current_log.reset(token)
+
+
+def record_query(sql: str, duration_ms: float, rows: int, statements: int = 1) -> None:
+    """Attach a query to the current request and log it if slow."""
+    fp = fingerprint(sql)
+
+    log = _current_log.get()
+    if log is not None:
+        log.add(QueryRecord(fp, duration_ms, rows, statements))
+
+    if duration_ms >= settings.slow_query_ms:
+        print(f"[SLOW QUERY] {duration_ms:.1f}ms rows={rows} statements={statements} sql={fp[:300]}")
+
+
+class QueryLogMiddleware:
+    """
+    ASGI middleware that opens a query log per request and reports it in
+    X-Query-Count and Server-Timing headers.
+
+    The log object is mutated in place, so queries made from threadpool
+    workers (which run in a copy of the request context) still land in it.
+    Streaming responses only count queries made before the first byte.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        log = RequestQueryLog()
+        token = _current_log.set(log)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-query-count", str(log.count).encode("latin-1")))
+                headers.append((
+                    b"server-timing",
+                    f'db;dur={log.total_ms:.1f};desc="{log.count} queries"'.encode("latin-1")
+                ))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_log.reset(token)
@@ -0,0 +1,66 @@
+"""
+Response helpers for pre-serialized JSON and conditional GETs.
+
+FastAPI's response_model path dumps returned models to dicts, validates
+those dicts against the response model again and then encodes them. For
+models built from our own rows that is three passes over every ticket;
+returning the bytes from a TypeAdapter's dump_json is a single pass in
+pydantic-core. Endpoints keep response_model for the OpenAPI schema.
+"""
+
+from typing import Any, Dict, Optional
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+# Clients may cache but must revalidate with If-None-Match every time
+REVALIDATE = "private, no-cache"
+
+
+def json_response(
+    adapter: TypeAdapter,
+    value: Any,
+    status_code: int = 200,
+    headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """
+    Serialize value with adapter in one pass.
+
+    Args:
+        adapter: TypeAdapter for the response type (build once, at import)
+        value: Models to serialize
+        status_code: HTTP status code
+        headers: Extra response headers
+
+    Returns:
+        application/json Response
+    """
+    return Response(
+        content=adapter.dump_json(value),
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json"
+    )
+
+
+def cache_headers(etag: str) -> Dict[str, str]:
+    """Headers for a response that can be revalidated with its ETag."""
+    return {"ETag": etag, "Cache-Control": REVALIDATE}
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against a strong ETag (weak
+    comparison, as RFC 9110 requires for If-None-Match).
+    """
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(
+        (tag[2:] if tag.startswith("W/") else tag) == etag for tag in candidates
+    )
+
+
+def not_modified(etag: str) -> Response:
+    """304 response for a matching If-None-Match."""
+    return Response(status_code=304, headers=cache_headers(etag))
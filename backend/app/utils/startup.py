@@ -0,0 +1,91 @@
+"""
+Cold start timing.
+
+Cloud Run scales the service to zero, so every scale-up pays for the
+interpreter, the imports, the schema check and whatever else runs
+before the first response. StartupTimer records those phases and the
+time to the first response (from process start where the OS tells us,
+i.e. on Linux), prints them as [STARTUP] lines and reports them on
+/health.
+
+Import this module before anything heavy (first import in app.main),
+so the "imports" phase covers the whole application import.
+"""
+
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+_IMPORTED_AT = time.perf_counter()
+
+
+def _process_age_ms() -> Optional[float]:
+    """Milliseconds since this process started (Linux only, else None)."""
+    try:
+        with open("/proc/self/stat") as f:
+            # Fields after the "(comm)" one; starttime is field 22 overall
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    return max(0.0, (uptime - start_ticks / os.sysconf("SC_CLK_TCK")) * 1000)
+
+
+class StartupTimer:
+    """Durations of the startup phases, in order, and the time to first response."""
+
+    def __init__(self):
+        # Interpreter start-up and whatever was imported before the app
+        # (e.g. uvicorn), to 10ms resolution
+        self._before_app_ms = _process_age_ms()
+        self._phases: List[Tuple[str, float]] = []
+        self._last = _IMPORTED_AT
+        self._first_response_ms: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def mark(self, phase: str) -> None:
+        """End a phase: it lasted from the previous mark (or app import) until now."""
+        now = time.perf_counter()
+        with self._lock:
+            self._phases.append((phase, (now - self._last) * 1000))
+            self._last = now
+
+    def _since_process_start(self, at: float) -> float:
+        """Milliseconds from process start (or app import if unknown) to `at`."""
+        return (self._before_app_ms or 0.0) + (at - _IMPORTED_AT) * 1000
+
+    @property
+    def first_response_recorded(self) -> bool:
+        return self._first_response_ms is not None
+
+    def record_first_response(self) -> None:
+        """Call when a response has been sent; only the first call counts."""
+        now = time.perf_counter()
+        with self._lock:
+            if self._first_response_ms is not None:
+                return
+            self._first_response_ms = self._since_process_start(now)
+        print(f"[STARTUP] First response {self._first_response_ms:.0f}ms after process start")
+
+    def report(self) -> None:
+        """Print the phases recorded so far."""
+        phases = ", ".join(f"{name} {ms:.0f}ms" for name, ms in self.snapshot()["phases_ms"].items())
+        print(f"[STARTUP] {phases} (ready {self._since_process_start(self._last):.0f}ms after process start)")
+
+    def snapshot(self) -> Dict:
+        """Phase durations and time to first response, for /health."""
+        with self._lock:
+            phases = {}
+            if self._before_app_ms is not None:
+                phases["before_app"] = round(self._before_app_ms, 1)
+            phases.update((name, round(ms, 1)) for name, ms in self._phases)
+            return {
+                "phases_ms": phases,
+                "first_response_ms": round(self._first_response_ms, 1) if self._first_response_ms else None,
+            }
+
+
+# Create singleton instance
+startup_timer = StartupTimer()
@@ -0,0 +1,232 @@
+"""
+Cold start benchmark: how long a fresh process takes to import the app
+and to serve its first response.
+
+Each run starts a new interpreter (nothing cached in-process, like a
+Cloud Run instance scaling up from zero) against a throwaway local
+SQLite database and measures:
+
+- import_ms: `import app.main` (python -X importtime, cumulative)
+- first_response_ms: process start -> first response of GET /health,
+  startup event included (from app.utils.startup)
+- the slowest modules imported at startup, and whether any of the SDKs
+  that are meant to load on first use (DEFERRED_MODULES) got imported
+
+Best-of-N is compared with benchmarks/baselines/coldstart.json; a run
+more than --threshold slower, or one that imports a deferred module,
+fails. Baselines are machine specific: refresh them with
+--save-baseline on the machine that runs the comparison. The database
+is already migrated before the timed runs, as it is in production.
+
+Usage (from backend/):
+    python -m benchmarks.coldstart
+    python -m benchmarks.coldstart --runs 10 --threshold 0.15
+    python -m benchmarks.coldstart --save-baseline
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "coldstart.json")
+
+# Imported on first use only; finding them at startup is a regression
+DEFERRED_MODULES = ("anthropic", "resend", "apscheduler")
+
+# Run in the child process: start the app (startup event included),
+# serve one request and print the startup timings as JSON. app.main is
+# imported first, as uvicorn does, so the test client is not counted
+_FIRST_RESPONSE_SCRIPT = """
+import json
+from app.main import app
+from fastapi.testclient import TestClient
+from app.database import close_db_clients
+from app.utils.startup import startup_timer
+with TestClient(app) as client:
+    client.get("/health")
+close_db_clients()
+print("COLDSTART " + json.dumps(startup_timer.snapshot()))
+"""
+
+_IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def _child_env(db_path: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    for key in ("TURSO_DATABASE_URL", "TURSO_AUTH_TOKEN", "ANTHROPIC_API_KEY"):
+        env.setdefault(key, "bench")
+    env["ENVIRONMENT"] = "local"
+    env["LOCAL_DB_PATH"] = db_path
+    env["PYTHONPATH"] = BACKEND_DIR + os.pathsep + env.get("PYTHONPATH", "")
+    return env
+
+
+def _run(args: List[str], env: Dict[str, str]) -> subprocess.CompletedProcess:
+    result = subprocess.run(
+        [sys.executable, *args], cwd=BACKEND_DIR, env=env,
+        capture_output=True, text=True, timeout=120
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{' '.join(args)} failed:\n{result.stderr[-2000:]}")
+    return result
+
+
+def measure_imports(env: Dict[str, str]) -> Dict:
+    """One `import app.main` in a fresh interpreter, per module."""
+    result = _run(["-X", "importtime", "-c", "import app.main"], env)
+
+    modules = {}
+    total_ms = 0.0
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        cumulative_ms = int(match.group(2)) / 1000
+        depth = len(match.group(3)) // 2
+        name = match.group(4)
+        modules.setdefault(name, (cumulative_ms, depth))
+        if name == "app.main":
+            total_ms = cumulative_ms
+    return {"import_ms": total_ms, "modules": modules}
+
+
+def measure_first_response(env: Dict[str, str]) -> Dict:
+    """Startup phases and time to first response of a fresh process."""
+    result = _run(["-c", _FIRST_RESPONSE_SCRIPT], env)
+    for line in result.stdout.splitlines():
+        if line.startswith("COLDSTART "):
+            return json.loads(line[len("COLDSTART "):])
+    raise RuntimeError(f"no timings in output:\n{result.stdout[-2000:]}")
+
+
+def slowest_modules(modules: Dict[str, tuple], limit: int = 12) -> List[Dict]:
+    """Top-level imports (third-party packages, app modules) by cumulative time."""
+    candidates = [
+        (ms, name) for name, (ms, depth) in modules.items()
+        if depth <= 1 or (name.startswith("app.") and name.count(".") <= 2)
+    ]
+    candidates.sort(reverse=True)
+    return [{"module": name, "cumulative_ms": round(ms, 1)} for ms, name in candidates[:limit]]
+
+
+def _summary(values: List[float]) -> Dict:
+    return {"min_ms": round(min(values), 1), "median_ms": round(statistics.median(values), 1)}
+
+
+def _environment() -> Dict:
+    import fastapi
+
+    return {
+        "python": platform.python_version(),
+        "fastapi": fastapi.__version__,
+        "machine": platform.machine(),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed slowdown vs baseline (0.25 = 25%%)")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Write the results as the new baseline instead of comparing")
+    parser.add_argument("--output", default="bench-results/coldstart.json")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = _child_env(os.path.join(tmp, "coldstart.db"))
+        measure_first_response(env)  # migrate the new database (not timed)
+
+        imports, first_responses, phases = [], [], []
+        modules = {}
+        for i in range(args.runs):
+            run = measure_imports(env)
+            imports.append(run["import_ms"])
+            modules = modules or run["modules"]
+            timings = measure_first_response(env)
+            first_responses.append(timings["first_response_ms"])
+            phases.append(timings["phases_ms"])
+            print(f"[COLDSTART] run {i + 1}: import {run['import_ms']:.0f}ms, "
+                  f"first response {timings['first_response_ms']:.0f}ms "
+                  f"({', '.join(f'{k} {v:.0f}ms' for k, v in timings['phases_ms'].items())})")
+
+    results = {"import": _summary(imports), "first_response": _summary(first_responses)}
+    phase_names = list(dict.fromkeys(name for run in phases for name in run))
+    phase_medians = {
+        name: round(statistics.median(run[name] for run in phases if name in run), 1)
+        for name in phase_names
+    }
+    deferred = [name for name in DEFERRED_MODULES if name in modules]
+
+    print(f"[COLDSTART] import: min {results['import']['min_ms']}ms, median {results['import']['median_ms']}ms")
+    print(f"[COLDSTART] first response: min {results['first_response']['min_ms']}ms, "
+          f"median {results['first_response']['median_ms']}ms")
+    print(f"[COLDSTART] phases (median): {phase_medians}")
+    for entry in slowest_modules(modules):
+        print(f"[COLDSTART]   {entry['cumulative_ms']:>8.1f}ms  {entry['module']}")
+
+    environment = _environment()
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump({"environment": environment, "cases": {
+                name: {"min_ms": r["min_ms"], "median_ms": r["median_ms"]} for name, r in results.items()
+            }}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"[COLDSTART] baseline written to {args.baseline}")
+        return 0
+
+    regressions: List[str] = [f"{name} imported at startup" for name in deferred]
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("environment") != environment:
+            print(f"[COLDSTART] warning: baseline recorded on {baseline.get('environment')}, "
+                  f"running on {environment}")
+        for name, result in results.items():
+            reference = baseline.get("cases", {}).get(name)
+            if not reference:
+                continue
+            ratio = result["min_ms"] / reference["min_ms"]
+            result["baseline_min_ms"] = reference["min_ms"]
+            result["ratio"] = round(ratio, 3)
+            if ratio > 1 + args.threshold:
+                regressions.append(f"{name}: {result['min_ms']}ms vs baseline {reference['min_ms']}ms (x{ratio:.2f})")
+    else:
+        print(f"[COLDSTART] no baseline at {args.baseline}; run with --save-baseline")
+
+    report = {
+        "benchmark": "coldstart",
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": environment,
+        "threshold": args.threshold,
+        "runs": args.runs,
+        "results": results,
+        "phases_median_ms": phase_medians,
+        "slowest_modules": slowest_modules(modules),
+        "deferred_imported": deferred,
+        "regressions": regressions,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    for regression in regressions:
+        print(f"[COLDSTART] REGRESSION {regression}")
+    print(f"[COLDSTART] {len(regressions)} regressions; report written to {args.output}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
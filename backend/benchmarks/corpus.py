@@ -0,0 +1,374 @@
+"""
+Synthetic RFQ corpus generator.
+
+Produces a seeded JSONL corpus of laptop quote conversations: a new
+request followed by zero or more customer replies that fill in missing
+fields. Messages carry the noise real mailboxes have (HTML bodies,
+quoted history, signatures and disclaimers), and conversations can
+include duplicate sends and out-of-office auto-replies.
+
+Every message records what a correct pipeline should do with it: the
+expected route (new / reply / quarantine), the cumulative extraction
+Claude should return, the follow-up it would write and the resulting
+ticket status. benchmarks.replay feeds those recorded responses back
+through a stub, so runs are deterministic for a given seed.
+
+The first line of the file is a {"meta": {...}} record; every other line
+is one conversation.
+
+Usage (from backend/):
+    python -m benchmarks.corpus --conversations 500 --seed 7 \\
+        --output bench-results/corpus-7.jsonl
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+# Extraction fields in the order the app asks for them; budget is optional
+REQUIRED_FIELDS = [
+    "laptop_model", "ram", "storage", "screen_size", "warranty",
+    "quantity", "delivery_location", "delivery_timeline",
+]
+OPTIONAL_FIELDS = ["budget"]
+
+FIELD_VALUES = {
+    "laptop_model": [
+        "Dell Latitude 5430", "Dell Latitude 7440", "HP EliteBook 840 G10",
+        "HP ProBook 450 G10", "Lenovo ThinkPad T14 Gen 4", "Lenovo ThinkPad X1 Carbon Gen 11",
+        "Apple MacBook Pro 14 M3", "Microsoft Surface Laptop 5",
+    ],
+    "ram": ["8GB", "16GB", "16 GB DDR5", "32GB", "64GB"],
+    "storage": ["256GB SSD", "512GB SSD", "1TB SSD", "1TB NVMe", "2TB SSD"],
+    "screen_size": ["13.3-inch", "14-inch", "14-inch FHD", "15.6-inch", "16-inch"],
+    "warranty": ["1 year", "3-year ProSupport", "3 years onsite", "5-year next business day"],
+    "quantity": ["5 units", "10 units", "25 units", "50 laptops", "120 units", "200 units"],
+    "delivery_location": [
+        "123 Main St, New York, NY 10001", "500 Market St, San Francisco, CA 94105",
+        "77 Summer St, Boston, MA 02110", "1200 Congress Ave, Austin, TX 78701",
+        "400 Pine St, Seattle, WA 98101", "Our Chicago office, 233 S Wacker Dr",
+    ],
+    "delivery_timeline": [
+        "ASAP", "within 2 weeks", "by end of month", "March 15, 2026",
+        "2026-04-30", "before the end of Q2",
+    ],
+    "budget": ["$30,000", "around $50k", "$1,200 per unit", "under $80,000"],
+}
+
+# Ways customers phrase each field: bullet lists and prose
+FIELD_PHRASES = {
+    "laptop_model": ["- Model: {v}", "We are looking at the {v}.", "Preferred model is {v}."],
+    "ram": ["- RAM: {v}", "Each machine needs {v} of memory.", "{v} RAM minimum."],
+    "storage": ["- Storage: {v}", "Storage should be {v}.", "They need a {v} drive."],
+    "screen_size": ["- Screen: {v}", "Screen size {v} please.", "A {v} display works for us."],
+    "warranty": ["- Warranty: {v}", "We'd like {v} warranty coverage.", "Warranty: {v}."],
+    "quantity": ["- Quantity: {v}", "We need {v}.", "Total order would be {v}."],
+    "delivery_location": [
+        "- Delivery: {v}", "Please ship to {v}.", "Delivery address is {v}.",
+    ],
+    "delivery_timeline": [
+        "- Timeline: {v}", "We need them {v}.", "Delivery needed by {v}.",
+    ],
+    "budget": ["- Budget: {v}", "Our budget is {v}.", "We have {v} set aside."],
+}
+
+FIRST_NAMES = ["John", "Sarah", "Priya", "Miguel", "Aisha", "Chen", "Olga", "David", "Fatima", "Liam"]
+LAST_NAMES = ["Smith", "Johnson", "Patel", "Garcia", "Okafor", "Wang", "Ivanova", "Brown", "Khan", "Murphy"]
+COMPANIES = ["acme", "globex", "initech", "umbrella", "hooli", "vandelay", "stark", "wayne", "wonka", "tyrell"]
+FREE_MAIL = ["gmail.com", "outlook.com", "yahoo.com"]
+
+SUBJECTS = [
+    "Quote request for laptops", "Laptop quote needed", "RFQ: {model}",
+    "Pricing for {model}", "Need laptops for new hires", "Price for laptops?",
+]
+GREETINGS = ["Hi,", "Hello,", "Hi team,", "Good morning,", "Dear Sales,"]
+OPENERS = [
+    "I'd like to get a quote for some laptops for our office.",
+    "We are refreshing our fleet and need pricing.",
+    "Can you send me pricing for the following?",
+    "Following up on our call, here is what we need.",
+]
+REPLY_OPENERS = [
+    "Thanks for getting back to me.", "Sure, here are the details.",
+    "Sorry for the delay.", "Answers below.",
+]
+SIGNOFFS = ["Thanks,", "Best regards,", "Cheers,", "Regards,"]
+DISCLAIMER = (
+    "CONFIDENTIALITY NOTICE: This email and any attachments are for the sole use of the "
+    "intended recipient(s) and may contain confidential information. If you are not the "
+    "intended recipient, please contact the sender and destroy all copies."
+)
+AUTO_REPLY_BODIES = [
+    "I am out of the office until {date} with limited access to email. "
+    "For urgent matters please contact my colleague.",
+    "Thank you for your email. This is an automatic reply to confirm we have received your message.",
+]
+
+
+def _expected_followup(missing: List[str], customer_name: Optional[str]) -> Dict[str, str]:
+    """Recorded follow-up Claude would write for the missing fields."""
+    labels = [f.replace("_", " ") for f in missing]
+    return {
+        "subject": "Additional details for your laptop quote",
+        "body": (
+            f"Hello {customer_name or 'there'},\n\nThank you for your quote request. "
+            f"To prepare an accurate quote we still need: {', '.join(labels)}.\n\n"
+            "Best regards,\nSales Team"
+        ),
+    }
+
+
+class CorpusGenerator:
+    """
+    Seeded generator of quote conversations.
+
+    Args:
+        seed: Random seed; the same seed always yields the same corpus
+        html_ratio: Fraction of messages sent as HTML
+        duplicate_ratio: Fraction of conversations where the first email is sent twice
+        auto_reply_ratio: Fraction of conversations containing an auto-reply
+        disclaimer_ratio: Fraction of senders with a legal footer
+        start: Timestamp of the first conversation
+    """
+
+    def __init__(
+        self,
+        seed: int = 0,
+        html_ratio: float = 0.3,
+        duplicate_ratio: float = 0.05,
+        auto_reply_ratio: float = 0.08,
+        disclaimer_ratio: float = 0.25,
+        start: datetime = datetime(2026, 1, 5, 9, 0, 0)
+    ):
+        self.rng = random.Random(seed)
+        self.seed = seed
+        self.html_ratio = html_ratio
+        self.duplicate_ratio = duplicate_ratio
+        self.auto_reply_ratio = auto_reply_ratio
+        self.disclaimer_ratio = disclaimer_ratio
+        self.clock = start
+
+    def _tick(self, max_minutes: int) -> str:
+        self.clock += timedelta(minutes=self.rng.randint(1, max_minutes))
+        return self.clock.strftime("%Y-%m-%d %H:%M:%S")
+
+    def _fields_line(self, fields: Dict[str, str]) -> str:
+        bullets = self.rng.random() < 0.5
+        lines = []
+        for name, value in fields.items():
+            phrases = FIELD_PHRASES[name]
+            template = phrases[0] if bullets else self.rng.choice(phrases[1:])
+            lines.append(template.format(v=value))
+        return "\n".join(lines) if bullets else " ".join(lines)
+
+    def _signature(self, person: Dict) -> str:
+        parts = [self.rng.choice(SIGNOFFS), person["name"]]
+        if person["title"]:
+            parts.append(person["title"])
+        if person["disclaimer"]:
+            parts.extend(["", DISCLAIMER])
+        return "\n".join(parts)
+
+    def _quote_history(self, previous: str, when: str) -> str:
+        quoted = "\n".join(f"> {line}" if line else ">" for line in previous.split("\n"))
+        return f"On {when}, Sales Team <sales@example.com> wrote:\n{quoted}"
+
+    def _to_html(self, text: str) -> str:
+        """Wrap a plain-text body the way webmail clients do."""
+        body, _, quoted = text.partition("\nOn ")
+        paragraphs = "".join(
+            f"<div dir=\"ltr\">{p.replace(chr(10), '<br>')}</div><div><br></div>"
+            for p in body.split("\n\n")
+        )
+        if quoted:
+            paragraphs += (
+                "<div class=\"gmail_quote\"><blockquote style=\"margin:0 0 0 .8ex;"
+                "border-left:1px #ccc solid;padding-left:1ex\">On "
+                + quoted.replace("\n", "<br>")
+                + "</blockquote></div>"
+            )
+        return f"<html><head><meta charset=\"utf-8\"></head><body>{paragraphs}</body></html>"
+
+    def _person(self, index: int) -> Dict:
+        first = self.rng.choice(FIRST_NAMES)
+        last = self.rng.choice(LAST_NAMES)
+        domain = (
+            self.rng.choice(FREE_MAIL) if self.rng.random() < 0.2
+            else f"{self.rng.choice(COMPANIES)}{index % 97}.example"
+        )
+        return {
+            "name": f"{first} {last}",
+            "email": f"{first.lower()}.{last.lower()}{index}@{domain}",
+            "title": self.rng.choice(["", "IT Manager", "Procurement Lead", "Office Manager"]),
+            "disclaimer": self.rng.random() < self.disclaimer_ratio,
+        }
+
+    def _message(self, conv_id: str, seq: int, kind: str, person: Dict, subject: str,
+                 text: str, expected: Optional[Dict], in_reply_to: Optional[str] = None,
+                 headers: Optional[Dict] = None, route: str = "new") -> Dict:
+        html = self.rng.random() < self.html_ratio
+        message = {
+            "seq": seq,
+            "kind": kind,
+            "message_id": f"<{conv_id}.{seq}@mail.example>",
+            "in_reply_to": in_reply_to,
+            "from": f"{person['name']} <{person['email']}>",
+            "subject": subject,
+            "body": self._to_html(text) if html else text,
+            "html": html,
+            "headers": headers or {},
+            "sent_at": self._tick(90),
+            "expected_route": route,
+        }
+
+        if expected is not None:
+            extraction = {name: expected.get(name) for name in REQUIRED_FIELDS + OPTIONAL_FIELDS}
+            extraction["customer_name"] = person["name"]
+            extraction["customer_email"] = None
+            missing = [name for name in REQUIRED_FIELDS if not extraction.get(name)]
+            message["expected_extraction"] = extraction
+            message["expected_missing"] = missing
+            message["expected_status"] = "WAITING_ON_CUSTOMER" if missing else "READY"
+            message["recorded_followup"] = _expected_followup(missing, person["name"]) if missing else None
+
+        return message
+
+    def conversation(self, index: int) -> Dict:
+        """Generate one conversation."""
+        rng = self.rng
+        conv_id = f"conv-{self.seed}-{index:06d}"
+        person = self._person(index)
+        values = {name: rng.choice(options) for name, options in FIELD_VALUES.items()}
+
+        # Coverage of the first email: a few complete requests, most
+        # missing something, some nearly empty
+        coverage = rng.choice([1.0, 1.0, 0.8, 0.6, 0.6, 0.4, 0.2, 0.0])
+        present = [f for f in REQUIRED_FIELDS if rng.random() < coverage]
+        if rng.random() < 0.4:
+            present.append("budget")
+        known = {f: values[f] for f in present}
+
+        subject = rng.choice(SUBJECTS).format(model=values["laptop_model"])
+        first_text = "\n\n".join(filter(None, [
+            rng.choice(GREETINGS),
+            rng.choice(OPENERS),
+            self._fields_line(known) if known else "",
+            self._signature(person),
+        ]))
+
+        messages = [self._message(conv_id, 0, "rfq", person, subject, first_text, known)]
+        first_id = messages[0]["message_id"]
+
+        if rng.random() < self.duplicate_ratio:
+            # Same email sent again (double click, client retry)
+            duplicate = self._message(
+                conv_id, len(messages), "duplicate", person, subject, first_text, known, route="reply"
+            )
+            messages.append(duplicate)
+
+        # Replies fill in the rest over one to three messages
+        remaining = [f for f in REQUIRED_FIELDS if f not in known]
+        last_outbound = messages[0].get("recorded_followup")
+        auto_reply_at = rng.randint(0, 2) if rng.random() < self.auto_reply_ratio else None
+        turn = 0
+
+        while remaining:
+            if auto_reply_at == turn:
+                auto_body = rng.choice(AUTO_REPLY_BODIES).format(date=(self.clock + timedelta(days=7)).strftime("%B %d"))
+                messages.append(self._message(
+                    conv_id, len(messages), "auto_reply", person, f"Automatic reply: Re: {subject}",
+                    auto_body, None, in_reply_to=first_id,
+                    headers={"Auto-Submitted": "auto-replied"}, route="quarantine"
+                ))
+
+            # Some customers never answer
+            if rng.random() < 0.1:
+                break
+
+            batch_size = rng.randint(1, len(remaining)) if turn < 2 else len(remaining)
+            answered, remaining = remaining[:batch_size], remaining[batch_size:]
+            known.update({f: values[f] for f in answered})
+
+            text = "\n\n".join(filter(None, [
+                rng.choice(GREETINGS),
+                rng.choice(REPLY_OPENERS),
+                self._fields_line({f: values[f] for f in answered}),
+                self._signature(person),
+                self._quote_history(last_outbound["body"], messages[-1]["sent_at"]) if last_outbound else "",
+            ]))
+            reply = self._message(
+                conv_id, len(messages), "reply", person, f"Re: {subject}", text, dict(known),
+                in_reply_to=first_id, route="reply"
+            )
+            messages.append(reply)
+            last_outbound = reply.get("recorded_followup")
+            turn += 1
+
+        return {"id": conv_id, "customer": person["email"], "messages": messages}
+
+    def generate(self, conversations: int):
+        """Yield conversations in order."""
+        for index in range(conversations):
+            yield self.conversation(index)
+
+
+def load_corpus(path: str):
+    """
+    Read a corpus file.
+
+    Returns:
+        (meta dict, list of conversations)
+    """
+    meta, conversations = {}, []
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if "meta" in record:
+                meta = record["meta"]
+            else:
+                conversations.append(record)
+    return meta, conversations
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--conversations", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--html-ratio", type=float, default=0.3)
+    parser.add_argument("--duplicate-ratio", type=float, default=0.05)
+    parser.add_argument("--auto-reply-ratio", type=float, default=0.08)
+    parser.add_argument("--output", default=None,
+                        help="Defaults to bench-results/corpus-<seed>.jsonl")
+    args = parser.parse_args(argv)
+
+    output = args.output or f"bench-results/corpus-{args.seed}.jsonl"
+    generator = CorpusGenerator(
+        seed=args.seed,
+        html_ratio=args.html_ratio,
+        duplicate_ratio=args.duplicate_ratio,
+        auto_reply_ratio=args.auto_reply_ratio,
+    )
+
+    counts: Dict[str, int] = {}
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        meta = {k: v for k, v in vars(args).items() if k != "output"}
+        f.write(json.dumps({"meta": meta}) + "\n")
+        for conversation in generator.generate(args.conversations):
+            for message in conversation["messages"]:
+                counts[message["kind"]] = counts.get(message["kind"], 0) + 1
+            f.write(json.dumps(conversation) + "\n")
+
+    print(f"[CORPUS] {args.conversations} conversations, {sum(counts.values())} messages {counts}")
+    print(f"[CORPUS] written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,302 @@
+"""
+End-to-end load test for the ingestion endpoints.
+
+Boots the FastAPI app under uvicorn against a temporary SQLite database
+and local Anthropic/Resend stubs, drives /webhooks/resend (production
+mode) or /dev/receive-email (local mode) at a fixed concurrency, and
+writes throughput, latency percentiles and queries per email to a JSON
+report that can be diffed between releases.
+
+Usage (from backend/):
+    python -m benchmarks.loadtest --scenario webhook --emails 200 --concurrency 16
+    python -m benchmarks.loadtest --scenario dev --claude-latency constant:50 \\
+        --output bench-results/dev.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks.stubs import AnthropicStub, ResendStub, canned_responder
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of an unsorted list."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return round(ordered[index], 2)
+
+
+class AppServer:
+    """uvicorn subprocess running the app with benchmark settings."""
+
+    def __init__(self, scenario: str, db_path: str, anthropic_url: str, resend_url: str,
+                 extra_env: Optional[Dict[str, str]] = None):
+        self.port = _free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+
+        env = dict(os.environ)
+        env.update({
+            "ENVIRONMENT": "production" if scenario == "webhook" else "local",
+            "TURSO_DATABASE_URL": f"file:{db_path}",
+            "TURSO_AUTH_TOKEN": "bench",
+            "LOCAL_DB_PATH": db_path,
+            "ANTHROPIC_API_KEY": "bench",
+            "ANTHROPIC_BASE_URL": anthropic_url,
+            "RESEND_API_KEY": "bench",
+            "RESEND_API_URL": resend_url,
+            "RESEND_FROM_EMAIL": "sales@bench.local",
+            # Every simulated sender is distinct, but keep the global
+            # bucket out of the way so we measure the pipeline itself
+            "GLOBAL_EMAIL_BURST": "1000000",
+            "GLOBAL_EMAILS_PER_HOUR": "1000000",
+        })
+        env.update(extra_env or {})
+        self.env = env
+        self.process: Optional[subprocess.Popen] = None
+
+    def start(self, timeout: float = 30.0) -> None:
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app",
+             "--host", "127.0.0.1", "--port", str(self.port), "--log-level", "warning"],
+            cwd=BACKEND_DIR,
+            env=self.env,
+            stdout=subprocess.DEVNULL,
+        )
+
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError("App server exited during startup")
+            try:
+                if httpx.get(f"{self.url}/health", timeout=1.0).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.2)
+        raise RuntimeError("App server did not become healthy in time")
+
+    def stop(self) -> None:
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+def build_email(index: int, rng: random.Random) -> Dict[str, str]:
+    """A new quote request from a distinct sender."""
+    quantity = rng.choice([5, 10, 25, 50, 120])
+    return {
+        "from": f"buyer{index}@customer{index % 50}.example",
+        "subject": f"Quote request #{index}: laptops",
+        "body": (
+            f"Hi,\n\nWe need a quote for {quantity} Dell Latitude 5430 laptops, "
+            "16GB RAM, 512GB SSD, 14-inch screen.\nPlease deliver to 123 Main St, "
+            "New York, NY 10001.\n\nThanks,\nBuyer"
+        ),
+    }
+
+
+def build_reply(email: Dict[str, str], ticket_number: str) -> Dict[str, str]:
+    return {
+        "from": email["from"],
+        "subject": f"Re: {ticket_number}",
+        "body": "Warranty: 3-year ProSupport. We need delivery by March 15, 2026.",
+    }
+
+
+def request_for(scenario: str, email: Dict[str, str], index: int,
+                ticket_id: Optional[int] = None) -> tuple:
+    """(path, json payload) for the chosen ingestion endpoint."""
+    if scenario == "webhook":
+        return "/webhooks/resend", {
+            "type": "email.received",
+            "data": {
+                "from": email["from"],
+                "to": ["sales@bench.local"],
+                "subject": email["subject"],
+                "text": email["body"],
+                "email_id": f"bench-{index}-{ticket_id or 0}",
+                "headers": {},
+            },
+        }
+
+    payload = {"from_email": email["from"], "subject": email["subject"], "body": email["body"]}
+    if ticket_id:
+        payload["in_reply_to"] = ticket_id
+    return "/dev/receive-email", payload
+
+
+async def drive(base_url: str, scenario: str, emails: int, concurrency: int,
+                reply_ratio: float, seed: int) -> Dict:
+    """Send `emails` new requests (plus replies) with bounded concurrency."""
+    rng = random.Random(seed)
+    samples: List[Dict] = []
+    next_index = iter(range(emails))
+
+    async def send(client: httpx.AsyncClient, kind: str, path: str, payload: Dict) -> Dict:
+        start = time.perf_counter()
+        try:
+            response = await client.post(path, json=payload)
+            status = response.status_code
+            body = response.json() if status == 200 else {}
+            queries = int(response.headers.get("x-query-count", 0))
+        except httpx.HTTPError as e:
+            status, body, queries = f"error:{type(e).__name__}", {}, 0
+        sample = {
+            "kind": kind,
+            "status": status,
+            "latency_ms": (time.perf_counter() - start) * 1000,
+            "queries": queries,
+            "result_type": body.get("type"),
+        }
+        samples.append(sample)
+        return body
+
+    async def worker(client: httpx.AsyncClient) -> None:
+        for index in next_index:
+            email = build_email(index, rng)
+            path, payload = request_for(scenario, email, index)
+            body = await send(client, "new", path, payload)
+
+            if body.get("ticket_id") and rng.random() < reply_ratio:
+                reply = build_reply(email, body["ticket_number"])
+                path, payload = request_for(scenario, reply, index, body["ticket_id"])
+                await send(client, "reply", path, payload)
+
+    started = time.perf_counter()
+    async with httpx.AsyncClient(base_url=base_url, timeout=120.0) as client:
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {"elapsed_s": elapsed, "samples": samples}
+
+
+def summarize(samples: List[Dict], elapsed: float) -> Dict:
+    ok = [s for s in samples if s["status"] == 200]
+    statuses: Dict[str, int] = {}
+    for s in samples:
+        statuses[str(s["status"])] = statuses.get(str(s["status"]), 0) + 1
+
+    def latency_block(group: List[Dict]) -> Dict:
+        latencies = [s["latency_ms"] for s in group]
+        return {
+            "count": len(group),
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+            "max_ms": round(max(latencies), 2) if latencies else None,
+        }
+
+    queries = [s["queries"] for s in ok]
+    return {
+        "requests": len(samples),
+        "succeeded": len(ok),
+        "statuses": statuses,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(ok) / elapsed, 2) if elapsed else None,
+        "latency": latency_block(ok),
+        "latency_by_kind": {
+            kind: latency_block([s for s in ok if s["kind"] == kind])
+            for kind in ("new", "reply")
+        },
+        "queries_per_email": {
+            "mean": round(sum(queries) / len(queries), 2) if queries else None,
+            "p95": percentile(queries, 95),
+            "max": max(queries) if queries else None,
+        },
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scenario", choices=["webhook", "dev"], default="webhook")
+    parser.add_argument("--emails", type=int, default=100, help="New emails to send")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--reply-ratio", type=float, default=0.5,
+                        help="Fraction of new tickets that get a customer reply")
+    parser.add_argument("--claude-latency", default="lognormal:900:0.4")
+    parser.add_argument("--claude-error-rate", type=float, default=0.0)
+    parser.add_argument("--complete-ratio", type=float, default=0.5,
+                        help="Fraction of extractions returning every field")
+    parser.add_argument("--resend-latency", default="constant:80")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--env", action="append", default=[],
+                        help="Extra KEY=VALUE setting for the app (repeatable)")
+    parser.add_argument("--output", default="bench-results/loadtest.json")
+    args = parser.parse_args(argv)
+
+    extra_env = dict(item.split("=", 1) for item in args.env)
+
+    anthropic_stub = AnthropicStub(
+        latency=args.claude_latency,
+        error_rate=args.claude_error_rate,
+        responder=canned_responder(args.complete_ratio, args.seed),
+        seed=args.seed,
+    ).start()
+    resend_stub = ResendStub(latency=args.resend_latency, seed=args.seed).start()
+
+    with tempfile.TemporaryDirectory(prefix="loadtest-") as tmp:
+        server = AppServer(
+            args.scenario, os.path.join(tmp, "bench.db"),
+            anthropic_stub.url, resend_stub.url, extra_env
+        )
+        try:
+            server.start()
+            run = asyncio.run(drive(
+                server.url, args.scenario, args.emails, args.concurrency,
+                args.reply_ratio, args.seed
+            ))
+        finally:
+            server.stop()
+            anthropic_stub.stop()
+            resend_stub.stop()
+
+    report = {
+        "benchmark": "loadtest",
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config": {k: v for k, v in vars(args).items() if k != "output"},
+        "results": summarize(run["samples"], run["elapsed_s"]),
+        "stubs": {"anthropic": anthropic_stub.stats(), "resend": resend_stub.stats()},
+    }
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    results = report["results"]
+    print(f"[LOADTEST] {results['succeeded']}/{results['requests']} ok in {results['elapsed_s']}s "
+          f"({results['throughput_rps']} req/s)")
+    print(f"[LOADTEST] latency p50={results['latency']['p50_ms']}ms "
+          f"p95={results['latency']['p95_ms']}ms p99={results['latency']['p99_ms']}ms")
+    print(f"[LOADTEST] queries/email mean={results['queries_per_email']['mean']} "
+          f"statuses={results['statuses']}")
+    print(f"[LOADTEST] report written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,424 @@
+"""
+Microbenchmarks for the pure CPU paths every request goes through.
+
+Covers missing-field detection, Claude response parsing, row-to-model
+hydration, response serialization of ticket lists and threads, and the
+ticket-number subject regex, using large synthetic inputs (10k tickets,
+200-message threads). No database or network is involved. Cases ending
+in _validated keep the previous implementation (full pydantic validation,
+FastAPI's response_model round trip) as a reference for the current one.
+
+Each case is timed with timeit (auto-ranged loop count, several
+repeats) and compared with a stored baseline; a case whose best time is
+more than --threshold slower than its baseline fails the run, so
+serialization or hydration regressions are caught before deploy.
+Baselines are machine specific: refresh them with --save-baseline on the
+machine that runs the comparison.
+
+Usage (from backend/):
+    python -m benchmarks.micro
+    python -m benchmarks.micro --filter response --threshold 0.15
+    python -m benchmarks.micro --save-baseline
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import timeit
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+
+# The app modules read settings at import time
+for _key in ("TURSO_DATABASE_URL", "TURSO_AUTH_TOKEN", "ANTHROPIC_API_KEY"):
+    os.environ.setdefault(_key, "bench")
+
+from benchmarks.corpus import FIELD_VALUES, REQUIRED_FIELDS  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "micro.json")
+
+TICKETS = 10_000
+THREAD_MESSAGES = 200
+
+# name -> (setup function returning the zero-argument callable to time,
+#          items processed per call for per-item cost, or None)
+CASES: Dict[str, tuple] = {}
+
+
+def case(name: str, items: Optional[int] = None):
+    """Register a benchmark case."""
+    def register(setup):
+        CASES[name] = (setup, items)
+        return setup
+    return register
+
+
+def _rng() -> random.Random:
+    return random.Random(1234)
+
+
+def _extraction_rows(rng: random.Random, count: int) -> List[tuple]:
+    """extracted_data rows with roughly a third of the fields missing."""
+    fields = REQUIRED_FIELDS + ["budget"]
+    return [
+        tuple(rng.choice(FIELD_VALUES[f]) if rng.random() > 0.3 else None for f in fields)
+        for _ in range(count)
+    ]
+
+
+def _ticket_rows(rng: random.Random, count: int) -> List[tuple]:
+    start = datetime(2026, 1, 1)
+    statuses = ["NEW", "WAITING_ON_CUSTOMER", "READY"]
+    rows = []
+    for i in range(count):
+        created = start + timedelta(minutes=7 * i)
+        rows.append((
+            i + 1, f"TKT-{i:08X}", f"Customer {i}", f"buyer{i}@example.com",
+            rng.choice(statuses),
+            created.strftime("%Y-%m-%d %H:%M:%S"),
+            (created + timedelta(hours=3)).strftime("%Y-%m-%d %H:%M:%S"),
+        ))
+    return rows
+
+
+def _thread_rows(rng: random.Random, count: int) -> List[tuple]:
+    start = datetime(2026, 1, 1)
+    body = (
+        "Hi,\n\nThanks for the update. Please see the details below.\n\n"
+        + "\n".join(f"- {f}: {rng.choice(FIELD_VALUES[f])}" for f in REQUIRED_FIELDS)
+        + "\n\nBest regards,\nCustomer\n\n" + "> quoted history line\n" * 40
+    )
+    return [
+        (
+            i + 1, 1, f"Re: Quote request #{i}", body,
+            "inbound" if i % 2 == 0 else "outbound",
+            f"<msg-{i}@mail.example>", f"<msg-{i - 1}@mail.example>" if i else None,
+            (start + timedelta(minutes=i)).strftime("%Y-%m-%d %H:%M:%S"),
+        )
+        for i in range(count)
+    ]
+
+
+@case("missing_required_fields_10k", items=TICKETS)
+def bench_missing_fields():
+    from app.services.ticket_service import _row_to_extracted_data
+
+    items = [_row_to_extracted_data(row) for row in _extraction_rows(_rng(), TICKETS)]
+    return lambda: [item.get_missing_required_fields() for item in items]
+
+
+@case("parse_json_response_plain")
+def bench_parse_plain():
+    from app.services.claude_extractor import _parse_json_response
+
+    text = json.dumps({f: FIELD_VALUES[f][0] for f in REQUIRED_FIELDS + ["budget"]})
+    return lambda: _parse_json_response(text)
+
+
+@case("parse_json_response_fenced")
+def bench_parse_fenced():
+    from app.services.claude_extractor import _parse_json_response
+
+    payload = json.dumps({f: FIELD_VALUES[f][0] for f in REQUIRED_FIELDS + ["budget"]}, indent=2)
+    text = f"  ```json\n{payload}\n```  "
+    return lambda: _parse_json_response(text)
+
+
+def _validated_ticket(row, extraction_row):
+    """Hydration as it was before model_construct: full per-field validation."""
+    from app.models.ticket import ExtractedData, Ticket, TicketStatus
+
+    ticket = Ticket(
+        id=row[0], ticket_number=row[1], customer_name=row[2], customer_email=row[3],
+        status=TicketStatus(row[4]), created_at=row[5], updated_at=row[6]
+    )
+    ticket.extracted_data = ExtractedData(
+        laptop_model=extraction_row[0], ram=extraction_row[1], storage=extraction_row[2],
+        screen_size=extraction_row[3], warranty=extraction_row[4], quantity=extraction_row[5],
+        delivery_location=extraction_row[6], delivery_timeline=extraction_row[7],
+        budget=extraction_row[8]
+    )
+    return ticket
+
+
+def _hydrated_ticket(row, extraction_row):
+    from app.services.ticket_service import _row_to_extracted_data, _row_to_ticket
+
+    ticket = _row_to_ticket(row)
+    ticket.extracted_data = _row_to_extracted_data(extraction_row)
+    return ticket
+
+
+def _ticket_list(count: int):
+    rng = _rng()
+    return [
+        _hydrated_ticket(row, extraction_row)
+        for row, extraction_row in zip(_ticket_rows(rng, count), _extraction_rows(rng, count))
+    ]
+
+
+def _ticket_detail():
+    from app.services.ticket_service import _row_to_thread
+
+    rng = _rng()
+    ticket = _hydrated_ticket(_ticket_rows(rng, 1)[0], _extraction_rows(rng, 1)[0])
+    ticket.email_threads = [_row_to_thread(row) for row in _thread_rows(rng, THREAD_MESSAGES)]
+    return ticket
+
+
+@case("hydrate_ticket_rows_10k_validated", items=TICKETS)
+def bench_hydrate_tickets_validated():
+    rng = _rng()
+    rows = list(zip(_ticket_rows(rng, TICKETS), _extraction_rows(rng, TICKETS)))
+    return lambda: [_validated_ticket(row, extraction_row) for row, extraction_row in rows]
+
+
+@case("hydrate_ticket_rows_10k", items=TICKETS)
+def bench_hydrate_tickets():
+    rng = _rng()
+    rows = list(zip(_ticket_rows(rng, TICKETS), _extraction_rows(rng, TICKETS)))
+    return lambda: [_hydrated_ticket(row, extraction_row) for row, extraction_row in rows]
+
+
+@case("hydrate_thread_rows_200_validated", items=THREAD_MESSAGES)
+def bench_hydrate_threads_validated():
+    from app.models.ticket import EmailThread
+
+    rows = _thread_rows(_rng(), THREAD_MESSAGES)
+    return lambda: [
+        EmailThread(
+            id=row[0], ticket_id=row[1], email_subject=row[2], email_body=row[3],
+            direction=row[4], email_message_id=row[5], in_reply_to=row[6], timestamp=row[7]
+        )
+        for row in rows
+    ]
+
+
+@case("hydrate_thread_rows_200", items=THREAD_MESSAGES)
+def bench_hydrate_threads():
+    from app.services.ticket_service import _row_to_thread
+
+    rows = _thread_rows(_rng(), THREAD_MESSAGES)
+    return lambda: [_row_to_thread(row) for row in rows]
+
+
+def _response_model_serializer(annotation):
+    """
+    FastAPI's response_model path: dump the returned models, validate
+    the result against the response model, then JSON-encode it.
+    """
+    import asyncio
+
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_response_field
+
+    field = create_response_field(name="Response", type_=annotation)
+    loop = asyncio.new_event_loop()
+
+    def serialize(value):
+        content = loop.run_until_complete(
+            serialize_response(field=field, response_content=value, is_coroutine=True)
+        )
+        return JSONResponse(content).body
+
+    return serialize
+
+
+def _json_response_serializer(annotation):
+    """Single-pass serialization used by the ticket routes."""
+    from pydantic import TypeAdapter
+
+    from app.utils.responses import json_response
+
+    adapter = TypeAdapter(annotation)
+    return lambda value: json_response(adapter, value).body
+
+
+@case("response_ticket_list_10k_validated", items=TICKETS)
+def bench_response_list_validated():
+    from app.models.ticket import Ticket
+
+    tickets = _ticket_list(TICKETS)
+    serialize = _response_model_serializer(List[Ticket])
+    return lambda: serialize(tickets)
+
+
+@case("response_ticket_list_10k", items=TICKETS)
+def bench_response_list():
+    from app.models.ticket import Ticket
+
+    tickets = _ticket_list(TICKETS)
+    serialize = _json_response_serializer(List[Ticket])
+    return lambda: serialize(tickets)
+
+
+@case("response_ticket_summaries_10k", items=TICKETS)
+def bench_response_summaries():
+    from fastapi.responses import ORJSONResponse
+
+    from app.services.ticket_service import SUMMARY_FIELDS, _summary_rows
+
+    rng = _rng()
+    rows = [
+        ticket_row + (extraction_row[0], extraction_row[5])
+        for ticket_row, extraction_row in zip(_ticket_rows(rng, TICKETS), _extraction_rows(rng, TICKETS))
+    ]
+    fields = list(SUMMARY_FIELDS)
+    return lambda: ORJSONResponse(_summary_rows(fields, rows)).body
+
+
+@case("response_ticket_detail_200_threads_validated")
+def bench_response_detail_validated():
+    from app.models.ticket import Ticket
+
+    ticket = _ticket_detail()
+    serialize = _response_model_serializer(Ticket)
+    return lambda: serialize(ticket)
+
+
+@case("response_ticket_detail_200_threads")
+def bench_response_detail():
+    from app.models.ticket import Ticket
+
+    ticket = _ticket_detail()
+    serialize = _json_response_serializer(Ticket)
+    return lambda: serialize(ticket)
+
+
+@case("extract_ticket_number_10k", items=TICKETS)
+def bench_subject_regex():
+    from app.database import extract_ticket_number
+
+    rng = _rng()
+    subjects = []
+    for i in range(TICKETS):
+        roll = rng.random()
+        if roll < 0.4:
+            subjects.append(f"Re: TKT-2026{i % 10000:04d}-{i % 9999:04d} laptop quote")
+        elif roll < 0.7:
+            subjects.append(f"RE: Fwd: Quote request for {rng.choice(FIELD_VALUES['laptop_model'])}")
+        else:
+            subjects.append("Re: " * rng.randint(1, 6) + "Pricing for laptops - order " + str(i) * 3)
+    return lambda: [extract_ticket_number(subject) for subject in subjects]
+
+
+def run_case(setup: Callable, items: Optional[int], repeat: int) -> Dict:
+    """Time one case; returns per-call timings in milliseconds."""
+    fn = setup()
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    timings = [t / number * 1000 for t in timer.repeat(repeat=repeat, number=number)]
+    result = {
+        "min_ms": round(min(timings), 4),
+        "median_ms": round(statistics.median(timings), 4),
+        "loops": number,
+        "repeat": repeat,
+    }
+    if items:
+        result["per_item_us"] = round(min(timings) * 1000 / items, 3)
+    return result
+
+
+def _environment() -> Dict:
+    import pydantic
+
+    return {
+        "python": platform.python_version(),
+        "pydantic": pydantic.VERSION,
+        "machine": platform.machine(),
+    }
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[str]:
+    """
+    Names of cases that regressed past the threshold.
+
+    Best-of-N is compared rather than the median: scheduler noise only
+    ever makes a run slower, so the minimum is far more stable.
+    """
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if not reference:
+            continue
+        ratio = result["min_ms"] / reference["min_ms"]
+        result["baseline_min_ms"] = reference["min_ms"]
+        result["ratio"] = round(ratio, 3)
+        if ratio > 1 + threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--filter", default=None, help="Only run cases containing this substring")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed slowdown vs baseline (0.25 = 25%%)")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Write the results as the new baseline instead of comparing")
+    parser.add_argument("--output", default="bench-results/micro.json")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name, (setup, items) in CASES.items():
+        if args.filter and args.filter not in name:
+            continue
+        result = results[name] = run_case(setup, items, args.repeat)
+        per_item = f" ({result['per_item_us']:.3f}us/item)" if items else ""
+        print(f"[MICRO] {name:<46} median={result['median_ms']:>10.4f}ms "
+              f"min={result['min_ms']:.4f}ms{per_item}")
+
+    environment = _environment()
+
+    if args.save_baseline:
+        existing = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                existing = json.load(f).get("cases", {})
+        existing.update({name: {"min_ms": r["min_ms"], "median_ms": r["median_ms"]} for name, r in results.items()})
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump({"environment": environment, "cases": existing}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"[MICRO] baseline written to {args.baseline}")
+        return 0
+
+    regressions: List[str] = []
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("environment") != environment:
+            print(f"[MICRO] warning: baseline recorded on {baseline.get('environment')}, "
+                  f"running on {environment}")
+        regressions = compare(results, baseline.get("cases", {}), args.threshold)
+    else:
+        print(f"[MICRO] no baseline at {args.baseline}; run with --save-baseline")
+
+    report = {
+        "benchmark": "micro",
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": environment,
+        "threshold": args.threshold,
+        "cases": results,
+        "regressions": regressions,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    for name in regressions:
+        result = results[name]
+        print(f"[MICRO] REGRESSION {name}: {result['min_ms']}ms vs baseline "
+              f"{result['baseline_min_ms']}ms (x{result['ratio']})")
+    print(f"[MICRO] {len(results)} cases, {len(regressions)} regressions; report written to {args.output}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,256 @@
+"""
+Deterministic replay of a synthetic corpus through the ticket pipeline.
+
+Feeds every message of a corpus (see benchmarks.corpus) through the same
+steps the Resend webhook takes: inbound guard, thread matching, then
+create_ticket_from_email or update_ticket_from_reply. The app runs
+in-process against a fresh SQLite database in local mode (follow-ups go
+to mock_emails), and Claude is replaced by a stub that answers each
+call with the response recorded in the corpus.
+
+Because the inputs and Claude's answers are fixed, two runs of the same
+corpus differ only in how fast the code is, which makes the report
+(throughput, per-message latency, queries, tokens and routing/status
+mismatches) usable as a before/after comparison.
+
+Usage (from backend/):
+    python -m benchmarks.corpus --conversations 500 --seed 7
+    python -m benchmarks.replay bench-results/corpus-7.jsonl \\
+        --output bench-results/replay-7.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from benchmarks.corpus import load_corpus
+from benchmarks.loadtest import percentile
+from benchmarks.stubs import DEFAULT_FOLLOWUP, AnthropicStub
+
+
+class RecordedResponder:
+    """
+    Stub responder answering with the recorded responses of the message
+    currently being replayed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._message: Dict = {}
+
+    def load(self, message: Dict) -> None:
+        with self._lock:
+            self._message = message
+
+    def __call__(self, purpose: str, prompt: str):
+        with self._lock:
+            message = self._message
+
+        if purpose == "followup":
+            payload = message.get("recorded_followup") or DEFAULT_FOLLOWUP
+        else:
+            payload = message.get("expected_extraction") or {}
+
+        text = json.dumps(payload)
+        return text, max(1, len(text) // 4)
+
+
+def _configure_environment(db_path: str, anthropic_url: str) -> None:
+    """Point the app at the temp database and the stub before it is imported."""
+    os.environ.update({
+        "ENVIRONMENT": "local",
+        "TURSO_DATABASE_URL": f"file:{db_path}",
+        "TURSO_AUTH_TOKEN": "replay",
+        "LOCAL_DB_PATH": db_path,
+        "ANTHROPIC_API_KEY": "replay",
+        "ANTHROPIC_BASE_URL": anthropic_url,
+        "RESEND_API_KEY": "replay",
+        # A conversation is several emails from one sender within minutes
+        # of each other; only automated mail should be held back
+        "SENDER_EMAIL_BURST": "1000000",
+        "SENDER_EMAILS_PER_HOUR": "1000000",
+        "DOMAIN_EMAIL_BURST": "1000000",
+        "DOMAIN_EMAILS_PER_HOUR": "1000000",
+        "GLOBAL_EMAIL_BURST": "1000000",
+        "GLOBAL_EMAILS_PER_HOUR": "1000000",
+    })
+
+
+def replay(conversations: List[Dict], responder: RecordedResponder) -> List[Dict]:
+    """
+    Replay conversations in order.
+
+    Returns:
+        One sample per message
+    """
+    # Imported here so settings pick up _configure_environment()
+    from app.database import find_ticket_by_email_headers, initialize_database
+    from app.services import ticket_service
+    from app.services.rate_limiter import inbound_guard, quarantine_email
+    from app.utils.query_log import capture_queries
+
+    initialize_database()
+    samples = []
+
+    for conversation in conversations:
+        for message in conversation["messages"]:
+            responder.load(message)
+            sample = {
+                "conversation": conversation["id"],
+                "kind": message["kind"],
+                "expected_route": message["expected_route"],
+                "expected_status": message.get("expected_status"),
+            }
+
+            start = time.perf_counter()
+            with capture_queries() as log:
+                try:
+                    decision = inbound_guard.check(message["from"], message["subject"], message["headers"])
+                    if not decision.allowed:
+                        quarantine_email(
+                            message["from"], message["subject"], message["body"],
+                            decision.reason, message["headers"], message["message_id"]
+                        )
+                        sample.update(route="quarantine", status=None)
+                    else:
+                        ticket_id = find_ticket_by_email_headers(
+                            in_reply_to=message["in_reply_to"],
+                            subject=message["subject"],
+                            customer_email=message["from"]
+                        )
+                        if ticket_id:
+                            ticket = ticket_service.update_ticket_from_reply(
+                                ticket_id=ticket_id,
+                                email_body=message["body"],
+                                email_subject=message["subject"]
+                            )
+                            route = "reply"
+                        else:
+                            ticket = ticket_service.create_ticket_from_email(
+                                email_body=message["body"],
+                                email_subject=message["subject"],
+                                customer_email=message["from"],
+                                email_message_id=message["message_id"]
+                            )
+                            route = "new"
+                        sample.update(route=route, status=ticket.status.value)
+                except Exception as e:
+                    sample.update(route="error", status=None, error=f"{type(e).__name__}: {e}")
+
+            sample["latency_ms"] = (time.perf_counter() - start) * 1000
+            sample["queries"] = log.count
+            sample["db_ms"] = log.total_ms
+            samples.append(sample)
+
+    return samples
+
+
+def summarize(samples: List[Dict], elapsed: float) -> Dict:
+    def latency_block(group: List[Dict]) -> Dict:
+        latencies = [s["latency_ms"] for s in group]
+        queries = [s["queries"] for s in group]
+        return {
+            "count": len(group),
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "max_ms": round(max(latencies), 2) if latencies else None,
+            "queries_mean": round(sum(queries) / len(queries), 2) if queries else None,
+            "queries_max": max(queries) if queries else None,
+        }
+
+    routes: Dict[str, int] = {}
+    for s in samples:
+        routes[s["route"]] = routes.get(s["route"], 0) + 1
+
+    route_mismatches = [s for s in samples if s["route"] != s["expected_route"]]
+    status_mismatches = [
+        s for s in samples
+        if s["route"] in ("new", "reply") and s["expected_status"] and s["status"] != s["expected_status"]
+    ]
+    errors = [s for s in samples if s["route"] == "error"]
+
+    return {
+        "messages": len(samples),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_msgs_per_s": round(len(samples) / elapsed, 2) if elapsed else None,
+        "db_ms_total": round(sum(s["db_ms"] for s in samples), 1),
+        "queries_total": sum(s["queries"] for s in samples),
+        "routes": routes,
+        "latency": latency_block(samples),
+        "latency_by_route": {
+            route: latency_block([s for s in samples if s["route"] == route])
+            for route in ("new", "reply", "quarantine")
+        },
+        "route_mismatches": len(route_mismatches),
+        "status_mismatches": len(status_mismatches),
+        "errors": len(errors),
+        "error_examples": [s["error"] for s in errors[:5]],
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("corpus", help="Corpus JSONL written by benchmarks.corpus")
+    parser.add_argument("--limit", type=int, default=None, help="Replay only the first N conversations")
+    parser.add_argument("--claude-latency", default="constant:0",
+                        help="Stub latency; keep at 0 to measure the app itself")
+    parser.add_argument("--output", default="bench-results/replay.json")
+    args = parser.parse_args(argv)
+
+    meta, conversations = load_corpus(args.corpus)
+    if args.limit is not None:
+        conversations = conversations[:args.limit]
+
+    responder = RecordedResponder()
+    anthropic_stub = AnthropicStub(latency=args.claude_latency, responder=responder).start()
+
+    with tempfile.TemporaryDirectory(prefix="replay-") as tmp:
+        _configure_environment(os.path.join(tmp, "replay.db"), anthropic_stub.url)
+        from app.database import close_db_clients
+
+        try:
+            started = time.perf_counter()
+            samples = replay(conversations, responder)
+            elapsed = time.perf_counter() - started
+
+            from app.services.llm_ledger import get_ticket_usage, llm_ledger
+            llm_ledger.flush()
+            ticket_usage = get_ticket_usage(limit=0)
+        finally:
+            anthropic_stub.stop()
+            close_db_clients()
+
+    ticket_usage.pop("top_tickets", None)
+    report = {
+        "benchmark": "replay",
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "corpus": {"path": args.corpus, "meta": meta, "conversations": len(conversations)},
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "corpus")},
+        "results": summarize(samples, elapsed),
+        "tokens": {**anthropic_stub.stats(), "per_ticket": ticket_usage},
+    }
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    results = report["results"]
+    print(f"[REPLAY] {results['messages']} messages in {results['elapsed_s']}s "
+          f"({results['throughput_msgs_per_s']} msgs/s), routes={results['routes']}")
+    print(f"[REPLAY] latency p50={results['latency']['p50_ms']}ms p95={results['latency']['p95_ms']}ms "
+          f"queries/msg={results['latency']['queries_mean']}")
+    print(f"[REPLAY] tokens in={report['tokens']['input_tokens']} out={report['tokens']['output_tokens']} "
+          f"mismatches route={results['route_mismatches']} status={results['status_mismatches']} "
+          f"errors={results['errors']}")
+    print(f"[REPLAY] report written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,247 @@
+"""
+Local stand-ins for the Anthropic Messages API and the Resend API.
+
+Both run as threaded HTTP servers on localhost so the real SDKs (and
+their retry logic) are exercised end to end without network access.
+
+Latency distributions are given as strings:
+    constant:800            always 800 ms
+    uniform:300:1500        uniform between 300 and 1500 ms
+    lognormal:900:0.5       lognormal with median 900 ms and sigma 0.5
+"""
+
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+
+ALL_FIELDS = {
+    "laptop_model": "Dell Latitude 5430",
+    "ram": "16GB",
+    "storage": "512GB SSD",
+    "screen_size": "14-inch",
+    "warranty": "3-year ProSupport",
+    "quantity": "25 units",
+    "delivery_location": "123 Main St, New York, NY 10001",
+    "delivery_timeline": "March 15, 2026",
+    "budget": "$30,000",
+}
+
+DEFAULT_FOLLOWUP = {
+    "subject": "Additional details for your laptop quote",
+    "body": "Hi,\n\nThanks for your request. Could you confirm the warranty and delivery timeline?\n\nBest regards,\nSales Team",
+}
+
+# Responder signature: (purpose, prompt) -> (response text, output tokens)
+Responder = Callable[[str, str], tuple]
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """Build a sampler returning seconds from a latency spec string."""
+    kind, *params = spec.split(":")
+    values = [float(p) for p in params]
+
+    if kind == "constant":
+        return lambda rng: values[0] / 1000
+    if kind == "uniform":
+        return lambda rng: rng.uniform(values[0], values[1]) / 1000
+    if kind == "lognormal":
+        mu = math.log(values[0])
+        return lambda rng: rng.lognormvariate(mu, values[1]) / 1000
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+def prompt_purpose(prompt: str) -> str:
+    """Classify a prompt from claude_extractor as extract or followup."""
+    return "followup" if "follow-up email" in prompt else "extract"
+
+
+def canned_responder(complete_ratio: float, seed: int) -> Responder:
+    """
+    Default responder: extractions are complete with probability
+    complete_ratio (ticket goes READY), otherwise warranty and delivery
+    timeline are missing so the app generates a follow-up.
+    """
+    rng = random.Random(seed)
+    lock = threading.Lock()
+
+    def respond(purpose: str, prompt: str):
+        if purpose == "followup":
+            return json.dumps(DEFAULT_FOLLOWUP), 120
+
+        with lock:
+            complete = rng.random() < complete_ratio
+        fields = dict(ALL_FIELDS)
+        if not complete:
+            fields["warranty"] = None
+            fields["delivery_timeline"] = None
+        return json.dumps(fields), 150
+
+    return respond
+
+
+class _StubServer:
+    """Threaded HTTP server running in a daemon thread."""
+
+    handler_class = BaseHTTPRequestHandler
+
+    def __init__(self, port: int = 0):
+        handler = type("Handler", (self.handler_class,), {"stub": self})
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class _JsonHandler(BaseHTTPRequestHandler):
+    stub = None
+
+    def _read_json(self) -> Dict:
+        length = int(self.headers.get("content-length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _send_json(self, status: int, payload: Dict) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _AnthropicHandler(_JsonHandler):
+
+    def do_POST(self):
+        self.stub.handle_messages(self)
+
+
+class AnthropicStub(_StubServer):
+    """
+    Stand-in for POST /v1/messages.
+
+    Args:
+        latency: Latency spec (see module docstring)
+        error_rate: Fraction of requests answered with 529 overloaded
+        responder: Callable producing the reply text per prompt
+        seed: Seed for latency and error sampling
+    """
+
+    handler_class = _AnthropicHandler
+
+    def __init__(
+        self,
+        latency: str = "lognormal:900:0.4",
+        error_rate: float = 0.0,
+        responder: Optional[Responder] = None,
+        seed: int = 0,
+        port: int = 0
+    ):
+        super().__init__(port)
+        self.sample_latency = parse_latency(latency)
+        self.error_rate = error_rate
+        self.responder = responder or canned_responder(0.5, seed)
+        self.rng = random.Random(seed)
+        self.calls: Dict[str, int] = {"extract": 0, "followup": 0, "error": 0}
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+    def handle_messages(self, handler: _JsonHandler) -> None:
+        request = handler._read_json()
+        prompt = request["messages"][0]["content"]
+        purpose = prompt_purpose(prompt)
+
+        with self.lock:
+            delay = self.sample_latency(self.rng)
+            failed = self.rng.random() < self.error_rate
+        time.sleep(delay)
+
+        if failed:
+            with self.lock:
+                self.calls["error"] += 1
+            handler._send_json(529, {
+                "type": "error",
+                "error": {"type": "overloaded_error", "message": "Overloaded (stub)"}
+            })
+            return
+
+        text, output_tokens = self.responder(purpose, prompt)
+        # Rough token estimate (~4 characters per token)
+        input_tokens = max(1, len(prompt) // 4)
+
+        with self.lock:
+            self.calls[purpose] += 1
+            self.input_tokens += input_tokens
+            self.output_tokens += output_tokens
+
+        handler._send_json(200, {
+            "id": f"msg_stub_{self.rng.getrandbits(48):012x}",
+            "type": "message",
+            "role": "assistant",
+            "model": request.get("model", "stub"),
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": {"input_tokens": input_tokens, "output_tokens": output_tokens},
+        })
+
+    def stats(self) -> Dict:
+        with self.lock:
+            return {
+                "calls": dict(self.calls),
+                "input_tokens": self.input_tokens,
+                "output_tokens": self.output_tokens,
+            }
+
+
+class _ResendHandler(_JsonHandler):
+
+    def do_POST(self):
+        self.stub.handle_send(self)
+
+
+class ResendStub(_StubServer):
+    """Stand-in for POST /emails; records every message it accepts."""
+
+    handler_class = _ResendHandler
+
+    def __init__(self, latency: str = "constant:80", seed: int = 0, port: int = 0):
+        super().__init__(port)
+        self.sample_latency = parse_latency(latency)
+        self.rng = random.Random(seed)
+        self.sent: List[Dict] = []
+
+    def handle_send(self, handler: _JsonHandler) -> None:
+        payload = handler._read_json()
+
+        with self.lock:
+            delay = self.sample_latency(self.rng)
+        time.sleep(delay)
+
+        with self.lock:
+            self.sent.append(payload)
+            message_id = f"resend_stub_{len(self.sent)}"
+
+        handler._send_json(200, {"id": message_id})
+
+    def stats(self) -> Dict:
+        with self.lock:
+            return {"emails_sent": len(self.sent)}
@@ -1,8 +1,11 @@
 import { Routes, Route } from 'react-router-dom'
 import Dashboard from './pages/Dashboard'
 import TicketDetailPage from './pages/TicketDetailPage'
+import { useTicketStream } from './services/ticketStream'
 
 function App() {
+  useTicketStream()
+
   return (
     <div className="min-h-screen bg-gray-50">
       <Routes>
@@ -1,8 +1,8 @@
-import { useState } from 'react'
+import { useEffect, useState } from 'react'
 import { useQuery } from '@tanstack/react-query'
 import { Link } from 'react-router-dom'
-import { fetchTickets } from '../services/api'
-import { RefreshCw } from 'lucide-react'
+import { fetchTickets, searchTickets } from '../services/api'
+import { RefreshCw, Search } from 'lucide-react'
 import { format } from 'date-fns'
 
 const statusColors = {
@@ -11,14 +11,51 @@ const statusColors = {
   READY: 'bg-green-100 text-green-800',
 }
 
+// Search snippets mark matches with <mark>...</mark>; render them as
+// text nodes instead of injecting HTML from email content
+function Snippet({ text }) {
+  const parts = text.split(/<mark>|<\/mark>/)
+  return (
+    <p className="text-xs text-gray-500 mb-3 line-clamp-2">
+      {parts.map((part, i) =>
+        i % 2 ? <mark key={i} className="bg-yellow-200 text-gray-900">{part}</mark> : part
+      )}
+    </p>
+  )
+}
+
 function Dashboard() {
   const [statusFilter, setStatusFilter] = useState(null)
+  const [searchInput, setSearchInput] = useState('')
+  const [searchQuery, setSearchQuery] = useState('')
+
+  // Search once typing pauses
+  useEffect(() => {
+    const timer = setTimeout(() => setSearchQuery(searchInput.trim()), 250)
+    return () => clearTimeout(timer)
+  }, [searchInput])
+
+  const searching = searchQuery.length >= 2
 
-  const { data: tickets = [], isLoading, refetch } = useQuery({
+  const ticketList = useQuery({
     queryKey: ['tickets', statusFilter],
     queryFn: () => fetchTickets(statusFilter),
+    enabled: !searching,
   })
 
+  const searchResults = useQuery({
+    queryKey: ['search', searchQuery],
+    queryFn: () => searchTickets(searchQuery),
+    enabled: searching,
+  })
+
+  const { isLoading, refetch } = searching ? searchResults : ticketList
+  const tickets = searching
+    ? (searchResults.data?.results ?? []).filter(
+        (ticket) => !statusFilter || ticket.status === statusFilter
+      )
+    : ticketList.data ?? []
+
   return (
     <div className="max-w-7xl mx-auto px-4 sm:px-6 lg:px-8 py-8">
       {/* Header */}
@@ -76,6 +113,17 @@ function Dashboard() {
           </button>
         </div>
 
+        <div className="flex items-center gap-2 flex-1 max-w-md mx-4 px-3 py-2 bg-gray-100 rounded-md">
+          <Search size={16} className="text-gray-400" />
+          <input
+            type="search"
+            value={searchInput}
+            onChange={(e) => setSearchInput(e.target.value)}
+            placeholder="Search emails and quote details"
+            className="flex-1 bg-transparent outline-none text-sm text-gray-700"
+          />
+        </div>
+
         <button
           onClick={() => refetch()}
           className="flex items-center gap-2 px-4 py-2 bg-gray-100 hover:bg-gray-200 rounded-md text-gray-700"
@@ -91,9 +139,11 @@ function Dashboard() {
       ) : tickets.length === 0 ? (
         <div className="bg-white rounded-lg shadow p-12 text-center">
           <p className="text-gray-500 text-lg">No tickets found</p>
-          <p className="text-gray-400 text-sm mt-2">
-            Send a test email to /dev/receive-email to create a ticket
-          </p>
+          {!searching && (
+            <p className="text-gray-400 text-sm mt-2">
+              Send a test email to /dev/receive-email to create a ticket
+            </p>
+          )}
         </div>
       ) : (
         <div className="grid gap-4 md:grid-cols-2 lg:grid-cols-3">
@@ -123,15 +173,17 @@ function Dashboard() {
 
               <p className="text-sm text-gray-600 mb-4">{ticket.customer_email}</p>
 
-              {ticket.extracted_data && (
+              {ticket.snippet && <Snippet text={ticket.snippet} />}
+
+              {(ticket.laptop_model || ticket.quantity) && (
                 <div className="text-xs text-gray-500">
-                  {ticket.extracted_data.laptop_model && (
+                  {ticket.laptop_model && (
                     <p className="truncate">
-                      📱 {ticket.extracted_data.laptop_model}
+                      📱 {ticket.laptop_model}
                     </p>
                   )}
-                  {ticket.extracted_data.quantity && (
-                    <p>📦 Qty: {ticket.extracted_data.quantity}</p>
+                  {ticket.quantity && (
+                    <p>📦 Qty: {ticket.quantity}</p>
                   )}
                 </div>
               )}
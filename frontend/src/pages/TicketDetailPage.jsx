@@ -1,6 +1,7 @@
+import { useState } from 'react'
 import { useParams, Link } from 'react-router-dom'
-import { useQuery } from '@tanstack/react-query'
-import { fetchTicketDetails } from '../services/api'
+import { useInfiniteQuery, useQuery } from '@tanstack/react-query'
+import { fetchThreadBody, fetchTicketDetails, fetchTicketThreads } from '../services/api'
 import { ArrowLeft } from 'lucide-react'
 import { format } from 'date-fns'
 
@@ -18,6 +19,15 @@ function TicketDetailPage() {
     queryFn: () => fetchTicketDetails(id),
   })
 
+  // Email thread, a page of previews at a time (full bodies on demand)
+  const threads = useInfiniteQuery({
+    queryKey: ['ticket', id, 'threads'],
+    queryFn: ({ pageParam }) => fetchTicketThreads(id, pageParam),
+    initialPageParam: null,
+    getNextPageParam: (lastPage) => (lastPage.has_more ? lastPage.next_cursor : undefined),
+  })
+  const emails = threads.data?.pages.flatMap((page) => page.threads) ?? []
+
   if (isLoading) {
     return (
       <div className="max-w-5xl mx-auto px-4 py-8">
@@ -112,52 +122,94 @@ function TicketDetailPage() {
           Email Thread
         </h2>
 
-        {ticket.email_threads && ticket.email_threads.length > 0 ? (
+        {emails.length > 0 ? (
           <div className="space-y-4">
-            {ticket.email_threads.map((email) => (
-              <div
-                key={email.id}
-                className={`p-4 rounded-lg ${
-                  email.direction === 'inbound'
-                    ? 'bg-blue-50 border-l-4 border-blue-500'
-                    : 'bg-gray-50 border-l-4 border-gray-400'
-                }`}
-              >
-                <div className="flex items-center justify-between mb-2">
-                  <span
-                    className={`text-xs font-medium ${
-                      email.direction === 'inbound'
-                        ? 'text-blue-700'
-                        : 'text-gray-700'
-                    }`}
-                  >
-                    {email.direction === 'inbound' ? '📥 INBOUND' : '📤 OUTBOUND'}
-                  </span>
-                  <span className="text-xs text-gray-500">
-                    {format(new Date(email.timestamp), 'PPpp')}
-                  </span>
-                </div>
-
-                {email.email_subject && (
-                  <p className="font-semibold text-gray-900 mb-2">
-                    {email.email_subject}
-                  </p>
-                )}
-
-                <p className="text-sm text-gray-700 whitespace-pre-wrap">
-                  {email.email_body}
-                </p>
-              </div>
+            {emails.map((email) => (
+              <ThreadEmail key={email.id} ticketId={id} email={email} />
             ))}
+            {threads.hasNextPage && (
+              <button
+                onClick={() => threads.fetchNextPage()}
+                disabled={threads.isFetchingNextPage}
+                className="w-full py-2 text-sm text-blue-600 hover:text-blue-800 disabled:text-gray-400"
+              >
+                {threads.isFetchingNextPage ? 'Loading...' : 'Load more emails'}
+              </button>
+            )}
           </div>
         ) : (
-          <p className="text-gray-500">No emails in thread</p>
+          <p className="text-gray-500">
+            {threads.isLoading ? 'Loading...' : 'No emails in thread'}
+          </p>
         )}
       </div>
     </div>
   )
 }
 
+function ThreadEmail({ ticketId, email }) {
+  const [expanded, setExpanded] = useState(false)
+
+  // Full body only once expanded; emails never change, so it is cached for good
+  const { data: full, isLoading } = useQuery({
+    queryKey: ['thread', email.id],
+    queryFn: () => fetchThreadBody(ticketId, email.id),
+    enabled: expanded,
+    staleTime: Infinity,
+  })
+
+  return (
+    <div
+      className={`p-4 rounded-lg ${
+        email.direction === 'inbound'
+          ? 'bg-blue-50 border-l-4 border-blue-500'
+          : 'bg-gray-50 border-l-4 border-gray-400'
+      }`}
+    >
+      <div className="flex items-center justify-between mb-2">
+        <span
+          className={`text-xs font-medium ${
+            email.direction === 'inbound'
+              ? 'text-blue-700'
+              : 'text-gray-700'
+          }`}
+        >
+          {email.direction === 'inbound' ? '📥 INBOUND' : '📤 OUTBOUND'}
+        </span>
+        <span className="text-xs text-gray-500">
+          {format(new Date(email.timestamp), 'PPpp')}
+        </span>
+      </div>
+
+      {email.email_subject && (
+        <p className="font-semibold text-gray-900 mb-2">
+          {email.email_subject}
+        </p>
+      )}
+
+      <p className="text-sm text-gray-700 whitespace-pre-wrap">
+        {expanded && full ? full.email_body : email.preview}
+        {!expanded && email.truncated && '…'}
+      </p>
+
+      {email.truncated && (
+        <button
+          onClick={() => setExpanded(!expanded)}
+          className="mt-2 text-xs text-blue-600 hover:text-blue-800"
+        >
+          {expanded
+            ? (isLoading ? 'Loading...' : 'Show less')
+            : `Show full email (${formatSize(email.body_size)})`}
+        </button>
+      )}
+    </div>
+  )
+}
+
+function formatSize(bytes) {
+  return bytes < 1024 ? `${bytes} B` : `${Math.round(bytes / 1024)} KB`
+}
+
 function DataField({ label, value, fullWidth = false }) {
   return (
     <div className={fullWidth ? 'col-span-2' : ''}>
@@ -15,11 +15,27 @@ export const fetchTickets = async (status = null) => {
   return response.data
 }
 
+export const searchTickets = async (q, limit = 30) => {
+  const response = await api.get('/tickets/search', { params: { q, limit } })
+  return response.data
+}
+
 export const fetchTicketDetails = async (id) => {
   const response = await api.get(`/tickets/${id}`)
   return response.data
 }
 
+export const fetchTicketThreads = async (id, cursor = null, limit = 20) => {
+  const params = cursor ? { cursor, limit } : { limit }
+  const response = await api.get(`/tickets/${id}/threads`, { params })
+  return response.data
+}
+
+export const fetchThreadBody = async (id, threadId) => {
+  const response = await api.get(`/tickets/${id}/threads/${threadId}`)
+  return response.data
+}
+
 export const updateTicket = async (id, data) => {
   const response = await api.patch(`/tickets/${id}`, data)
   return response.data
@@ -42,4 +58,7 @@ export const getSentEmails = async () => {
   return response.data
 }
 
+// Server-Sent Events stream of ticket changes (see useTicketStream)
+export const openTicketStream = () => new EventSource(`${API_BASE_URL}/tickets/stream`)
+
 export default api
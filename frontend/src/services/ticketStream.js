@@ -0,0 +1,46 @@
+import { useEffect } from 'react'
+import { useQueryClient } from '@tanstack/react-query'
+import { openTicketStream } from './api'
+
+// Apply a changed ticket summary to one cached ['tickets', status] list
+const applySummary = (tickets, summary, statusFilter) => {
+  const rest = tickets.filter((ticket) => ticket.id !== summary.id)
+  if (statusFilter && summary.status !== statusFilter) {
+    return rest
+  }
+  return [...rest, summary].sort((a, b) => (a.created_at < b.created_at ? 1 : -1))
+}
+
+// Keep cached ticket queries current from GET /tickets/stream instead of
+// refetching: list caches are patched with the pushed summary and the
+// changed ticket's detail query is refetched if it is open
+export function useTicketStream() {
+  const queryClient = useQueryClient()
+
+  useEffect(() => {
+    const source = openTicketStream()
+
+    const onTicket = (event) => {
+      const { ticket } = JSON.parse(event.data)
+
+      queryClient.getQueriesData({ queryKey: ['tickets'] }).forEach(([queryKey, tickets]) => {
+        if (tickets) {
+          queryClient.setQueryData(queryKey, applySummary(tickets, ticket, queryKey[1]))
+        }
+      })
+      queryClient.invalidateQueries({ queryKey: ['ticket', String(ticket.id)] })
+    }
+
+    // Events were missed (slow client, server restart): reload everything
+    const onReset = () => {
+      queryClient.invalidateQueries({ queryKey: ['tickets'] })
+      queryClient.invalidateQueries({ queryKey: ['ticket'] })
+    }
+
+    source.addEventListener('ticket.created', onTicket)
+    source.addEventListener('ticket.updated', onTicket)
+    source.addEventListener('reset', onReset)
+
+    return () => source.close()
+  }, [queryClient])
+}